@@ -21,10 +21,42 @@ statement:
 	| clonarBigrafoStatement NEWLINE
 	| contarLugaresStatement NEWLINE
 	| contarEnlacesStatement NEWLINE
-	| COMMENT NEWLINE?;
+	| buscarNodosStatement NEWLINE
+	| contarLugaresEntrantesStatement NEWLINE
+	| contarEnlacesEntrantesStatement NEWLINE
+	| buscarPadreStatement NEWLINE
+	| agregarLugarStatement NEWLINE
+	| agregarEnlaceStatement NEWLINE
+	| cargarBigrafoStatement NEWLINE
+	| guardarBigrafoStatement NEWLINE
+	| abrirBigrafoStatement NEWLINE
+	| contieneStatement NEWLINE
+	| profundidadStatement NEWLINE
+	| definirReaccionStatement NEWLINE
+	| buscarOcurrenciasStatement NEWLINE
+	| aplicarReaccionStatement NEWLINE
+	| reducirStatement NEWLINE
+	| COMMENT (NEWLINE | EOF);
 
 contarLugaresStatement: 'contar_lugares' ID;
 contarEnlacesStatement: 'contar_enlaces' ID;
+contarLugaresEntrantesStatement: 'contar_lugares_entrantes' ID;
+contarEnlacesEntrantesStatement: 'contar_enlaces_entrantes' ID;
+buscarPadreStatement: 'buscar_padre' ID 'en' ID;
+contieneStatement: 'contiene' ID ',' ID;
+profundidadStatement: 'profundidad' ID;
+definirReaccionStatement: 'definir_reaccion' ID ',' ID 'en' ID;
+buscarOcurrenciasStatement: 'buscar_ocurrencias' ID 'en' ID;
+aplicarReaccionStatement: 'aplicar_reaccion' ID;
+reducirStatement: 'reducir' ID (',' ID)*;
+agregarLugarStatement: 'agregar_lugar' ID ',' ID;
+agregarEnlaceStatement: 'agregar_enlace' ID ',' ID;
+cargarBigrafoStatement:
+	'cargar_bigrafo' ID 'desde' STRING (',' STRING)?;
+guardarBigrafoStatement: 'guardar_bigrafo' ID 'en' STRING;
+abrirBigrafoStatement: 'abrir_bigrafo' STRING 'en' ID;
+buscarNodosStatement:
+	'buscar_nodos' (STRING | '*') (',' STRING)? 'en' ID;
 interseccionBigrafosStatement:
 	'interseccion_bigrafos' ID ',' ID 'en' ID;
 diferenciaBigrafosStatement:
@@ -46,7 +78,7 @@ conditionalStatement:
 whileStatement: 'mientras' expression NEWLINE block;
 
 functionDefinition:
-	'funcion' ID '(' paramList? ')' NEWLINE block;
+	'funcion' PURA? ID '(' paramList? ')' NEWLINE block;
 paramList: ID (',' ID)*;
 returnStatement: 'retornar' expression NEWLINE;
 
@@ -71,6 +103,7 @@ literal:
 
 // Reglas del lexer
 BOOLEAN: 'verdadero' | 'falso';
+PURA: 'pura';
 ID: [a-zA-Z_][a-zA-Z0-9_]*;
 NUMBER: INT ('.' [0-9]*)? (('e' | 'E') ('+' | '-')? [0-9]+)?;
 fragment INT: [0-9]+;
@@ -0,0 +1,127 @@
+import re
+from antlr4 import InputStream, CommonTokenStream
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.error.ErrorListener import ConsoleErrorListener, ErrorListener
+from antlr4.error.ErrorStrategy import BailErrorStrategy, DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
+from antlr_output.DreamchaserLexer import DreamchaserLexer
+from antlr_output.DreamchaserParser import DreamchaserParser
+from compilador import traducir_programa
+
+# Punto de entrada común para convertir el texto de un programa en el árbol de
+# ANTLR o en la RI de compilador.py, usando la caché de programas si se indica.
+#
+# El análisis se hace en dos etapas: primero con predicción SLL y una
+# estrategia que abandona ante el primer error, que es mucho más rápida, y
+# solo si falla se vuelve a analizar con predicción LL completa y la
+# recuperación de errores normal. Si la etapa SLL termina, el árbol es el
+# mismo que daría LL. Los DFA de predicción son atributos de clase de
+# DreamchaserParser y DreamchaserLexer, así que se comparten entre todas las
+# instancias del proceso; precalentar() los llena con los programas de ejemplo.
+
+# Cantidad de análisis resueltos en cada etapa
+estadisticas = {"sll": 0, "ll": 0}
+
+
+class ContadorErrores(ErrorListener):
+    # Los errores se siguen imprimiendo con el ConsoleErrorListener de ANTLR;
+    # este listener solo los cuenta
+    def __init__(self):
+        self.errores = 0
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        self.errores += 1
+
+
+def analizar(texto_programa, dos_etapas=True):
+    contador = ContadorErrores()
+    lexer = DreamchaserLexer(InputStream(texto_programa))
+    lexer.addErrorListener(contador)
+    flujo_tokens = CommonTokenStream(lexer)
+    parser = DreamchaserParser(flujo_tokens)
+
+    if dos_etapas:
+        parser.removeErrorListeners()
+        parser._errHandler = BailErrorStrategy()
+        parser._interp.predictionMode = PredictionMode.SLL
+        try:
+            arbol = parser.program()
+            estadisticas["sll"] += 1
+            return arbol, contador.errores
+        except ParseCancellationException:
+            # Volver a empezar con LL; los tokens ya leídos se reutilizan
+            flujo_tokens.seek(0)
+            parser._errHandler = DefaultErrorStrategy()
+            parser.reset()
+            parser.addErrorListener(ConsoleErrorListener.INSTANCE)
+        parser._interp.predictionMode = PredictionMode.LL
+
+    parser.addErrorListener(contador)
+    arbol = parser.program()
+    estadisticas["ll"] += 1
+    return arbol, contador.errores
+
+
+# Analiza los programas de ejemplo para que los DFA compartidos ya tengan los
+# estados más comunes antes del primer programa del usuario
+def precalentar(textos=None):
+    if textos is None:
+        from ejemplosProgramas.programas import programas
+
+        textos = programas.values()
+    for texto in textos:
+        lexer = DreamchaserLexer(InputStream(texto))
+        lexer.removeErrorListeners()
+        parser = DreamchaserParser(CommonTokenStream(lexer))
+        parser.removeErrorListeners()
+        parser.program()
+
+
+# Sentencias compuestas: su bloque (statement+) absorbe todas las sentencias
+# que vienen después, hasta una línea en blanco, que produce un NEWLINE suelto
+# que ningún bloque acepta
+_INICIO_COMPUESTA = re.compile(r"\s*(si|mientras|funcion)\b")
+
+
+# Divide un programa, leído línea por línea de un archivo (o de cualquier
+# iterable de líneas), en fragmentos que contienen sentencias completas del
+# nivel superior: una línea por sentencia simple y, para si/mientras/funcion,
+# todas las líneas hasta la siguiente línea en blanco. Así no hace falta tener
+# el programa entero en memoria para analizarlo. Devuelve pares (línea en que
+# empieza el fragmento, desde 1; texto del fragmento)
+def fragmentos_programa(lineas):
+    fragmento = []
+    inicio = 0
+    for numero, linea in enumerate(lineas, 1):
+        if not fragmento:
+            if not linea.strip():
+                continue
+            fragmento.append(linea)
+            inicio = numero
+            if not _INICIO_COMPUESTA.match(linea):
+                yield inicio, linea
+                fragmento = []
+        elif not linea.strip():
+            yield inicio, "".join(fragmento)
+            fragmento = []
+        else:
+            fragmento.append(linea)
+    if fragmento:
+        yield inicio, "".join(fragmento)
+
+
+# Devuelve la RI del programa. Con una caché, un texto que ya se compiló no se
+# vuelve a analizar; los programas con errores de sintaxis no se guardan para
+# que sus mensajes se impriman en cada ejecución. Las advertencias de la
+# caché van a salida (la del intérprete, ver salida.py)
+def traducir_texto(texto_programa, cache=None, salida=None):
+    if cache is not None:
+        programa = cache.obtener(texto_programa, salida)
+        if programa is not None:
+            return programa
+
+    arbol, errores = analizar(texto_programa)
+    programa = traducir_programa(arbol)
+    if cache is not None and errores == 0:
+        cache.guardar(texto_programa, programa, salida)
+    return programa
@@ -0,0 +1,49 @@
+# Mide el análisis sintáctico de programas grandes con los DFA de predicción
+# vacíos (primer análisis del proceso) y ya calentados, con predicción LL
+# completa y con el análisis en dos etapas SLL/LL de analizador.py.
+#
+# Uso: python benchmarks/bench_analisis.py [repeticiones]
+import sys
+
+from generadores import minimo_tiempo, sentencias_mixtas
+from antlr4.dfa.DFA import DFA
+from antlr4.PredictionContext import PredictionContextCache
+from antlr_output.DreamchaserLexer import DreamchaserLexer
+from antlr_output.DreamchaserParser import DreamchaserParser
+from analizador import analizar, precalentar
+
+CANTIDADES_SENTENCIAS = (20, 500, 5000)
+
+
+# Descarta los DFA compartidos, como en un proceso recién iniciado
+def enfriar():
+    for reconocedor in (DreamchaserLexer, DreamchaserParser):
+        atn = reconocedor.atn
+        reconocedor.decisionsToDFA = [
+            DFA(estado, i) for i, estado in enumerate(atn.decisionToState)
+        ]
+    DreamchaserParser.sharedContextCache = PredictionContextCache()
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    print(
+        f"{'sentencias':>10}{'LL frío':>12}{'LL caliente':>14}"
+        f"{'SLL frío':>12}{'SLL caliente':>14}"
+    )
+    for cantidad in CANTIDADES_SENTENCIAS:
+        texto = sentencias_mixtas(cantidad)
+        fila = f"{cantidad:>10}"
+        for dos_etapas in (False, True):
+            frio = minimo_tiempo(
+                lambda _: analizar(texto, dos_etapas), repeticiones, enfriar
+            )
+            enfriar()
+            precalentar()
+            caliente = minimo_tiempo(lambda: analizar(texto, dos_etapas), repeticiones)
+            fila += f"{frio:>12.3f}{caliente:>14.3f}"
+        print(fila)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# Compara saber si un nodo está dentro de otro con el índice del bosque de
+# lugares contra recorrer Nodo.lugares recursivamente, y mide cuánto cuesta
+# construir el índice.
+#
+# Uso: python benchmarks/bench_arbol_lugares.py [cantidad_nodos]
+import sys
+
+from generadores import ENCABEZADO, construir_bigrafo, medir
+
+
+def contiene_recorriendo(nodo, id_nodo):
+    return any(
+        lugar.id == id_nodo or contiene_recorriendo(lugar, id_nodo)
+        for lugar in nodo.lugares
+    )
+
+
+def main():
+    cantidad_nodos = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    bigrafo = construir_bigrafo(cantidad_nodos, enlaces=False, por_lotes=True)
+    print(f"{cantidad_nodos} nodos")
+    print(ENCABEZADO)
+
+    ultimo = f"n{cantidad_nodos - 1}"
+    raiz = bigrafo.nodos["n0"]
+    medir(
+        "contiene recorriendo Nodo.lugares", lambda: contiene_recorriendo(raiz, ultimo)
+    )
+    medir("construir el índice", bigrafo.lugares.indexar_arbol)
+    medir("contiene", lambda: bigrafo.contiene("n0", ultimo), 10000)
+    medir("profundidad", lambda: bigrafo.profundidad(ultimo), 10000)
+    medir("crearia_ciclo", lambda: bigrafo.crearia_ciclo(ultimo, "n0"), 10000)
+
+    def agregar_nodos():
+        for i in range(1000):
+            bigrafo.agregar_nodo(f"m{i}", "lugar")
+
+    medir("1000 nodos más con el índice", agregar_nodos)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# Mide cuánto tarda en arrancar el intérprete: el tiempo de importar main
+# (que no importa la GUI ni NumPy), el de importar además la GUI como hacía
+# antes main.py, y el de ejecutar un programa chico desde la línea de comandos. Con
+# python -X importtime muestra los módulos que más tardan en importarse.
+#
+# Uso: python benchmarks/bench_arranque.py [repeticiones]
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from generadores import RAIZ
+
+IMPORTACIONES = {
+    "main": "import main",
+    "main y tkinter": "import main, tkinter",
+    "main y la GUI": "import main, tkinter, gui",
+}
+
+
+# Devuelve (microsegundos acumulados de la importación, módulos por tiempo
+# propio) a partir de la salida de -X importtime, o un error
+def importtime(codigo):
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=RAIZ,
+        capture_output=True,
+        text=True,
+    )
+    if proceso.returncode != 0:
+        return None, proceso.stderr.strip().splitlines()[-1]
+    modulos = []
+    total = 0
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:") :].split("|")
+        # Los módulos que importa otro módulo tienen más sangría
+        if nombre[1:] == nombre.lstrip():
+            total += int(acumulado)
+        modulos.append((int(propio), int(acumulado), nombre.strip()))
+    return total, sorted(modulos, reverse=True)
+
+
+def medir_proceso(argumentos, repeticiones, entrada=None):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        subprocess.run(
+            argumentos, cwd=RAIZ, capture_output=True, input=entrada, text=True
+        )
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos)
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    print(f"{'importar':<32}{'importtime (ms)':>16}{'proceso (ms)':>14}")
+    for descripcion, codigo in IMPORTACIONES.items():
+        total, modulos = importtime(codigo)
+        if total is None:
+            print(f"{descripcion:<32}  no disponible: {modulos}")
+            continue
+        proceso = medir_proceso([sys.executable, "-c", codigo], repeticiones)
+        print(f"{descripcion:<32}{total / 1000:>16.1f}{proceso * 1000:>14.1f}")
+
+    with tempfile.NamedTemporaryFile("w", suffix=".dc", delete=False) as archivo:
+        archivo.write("x = 2 * 21\nimprimir(x)\n")
+    try:
+        archivo_ms = medir_proceso(
+            [sys.executable, "main.py", archivo.name], repeticiones
+        )
+    finally:
+        os.unlink(archivo.name)
+    entrada_ms = medir_proceso(
+        [sys.executable, "main.py", "-"], repeticiones, "x = 2 * 21\nimprimir(x)\n"
+    )
+    print(f"\n{'main.py archivo':<32}{archivo_ms * 1000:>30.1f}")
+    print(f"{'main.py - (entrada estándar)':<32}{entrada_ms * 1000:>30.1f}")
+
+    _, modulos = importtime(IMPORTACIONES["main"])
+    print("\nMódulos que más tardan al importar main (python -X importtime):")
+    print(f"{'propio (ms)':>12}{'acumulado (ms)':>16}  módulo")
+    for propio, acumulado, nombre in modulos[:15]:
+        print(f"{propio / 1000:>12.1f}{acumulado / 1000:>16.1f}  {nombre}")
+
+
+if __name__ == "__main__":
+    main()
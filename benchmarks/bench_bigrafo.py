@@ -0,0 +1,89 @@
+# Compara la memoria y el tiempo de construcción de bigrafos grandes entre el
+# almacenamiento compacto de bigrafo.py y la implementación anterior, basada
+# en un objeto Nodo por nodo con listas de otros Nodo (copiada aquí como
+# referencia).
+#
+# Uso: python benchmarks/bench_bigrafo.py [cantidad_nodos]
+import sys
+import time
+
+from generadores import MIB, construir_bigrafo, memoria
+from bigrafo import Bigrafo
+
+
+class NodoObjetos:
+    def __init__(self, id, tipo, valor=None):
+        self.id = id
+        self.tipo = tipo
+        self.valor = valor
+        self.lugares = []
+        self.enlaces = []
+
+
+class BigrafoObjetos:
+    def __init__(self):
+        self.nodos = {}
+
+    def agregar_nodo(self, id, tipo, valor=None):
+        if id not in self.nodos:
+            self.nodos[id] = NodoObjetos(id, tipo, valor)
+        return self.nodos[id]
+
+    def agregar_lugar(self, id_padre, id_hijo):
+        if id_padre in self.nodos and id_hijo in self.nodos:
+            self.nodos[id_padre].lugares.append(self.nodos[id_hijo])
+
+    def agregar_enlace(self, id_origen, id_destino):
+        if id_origen in self.nodos and id_destino in self.nodos:
+            self.nodos[id_origen].enlaces.append(self.nodos[id_destino])
+
+    def contar_lugares(self, id_nodo):
+        if id_nodo in self.nodos:
+            return len(self.nodos[id_nodo].lugares)
+        return 0
+
+
+TIPOS = ("lugar", "agente", "puerto", "enlace")
+
+
+def consultar(bigrafo, cantidad_nodos):
+    total = 0
+    for i in range(cantidad_nodos):
+        total += bigrafo.contar_lugares(f"n{i}")
+    return total
+
+
+def medir(clase, cantidad_nodos):
+    inicio = time.perf_counter()
+    bigrafo, reservada, _ = memoria(
+        lambda: construir_bigrafo(cantidad_nodos, tipos=TIPOS, clase=clase)
+    )
+    construccion = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    total = consultar(bigrafo, cantidad_nodos)
+    consulta = time.perf_counter() - inicio
+    return construccion, consulta, reservada, total
+
+
+def main():
+    cantidad_nodos = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    print(f"{cantidad_nodos} nodos, {2 * (cantidad_nodos - 1)} aristas")
+    print(
+        f"{'almacenamiento':<16}{'construir (s)':>15}{'contar (s)':>12}"
+        f"{'memoria (MiB)':>15}{'bytes/nodo':>12}"
+    )
+    totales = set()
+    for nombre, clase in (("objetos", BigrafoObjetos), ("compacto", Bigrafo)):
+        construccion, consulta, reservada, total = medir(clase, cantidad_nodos)
+        totales.add(total)
+        print(
+            f"{nombre:<16}{construccion:>15.2f}{consulta:>12.2f}"
+            f"{reservada:>15.1f}{reservada * MIB / cantidad_nodos:>12.0f}"
+        )
+    if len(totales) > 1:
+        print("¡Los conteos de lugares no coinciden!")
+
+
+if __name__ == "__main__":
+    main()
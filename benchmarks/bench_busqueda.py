@@ -0,0 +1,47 @@
+# Compara buscar_nodos con los índices por tipo y por valor contra recorrer
+# todos los nodos, como se hacía antes de tener índices.
+#
+# Uso: python benchmarks/bench_busqueda.py [cantidad_nodos] [cantidad_tipos]
+import sys
+
+from generadores import ENCABEZADO, construir_bigrafo, medir
+from bigrafo import CUALQUIERA
+
+
+def recorrer(bigrafo, tipo, valor):
+    return [
+        id
+        for id, nodo in bigrafo.nodos.items()
+        if (tipo is CUALQUIERA or nodo.tipo == tipo)
+        and (valor is CUALQUIERA or nodo.valor == valor)
+    ]
+
+
+def main():
+    cantidad_nodos = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    cantidad_tipos = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    tipos = [f"tipo{i}" for i in range(cantidad_tipos)]
+    bigrafo = construir_bigrafo(cantidad_nodos, tipos=tipos, enlaces=False)
+    print(f"{cantidad_nodos} nodos, {cantidad_tipos} tipos")
+    print(ENCABEZADO)
+
+    medir("recorrido por tipo", lambda: recorrer(bigrafo, "tipo7", CUALQUIERA))
+    medir("recorrido por valor", lambda: recorrer(bigrafo, CUALQUIERA, "valor 7"))
+    medir("construir el índice por tipo", bigrafo.indice_tipos)
+    medir("construir el índice por valor", bigrafo.indice_valores)
+    medir("búsqueda por tipo", lambda: bigrafo.buscar_nodos("tipo7"), 100)
+    medir("búsqueda por valor", lambda: bigrafo.buscar_nodos(valor="valor 7"), 100)
+    medir(
+        "búsqueda por tipo y valor",
+        lambda: bigrafo.buscar_nodos("tipo7", "valor 7"),
+        100,
+    )
+    medir("conteo por tipo", lambda: bigrafo.contar_nodos("tipo7"), 100)
+
+    clon = bigrafo.clonar()
+    medir("nodo nuevo en un clon con índices", lambda: clon.agregar_nodo("x", "tipo7"))
+    assert clon.contar_nodos("tipo7") == bigrafo.contar_nodos("tipo7") + 1
+
+
+if __name__ == "__main__":
+    main()
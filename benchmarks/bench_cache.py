@@ -0,0 +1,35 @@
+# Compara el tiempo de obtener la RI de un programa grande analizándolo con
+# ANTLR contra leerla de la caché de programas en disco.
+#
+# Uso: python benchmarks/bench_cache.py [repeticiones]
+import sys
+import tempfile
+
+from generadores import minimo_tiempo, sentencias_mixtas
+from analizador import traducir_texto
+from cache_programas import CacheProgramas
+
+CANTIDADES_SENTENCIAS = (100, 1000, 10000)
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    with tempfile.TemporaryDirectory() as directorio:
+        cache = CacheProgramas(directorio)
+        print(f"{'sentencias':>10}{'análisis (s)':>15}{'caché (s)':>12}{'mejora':>10}")
+        for cantidad in CANTIDADES_SENTENCIAS:
+            texto = sentencias_mixtas(cantidad)
+            sin_cache = minimo_tiempo(lambda: traducir_texto(texto), repeticiones)
+            traducir_texto(texto, cache)
+            con_cache = minimo_tiempo(
+                lambda: traducir_texto(texto, cache), repeticiones
+            )
+            assert traducir_texto(texto, cache) == traducir_texto(texto)
+            print(
+                f"{cantidad:>10}{sin_cache:>15.4f}{con_cache:>12.4f}"
+                f"{sin_cache / con_cache:>9.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
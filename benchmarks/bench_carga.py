@@ -0,0 +1,64 @@
+# Mide cargar_bigrafo desde CSV contra construir el mismo bigrafo con una
+# sentencia crear_nodo por nodo, y la memoria extra de la carga según el
+# tamaño del lote.
+#
+# Uso: python benchmarks/bench_carga.py [cantidad_nodos]
+import sys
+import tempfile
+import time
+
+from generadores import (
+    construir_bigrafo,
+    crear_nodos,
+    escribir_csv,
+    interprete_en_memoria,
+    memoria,
+)
+from bigrafo import Bigrafo
+from cargador import cargar_bigrafo
+
+TIPOS = [f"tipo{i}" for i in range(10)]
+
+
+def crear_con_sentencias(cantidad_nodos):
+    programa = crear_nodos(cantidad_nodos, enlaces=False, lugares=False)
+    interprete_en_memoria().ejecutar_flujo(programa.splitlines(True))
+
+
+def main():
+    cantidad_nodos = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    with tempfile.TemporaryDirectory() as directorio:
+        bigrafo = construir_bigrafo(cantidad_nodos, tipos=TIPOS, por_lotes=True)
+        rutas = escribir_csv(bigrafo, directorio)
+        filas = len(bigrafo.nodos) + len(bigrafo.lugares) + len(bigrafo.enlaces)
+        del bigrafo
+
+        inicio = time.perf_counter()
+        cargar_bigrafo(Bigrafo(), *rutas)
+        transcurrido = time.perf_counter() - inicio
+        print(
+            f"cargar_bigrafo: {filas} filas en {transcurrido:.2f} s "
+            f"({filas / transcurrido * 60 / 1e6:.1f} millones de filas por minuto)"
+        )
+
+        muestra = min(cantidad_nodos, 20000)
+        inicio = time.perf_counter()
+        crear_con_sentencias(muestra)
+        transcurrido = time.perf_counter() - inicio
+        print(
+            f"crear_nodo: {muestra} sentencias en {transcurrido:.2f} s "
+            f"({muestra / transcurrido * 60 / 1e6:.2f} millones por minuto)"
+        )
+
+        print(f"{'lote (bytes)':>14}{'memoria máxima (MiB)':>24}{'bigrafo (MiB)':>16}")
+        for tamano_lote in (256 * 1024, 1024 * 1024, 8 * 1024 * 1024):
+            bigrafo = Bigrafo()
+            _, final, maxima = memoria(
+                lambda: cargar_bigrafo(bigrafo, *rutas, tamano_lote=tamano_lote)
+            )
+            print(f"{tamano_lote:>14}{maxima:>24.1f}{final:>16.1f}")
+            del bigrafo
+
+
+if __name__ == "__main__":
+    main()
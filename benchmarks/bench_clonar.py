@@ -0,0 +1,42 @@
+# Mide el costo de clonar_bigrafo y de las operaciones de conjuntos sobre un
+# bigrafo grande: cada clon comparte los datos del original y solo copia los
+# bloques que modifica.
+#
+# Uso: python benchmarks/bench_clonar.py [cantidad_nodos] [cantidad_clones]
+import sys
+
+from generadores import ENCABEZADO_MEMORIA, construir_bigrafo, medir_memoria
+from bigrafo import Bigrafo
+
+
+def main():
+    cantidad_nodos = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    cantidad_clones = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    original = construir_bigrafo(cantidad_nodos, enlaces=False)
+    print(f"{cantidad_nodos} nodos")
+    print(ENCABEZADO_MEMORIA)
+
+    clones = medir_memoria(
+        f"{cantidad_clones} clones",
+        lambda: [original.clonar() for _ in range(cantidad_clones)],
+    )
+
+    def modificar():
+        for i, clon in enumerate(clones):
+            clon.agregar_nodo(f"extra{i}", "agente", "nuevo")
+            clon.agregar_lugar("n0", f"extra{i}")
+
+    medir_memoria(f"{cantidad_clones} clones con un nodo y un lugar nuevos", modificar)
+
+    otro = Bigrafo()
+    for i in range(0, cantidad_nodos, 1000):
+        otro.agregar_nodo(f"n{i}", "lugar", "otro")
+    medir_memoria("unión con un bigrafo pequeño", lambda: original.union(otro))
+    medir_memoria("intersección consigo mismo", lambda: original.interseccion(original))
+
+    assert original.contar_lugares("n0") == 4
+    assert len(original.nodos) == cantidad_nodos
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# Mide unir_bigrafos, interseccion_bigrafos, diferencia_bigrafos y
+# clonar_bigrafo sobre dos bigrafos grandes que comparten la mitad de sus
+# nodos y parte de sus aristas.
+#
+# Uso: python benchmarks/bench_conjuntos.py [cantidad_nodos]
+import sys
+import time
+
+from generadores import bigrafos_solapados
+
+
+def medir(descripcion, funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    transcurrido = time.perf_counter() - inicio
+    print(
+        f"{descripcion:<16}{transcurrido:>12.3f}{len(resultado.nodos):>12}"
+        f"{len(resultado.lugares):>12}{len(resultado.enlaces):>12}"
+    )
+    return resultado
+
+
+def main():
+    cantidad_nodos = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    inicio = time.perf_counter()
+    a, b = bigrafos_solapados(cantidad_nodos)
+    print(
+        f"dos bigrafos de {cantidad_nodos} nodos construidos en "
+        f"{time.perf_counter() - inicio:.1f} s"
+    )
+    print(
+        f"{'operación':<16}{'tiempo (s)':>12}{'nodos':>12}{'lugares':>12}{'enlaces':>12}"
+    )
+    medir("unión", lambda: a.union(b))
+    medir("intersección", lambda: a.interseccion(b))
+    medir("diferencia", lambda: a.diferencia(b))
+    medir("clon", lambda: a.clonar())
+    medir("unión consigo", lambda: a.union(a))
+
+
+if __name__ == "__main__":
+    main()
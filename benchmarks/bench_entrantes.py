@@ -0,0 +1,59 @@
+# Compara buscar el padre y los enlaces entrantes de un nodo con las cadenas
+# de aristas entrantes contra recorrer todos los nodos, y mide cuánto cuesta
+# mantenerlas al agregar aristas.
+#
+# Uso: python benchmarks/bench_entrantes.py [cantidad_nodos]
+import sys
+
+from generadores import ENCABEZADO, construir_bigrafo, medir
+
+
+# El bigrafo de construir_bigrafo con enlaces que llegan a los primeros 100
+# nodos, para que tengan muchos enlaces entrantes
+def construir(cantidad_nodos):
+    bigrafo = construir_bigrafo(cantidad_nodos, enlaces=False)
+    for i in range(1, cantidad_nodos):
+        bigrafo.agregar_enlace(f"n{(i * 7919) % cantidad_nodos}", f"n{i % 100}")
+    return bigrafo
+
+
+def padre_recorriendo(bigrafo, id_nodo):
+    for id, nodo in bigrafo.nodos.items():
+        if any(lugar.id == id_nodo for lugar in nodo.lugares):
+            return id
+    return None
+
+
+def main():
+    cantidad_nodos = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    bigrafo = medir("construir", lambda: construir(cantidad_nodos))
+    print(f"{cantidad_nodos} nodos")
+    print(ENCABEZADO)
+
+    ultimo = f"n{cantidad_nodos - 1}"
+    medir("padre recorriendo los nodos", lambda: padre_recorriendo(bigrafo, ultimo))
+    medir("construir las cadenas de entrantes", bigrafo.lugares.indexar_entrantes)
+    medir("padre", lambda: bigrafo.padre(ultimo), 1000)
+    medir(
+        "contar_lugares_entrantes",
+        lambda: bigrafo.contar_lugares_entrantes(ultimo),
+        1000,
+    )
+    medir(
+        "contar_enlaces_entrantes", lambda: bigrafo.contar_enlaces_entrantes("n7"), 1000
+    )
+    medir(
+        f"enlaces entrantes de un nodo con {bigrafo.contar_enlaces_entrantes('n7')}",
+        lambda: bigrafo.enlaces.entrantes(bigrafo.indices["n7"]),
+        100,
+    )
+
+    def agregar_lugares():
+        for i in range(1, cantidad_nodos):
+            bigrafo.agregar_lugar("n0", f"n{i}")
+
+    medir(f"{cantidad_nodos - 1} lugares más con las cadenas", agregar_lugares)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# Compara el pico de memoria y el tiempo de ejecutar un script grande de
+# construcción de bigrafos analizándolo completo contra ejecutarlo por partes
+# con DreamchaserInterpreter.ejecutar_flujo.
+#
+# Uso: python benchmarks/bench_flujo.py [cantidad_nodos]
+import os
+import sys
+import tempfile
+import time
+
+from generadores import crear_nodos, interprete_en_memoria, memoria
+from analizador import analizar
+
+
+def completo(ruta, motor):
+    interprete = interprete_en_memoria()
+    with open(ruta, "r", encoding="utf-8") as archivo:
+        arbol, _ = analizar(archivo.read())
+    interprete.ejecutar(arbol, motor)
+    return interprete
+
+
+def por_partes(ruta, motor):
+    interprete = interprete_en_memoria()
+    with open(ruta, "r", encoding="utf-8") as archivo:
+        interprete.ejecutar_flujo(archivo, motor)
+    return interprete
+
+
+def medir(funcion, ruta, motor):
+    inicio = time.perf_counter()
+    interprete, _, pico = memoria(lambda: funcion(ruta, motor))
+    transcurrido = time.perf_counter() - inicio
+    return transcurrido, pico, len(interprete.bigrafos["b"].nodos)
+
+
+def main():
+    cantidad_nodos = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "nodos.dc")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            archivo.write(crear_nodos(cantidad_nodos, enlaces=False, lugares=False))
+            archivo.write("contar_lugares n0\n")
+        print(f"{cantidad_nodos} sentencias crear_nodo")
+        print(f"{'modo':>22}{'tiempo (s)':>12}{'pico (MiB)':>12}")
+        for motor in ("clausuras", "arbol"):
+            for nombre, funcion in (("completo", completo), ("por partes", por_partes)):
+                tiempo, pico, nodos = medir(funcion, ruta, motor)
+                assert nodos == cantidad_nodos
+                print(f"{nombre + ' / ' + motor:>22}{tiempo:>12.2f}{pico:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
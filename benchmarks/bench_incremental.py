@@ -0,0 +1,75 @@
+# Mide cuánto se ahorra al volver a ejecutar un programa largo después de
+# cambiar una de sus últimas líneas (lo que hace la GUI, ver incremental.py):
+# ejecutarlo completo otra vez contra seguir desde el último punto de control
+# anterior al cambio. También muestra cuánto cuesta guardar los puntos de
+# control en la primera ejecución.
+#
+# Uso: python benchmarks/bench_incremental.py [cantidad_nodos] [motor]
+#
+# Cada tiempo es el mínimo de tres ejecuciones.
+import sys
+
+from generadores import minimo_tiempo
+from dreamchaser_interpreter import DreamchaserInterpreter
+from incremental import EjecucionIncremental
+from salida import SalidaSilenciosa
+
+
+def generar_programa(cantidad_nodos, ultimo_valor):
+    lineas = ["crear_bigrafo b\n", "total = 0\n"]
+    for i in range(cantidad_nodos):
+        lineas.append(f"crear_nodo n{i}('tipo{i % 10}', 'valor {i}')\n")
+        if i:
+            lineas.append(f"agregar_enlace n{i - 1}, n{i}\n")
+        lineas.append(f"total = total + {i}\n")
+    lineas.append(f"total = total + {ultimo_valor}\n")
+    return "".join(lineas)
+
+
+REPETICIONES = 3
+
+
+def main():
+    cantidad_nodos = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    motor = sys.argv[2] if len(sys.argv) > 2 else "clausuras"
+    original = generar_programa(cantidad_nodos, 1)
+    editado = generar_programa(cantidad_nodos, 2)
+
+    def completo():
+        interprete = DreamchaserInterpreter(salida=SalidaSilenciosa())
+        interprete.ejecutar_flujo(editado.splitlines(True), motor)
+
+    def con_puntos():
+        incremental = EjecucionIncremental()
+        incremental.ejecutar(
+            DreamchaserInterpreter(salida=SalidaSilenciosa()), original, motor
+        )
+        return incremental
+
+    incremental = con_puntos()
+
+    def reanudar():
+        incremental.ejecutar(
+            DreamchaserInterpreter(salida=SalidaSilenciosa()), editado, motor
+        )
+        # Vuelve al programa original sin contar el tiempo de esa ejecución
+        incremental.fragmentos[-1] = None
+
+    reanudado = minimo_tiempo(reanudar, REPETICIONES)
+    print(f"{len(incremental.fragmentos):,} sentencias, motor {motor}")
+    print(f"{'ejecución':<34}{'tiempo (s)':>12}")
+    for descripcion, funcion in (
+        ("completa, sin puntos de control", completo),
+        ("completa, con puntos de control", con_puntos),
+    ):
+        print(f"{descripcion:<34}{minimo_tiempo(funcion, REPETICIONES):>12.3f}")
+    print(f"{'desde el último punto de control':<34}{reanudado:>12.3f}")
+    print(
+        f"Puntos de control: {len(incremental.puntos)} "
+        f"(cada {incremental.intervalo} sentencias); se volvieron a ejecutar "
+        f"{len(incremental.fragmentos) - incremental.reutilizados}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# Mide guardar un bigrafo como instantánea, abrirla con mmap y el primer
+# acceso a sus nodos, contra volver a construirlo desde CSV con
+# cargar_bigrafo.
+#
+# Uso: python benchmarks/bench_instantanea.py [cantidad_nodos]
+import os
+import sys
+import tempfile
+
+from generadores import ENCABEZADO, construir_bigrafo, escribir_csv, medir
+from bigrafo import Bigrafo
+from cargador import cargar_bigrafo
+
+TIPOS = [f"tipo{i}" for i in range(10)]
+
+
+def main():
+    cantidad_nodos = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    bigrafo = construir_bigrafo(cantidad_nodos, tipos=TIPOS, por_lotes=True)
+    print(f"{cantidad_nodos} nodos")
+    print(ENCABEZADO)
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "bigrafo.dcbg")
+        medir("guardar", lambda: bigrafo.guardar(ruta))
+        print(f"tamaño del archivo: {os.path.getsize(ruta) / 2**20:.1f} MiB")
+
+        abierto = medir("abrir", lambda: Bigrafo.abrir(ruta))
+        ultimo = f"n{cantidad_nodos - 1}"
+        medir("primer acceso a un nodo", lambda: abierto.nodos[ultimo].valor)
+        medir("vecinos de un nodo", lambda: [n.id for n in abierto.nodos["n1"].lugares])
+        medir("padre de un nodo", lambda: abierto.padre(ultimo))
+        medir("buscar_nodos por tipo", lambda: abierto.contar_nodos("tipo3"))
+
+        rutas = escribir_csv(bigrafo, directorio)
+        medir("cargar_bigrafo desde CSV", lambda: cargar_bigrafo(Bigrafo(), *rutas))
+
+
+if __name__ == "__main__":
+    main()
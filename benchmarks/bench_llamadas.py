@@ -0,0 +1,55 @@
+# Mide el costo de las llamadas a funciones de usuario según la cantidad de
+# variables globales vivas. El recorrido del árbol copia el diccionario de
+# variables en cada llamada; los motores compilados usan marcos que solo
+# guardan lo que la llamada escribe.
+#
+# Uso: python benchmarks/bench_llamadas.py [repeticiones]
+import sys
+
+from generadores import interprete_en_memoria, minimo_tiempo
+from analizador import analizar
+from dreamchaser_interpreter import MOTORES
+
+CANTIDADES_GLOBALES = (10, 1000, 10000)
+ITERACIONES = 9000
+
+
+def generar_programa(cantidad_globales, iteraciones):
+    globales = "".join(f"g{i} = {i}\n" for i in range(cantidad_globales))
+    return globales + f"""i = 0
+mientras i < {iteraciones}
+ i = i + 1
+ r = doble(i)
+ funcion doble(x)
+  y = x * 2
+  retornar y
+"""
+
+
+def medir(motor, arbol, repeticiones):
+    return minimo_tiempo(
+        lambda interprete: interprete.ejecutar(arbol, motor),
+        repeticiones,
+        interprete_en_memoria,
+    )
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    # Se descuenta el mismo programa sin iteraciones para aislar las llamadas
+    print(f"Microsegundos por llamada ({ITERACIONES} iteraciones, 2 llamadas cada una)")
+    print(f"{'globales':>10}" + "".join(f"{motor:>12}" for motor in MOTORES))
+    for cantidad in CANTIDADES_GLOBALES:
+        arbol, _ = analizar(generar_programa(cantidad, ITERACIONES))
+        arbol_base, _ = analizar(generar_programa(cantidad, 0))
+        fila = f"{cantidad:>10}"
+        for motor in MOTORES:
+            tiempo = medir(motor, arbol, repeticiones) - medir(
+                motor, arbol_base, repeticiones
+            )
+            fila += f"{tiempo / (2 * ITERACIONES) * 1e6:>12.2f}"
+        print(fila)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# Compara los motores de ejecución (recorrido del árbol con ParseTreeWalker,
+# clausuras compiladas y máquina virtual de bytecode) en programas con bucles.
+#
+# Uso: python benchmarks/bench_motores.py [repeticiones]
+import sys
+
+from generadores import interprete_en_memoria, minimo_tiempo
+from analizador import analizar
+from dreamchaser_interpreter import MOTORES
+from ejemplosProgramas.programas import programas
+
+PROGRAMAS = {
+    "programa_prueba": programas["programa_prueba"],
+    "bucle_aritmetico": """
+i = 0
+suma = 0
+producto = 1
+mientras i < 10000
+ i = i + 1
+ suma = suma + i * 2 % 7
+ producto = (producto * 3) % 1000003
+""",
+    "bucle_librerias": """
+importar 'potencia'
+importar 'raizCuadrada'
+i = 0
+total = 0
+mientras i < 5000
+ i = i + 1
+ total = total + raizCuadrada(potencia(i, 2))
+""",
+}
+
+
+# Devuelve el mejor tiempo y el intérprete de la última ejecución, para
+# comparar el estado final entre motores
+def medir(motor, arbol, repeticiones):
+    interpretes = []
+
+    def preparar():
+        interpretes.append(interprete_en_memoria())
+        return interpretes[-1]
+
+    mejor = minimo_tiempo(
+        lambda interprete: interprete.ejecutar(arbol, motor), repeticiones, preparar
+    )
+    return mejor, interpretes[-1]
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{'programa':<20}" + "".join(f"{motor + ' (s)':>16}" for motor in MOTORES))
+    for nombre, texto in PROGRAMAS.items():
+        arbol, _ = analizar(texto)
+        tiempos = {}
+        estados = {}
+        for motor in MOTORES:
+            tiempos[motor], interprete = medir(motor, arbol, repeticiones)
+            estados[motor] = (interprete.variables, interprete.constants)
+        print(
+            f"{nombre:<20}" + "".join(f"{tiempos[motor]:>16.4f}" for motor in MOTORES)
+        )
+        print(
+            f"{'  aceleración':<20}"
+            + "".join(
+                f"{tiempos['arbol'] / tiempos[motor]:>15.1f}x" for motor in MOTORES
+            )
+        )
+        if any(estado != estados["arbol"] for estado in estados.values()):
+            print(f"  {nombre}: ¡el estado final no coincide entre motores!")
+
+
+if __name__ == "__main__":
+    main()
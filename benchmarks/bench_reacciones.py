@@ -0,0 +1,123 @@
+# Mide la búsqueda de ocurrencias de un redex y la reducción hasta un punto
+# fijo en bigrafos sintéticos, y compara la búsqueda con una sin índices ni
+# orden (probar cada nodo del anfitrión para cada nodo del redex).
+#
+# Uso: python benchmarks/bench_reacciones.py [cantidad_nodos]
+import sys
+
+from generadores import ENCABEZADO, medir
+from bigrafo import Bigrafo
+from reacciones import Reaccion, ocurrencias, reducir
+
+# Habitaciones con agentes adentro; algunos agentes tienen un enlace a una
+# llave. La reacción mueve la llave adentro del agente
+TIPOS = ("habitacion", "agente", "llave")
+
+
+def construir(cantidad_nodos):
+    bigrafo = Bigrafo()
+    ids = [f"n{i}" for i in range(cantidad_nodos)]
+    tipos = [TIPOS[i % 3] for i in range(cantidad_nodos)]
+    bigrafo.agregar_nodos(
+        ids, tipos, [f"valor {i % 100}" for i in range(cantidad_nodos)]
+    )
+    habitaciones = range(0, cantidad_nodos, 3)
+    agentes = range(1, cantidad_nodos, 3)
+    llaves = range(2, cantidad_nodos, 3)
+    bigrafo.agregar_lugares(
+        [ids[habitaciones[(i * 7) % len(habitaciones)]] for i in range(len(agentes))],
+        [ids[agente] for agente in agentes],
+    )
+    con_llave = [agente for agente in agentes if agente % 5 == 1]
+    bigrafo.agregar_enlaces(
+        [ids[agente] for agente in con_llave],
+        [ids[llaves[(i * 13) % len(llaves)]] for i in range(len(con_llave))],
+    )
+    return bigrafo
+
+
+def reaccion():
+    redex = Bigrafo()
+    redex.agregar_nodo("h", "habitacion", "*")
+    redex.agregar_nodo("a", "agente", "*")
+    redex.agregar_nodo("l", "llave", "*")
+    redex.agregar_lugar("h", "a")
+    redex.agregar_enlace("a", "l")
+    reactum = Bigrafo()
+    reactum.agregar_nodo("h", "habitacion", "*")
+    reactum.agregar_nodo("a", "agente", "*")
+    reactum.agregar_nodo("l", "llave", "*")
+    reactum.agregar_lugar("h", "a")
+    reactum.agregar_lugar("a", "l")
+    return Reaccion(redex, reactum)
+
+
+def ocurrencias_sin_indices(redex, anfitrion):
+    cantidad = len(redex.ids)
+    aristas = {
+        nombre: set(
+            zip(
+                getattr(anfitrion, nombre).origenes, getattr(anfitrion, nombre).destinos
+            )
+        )
+        for nombre in ("lugares", "enlaces")
+    }
+    tipos = list(anfitrion.tipos)
+    resultado = []
+
+    def buscar(asignacion):
+        if len(asignacion) == cantidad:
+            resultado.append(tuple(asignacion))
+            return
+        i = len(asignacion)
+        for candidato in range(len(anfitrion.ids)):
+            if candidato in asignacion:
+                continue
+            if anfitrion.tipo(tipos[candidato]) != redex.tipo(redex.tipos[i]):
+                continue
+            asignacion.append(candidato)
+            if all(
+                (asignacion[o], asignacion[d]) in aristas[nombre]
+                for nombre in ("lugares", "enlaces")
+                for o, d in zip(
+                    getattr(redex, nombre).origenes, getattr(redex, nombre).destinos
+                )
+                if o < len(asignacion) and d < len(asignacion)
+            ):
+                buscar(asignacion)
+            asignacion.pop()
+
+    buscar([])
+    return resultado
+
+
+def main():
+    cantidad_nodos = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    mover = reaccion()
+    print(ENCABEZADO)
+
+    chico = construir(600)
+    cantidad = len(
+        medir(
+            "sin índices, 600 nodos",
+            lambda: ocurrencias_sin_indices(mover.redex, chico),
+        )
+    )
+    medir("con índices, 600 nodos", lambda: list(ocurrencias(mover.redex, chico)))
+    print(f"  {cantidad} ocurrencias")
+
+    bigrafo = construir(cantidad_nodos)
+    encontradas = medir(
+        f"con índices, {cantidad_nodos} nodos",
+        lambda: list(ocurrencias(mover.redex, bigrafo)),
+    )
+    print(f"  {len(encontradas)} ocurrencias")
+    medir("aplicar una ocurrencia", lambda: mover.aplicar(bigrafo))
+    _, aplicadas, rondas, _ = medir(
+        "reducir hasta el punto fijo", lambda: reducir(bigrafo, [mover])
+    )
+    print(f"  {aplicadas} reacciones en {rondas} rondas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Mide cuánto cuesta la salida de un programa que crea muchos nodos y enlaces
+# según la salida del intérprete (ver salida.py): escribiendo cada mensaje en
+# la salida estándar redirigida (lo que hacían la GUI y los lotes), en un
+# archivo línea por línea, de a bloques, sin trazas y guardando eventos.
+#
+# Uso: python benchmarks/bench_salida.py [cantidad_nodos] [clausuras|bytecode]
+#
+# Cada tiempo es el mínimo de tres ejecuciones.
+import contextlib
+import io
+import os
+import sys
+import time
+
+from generadores import crear_nodos
+from analizador import traducir_texto
+from dreamchaser_interpreter import DreamchaserInterpreter
+from salida import Salida, SalidaBuffer, SalidaEventos, SalidaSilenciosa
+
+
+def medir(programa, motor, crear_salida, redirigir=False):
+    with open(os.devnull, "w", encoding="utf-8") as archivo:
+        salida = crear_salida(archivo)
+        interprete = DreamchaserInterpreter(salida=salida)
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(archivo if redirigir else sys.stdout):
+            interprete.ejecutar_ri(programa, motor)
+        return time.perf_counter() - inicio
+
+
+def main():
+    cantidad_nodos = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    motor = sys.argv[2] if len(sys.argv) > 2 else "clausuras"
+    repeticiones = 3
+    programa = traducir_texto(crear_nodos(cantidad_nodos, lugares=False))
+    sentencias = len(programa)
+
+    salidas = {
+        "stdout redirigida (antes)": (lambda archivo: Salida(), True),
+        "Salida(archivo)": (Salida, False),
+        "SalidaBuffer(archivo)": (SalidaBuffer, False),
+        "SalidaSilenciosa(archivo)": (SalidaSilenciosa, False),
+        "SalidaEventos() (GUI)": (lambda archivo: SalidaEventos(), False),
+        "SalidaEventos(errores)": (
+            lambda archivo: SalidaEventos(Salida(io.StringIO()), ("error",)),
+            False,
+        ),
+    }
+    # La primera ejecución importa bigrafo y hace crecer la memoria del
+    # proceso; no se cuenta
+    medir(programa, motor, Salida)
+
+    print(f"{sentencias} sentencias, motor {motor}")
+    print(f"{'salida':<28}{'tiempo (s)':>12}{'sentencias/s':>16}")
+    for nombre, (crear_salida, redirigir) in salidas.items():
+        transcurrido = min(
+            medir(programa, motor, crear_salida, redirigir) for _ in range(repeticiones)
+        )
+        print(f"{nombre:<28}{transcurrido:>12.3f}{sentencias / transcurrido:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
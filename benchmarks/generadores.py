@@ -0,0 +1,216 @@
+# Cargas de trabajo sintéticas y utilidades de medición compartidas por los
+# benchmarks (suite.py y los bench_*.py). Cada generador de programas
+# devuelve el texto de un programa Dreamchaser cuyo costo crece con sus
+# parámetros; construir_bigrafo y bigrafos_solapados arman bigrafos grandes
+# directamente con la API de bigrafo.py.
+#
+# Importar este módulo agrega la raíz del repositorio a sys.path, así que los
+# benchmarks lo importan antes que los módulos del intérprete.
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, RAIZ)
+
+from bigrafo import Bigrafo
+
+MIB = 1024 * 1024
+ENCABEZADO = f"{'operación':<44}{'tiempo (s)':>12}"  # columnas de medir
+ENCABEZADO_MEMORIA = ENCABEZADO + f"{'memoria (MiB)':>14}"  # de medir_memoria
+
+
+# profundidad bucles mientras anidados de iteraciones vueltas cada uno; el
+# más interno suma a total. Al salir de cada bucle su bloque se vuelve a
+# ejecutar una vez (como el recorrido del árbol), así que el bloque más
+# interno se ejecuta unas (iteraciones + 1) ** profundidad veces
+def mientras_anidados(profundidad, iteraciones):
+    lineas = ["total = 0\n"]
+    for nivel in range(profundidad):
+        sangria = " " * nivel
+        lineas.append(f"{sangria}i{nivel} = 0\n")
+        lineas.append(f"{sangria}mientras i{nivel} < {iteraciones}\n")
+        lineas.append(f"{sangria} i{nivel} = i{nivel} + 1\n")
+    lineas.append(f"{' ' * profundidad}total = total + i{profundidad - 1} * 2 % 7\n")
+    return "".join(lineas)
+
+
+# Cadena de profundidad funciones en la que f{k} llama a f{k - 1}, llamada
+# llamadas veces desde un bucle. Una función que se llama a sí misma no
+# termina nunca (la condición del si no se evalúa y el bloque del mientras se
+# vuelve a ejecutar al salir), así que la recursión se arma con funciones
+# distintas. Cada llamada anidada en una expresión se evalúa dos veces, así
+# que cada llamada a f{profundidad} hace 2 ** profundidad llamadas a f0
+def llamadas_anidadas(profundidad, llamadas):
+    lineas = ["funcion f0(x)\n", " retornar x * 2 % 7\n"]
+    for nivel in range(1, profundidad + 1):
+        lineas.append(f"funcion f{nivel}(x)\n")
+        lineas.append(f" retornar f{nivel - 1}(x + 1) + 1\n")
+    lineas += [
+        "i = 0\n",
+        "total = 0\n",
+        f"mientras i < {llamadas}\n",
+        " i = i + 1\n",
+        f" total = total + f{profundidad}(i)\n",
+    ]
+    return "".join(lineas)
+
+
+# Un bigrafo con cantidad sentencias crear_nodo (sin bucles); con enlaces,
+# cada nodo enlazado con el anterior, y con lugares, contenido en el de su
+# índice / 4
+def crear_nodos(cantidad, enlaces=True, lugares=True):
+    lineas = ["crear_bigrafo b\n"]
+    for i in range(cantidad):
+        lineas.append(f"crear_nodo n{i}('tipo{i % 10}', 'valor {i}')\n")
+        if i and enlaces:
+            lineas.append(f"agregar_enlace n{i - 1}, n{i}\n")
+        if i and lugares:
+            lineas.append(f"agregar_lugar n{(i - 1) // 4}, n{i}\n")
+    return "".join(lineas)
+
+
+# cantidad sentencias de nivel superior de varias clases (asignaciones con
+# aritmética, crear_nodo, llamadas, comparaciones, contar_lugares y
+# comentarios). Como los bloques se extienden hasta el final del programa,
+# cada si/mientras añadiría un nivel de anidamiento, así que no hay
+def sentencias_mixtas(cantidad):
+    lineas = ["const PI 3.141592654", "importar 'potencia'", "crear_bigrafo g"]
+    for i in range(cantidad):
+        tipo = i % 6
+        if tipo == 0:
+            lineas.append(f"x{i} = (PI * {i} + {i}.5) // (2 - 1) % 7")
+        elif tipo == 1:
+            lineas.append(f"crear_nodo n{i}('lugar', 'valor {i}')")
+        elif tipo == 2:
+            lineas.append(f"imprimir(potencia(x{i - 2}, 2) >= {i})")
+        elif tipo == 3:
+            lineas.append(f"y = x{i - 3} > {i} == (x{i - 3} != {i})")
+        elif tipo == 4:
+            lineas.append(f"contar_lugares n{i - 3}")
+        else:
+            lineas.append(f"# comentario {i}")
+    return "\n".join(lineas) + "\n"
+
+
+# Bigrafo con los nodos n{desde}..n{desde + cantidad - 1}, de tipo
+# tipos[i % len(tipos)] y valor "valor {i}", en el que cada nodo es lugar del
+# de su índice / 4 y, con enlaces, tiene un enlace pseudoaleatorio. Con
+# por_lotes se arma con agregar_nodos, agregar_lugares y agregar_enlaces; si
+# no, con una llamada por nodo y por arista, que es la API que tienen también
+# las implementaciones de referencia que se pasan como clase
+def construir_bigrafo(
+    cantidad, desde=0, tipos=("lugar",), enlaces=True, por_lotes=False, clase=Bigrafo
+):
+    bigrafo = clase()
+    ids = [f"n{i}" for i in range(desde, desde + cantidad)]
+    # Cadenas nuevas en cada nodo, como las que produce el analizador
+    nombres_tipos = ["".join(tipos[i % len(tipos)]) for i in range(cantidad)]
+    valores = [f"valor {i}" for i in range(desde, desde + cantidad)]
+    padres = [ids[(i - 1) // 4] for i in range(1, cantidad)]
+    destinos = [ids[(i * 7919) % cantidad] for i in range(1, cantidad)]
+    if por_lotes:
+        bigrafo.agregar_nodos(ids, nombres_tipos, valores)
+        bigrafo.agregar_lugares(padres, ids[1:])
+        if enlaces:
+            bigrafo.agregar_enlaces(ids[1:], destinos)
+        return bigrafo
+    for id, tipo, valor in zip(ids, nombres_tipos, valores):
+        bigrafo.agregar_nodo(id, tipo, valor)
+    for padre, id, destino in zip(padres, ids[1:], destinos):
+        bigrafo.agregar_lugar(padre, id)
+        if enlaces:
+            bigrafo.agregar_enlace(id, destino)
+    return bigrafo
+
+
+# Dos bigrafos de cantidad nodos que comparten la mitad de sus nodos y parte
+# de sus aristas
+def bigrafos_solapados(cantidad):
+    return construir_bigrafo(cantidad), construir_bigrafo(cantidad, cantidad // 2)
+
+
+# Escribe los nodos y las aristas de un bigrafo en nodos.csv y aristas.csv
+# dentro del directorio, en el formato de cargar_bigrafo (ver cargador.py), y
+# devuelve las dos rutas
+def escribir_csv(bigrafo, directorio):
+    ruta_nodos = os.path.join(directorio, "nodos.csv")
+    ruta_aristas = os.path.join(directorio, "aristas.csv")
+    with open(ruta_nodos, "w", encoding="utf-8") as archivo:
+        archivo.write("id,tipo,valor\n")
+        for id, nodo in bigrafo.nodos.items():
+            archivo.write(f"{id},{nodo.tipo},{nodo.valor}\n")
+    with open(ruta_aristas, "w", encoding="utf-8") as archivo:
+        archivo.write("origen,destino,clase\n")
+        for clase, adyacencia in (
+            ("lugar", bigrafo.lugares),
+            ("enlace", bigrafo.enlaces),
+        ):
+            for origen, destino in zip(adyacencia.origenes, adyacencia.destinos):
+                archivo.write(f"{bigrafo.ids[origen]},{bigrafo.ids[destino]},{clase}\n")
+    return ruta_nodos, ruta_aristas
+
+
+# Intérprete que escribe sus mensajes en memoria, que cuesta lo mismo que
+# redirigir la salida estándar a un StringIO. Se importa aquí para que los
+# benchmarks que solo usan bigrafo.py no necesiten el analizador generado
+def interprete_en_memoria():
+    from dreamchaser_interpreter import DreamchaserInterpreter
+    from salida import Salida
+
+    return DreamchaserInterpreter(salida=Salida(io.StringIO()))
+
+
+# Ejecuta funcion repeticiones veces, muestra la descripción con el tiempo
+# promedio (ver ENCABEZADO) y devuelve el último resultado
+def medir(descripcion, funcion, repeticiones=1):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    transcurrido = (time.perf_counter() - inicio) / repeticiones
+    print(f"{descripcion:<44}{transcurrido:>12.6f}")
+    return resultado
+
+
+# Como medir con una repetición, y además muestra la memoria que sigue
+# reservada al terminar, que es lo que ocupa el resultado (ver
+# ENCABEZADO_MEMORIA)
+def medir_memoria(descripcion, funcion):
+    inicio = time.perf_counter()
+    resultado, reservada, _ = memoria(funcion)
+    transcurrido = time.perf_counter() - inicio
+    print(f"{descripcion:<44}{transcurrido:>12.6f}{reservada:>14.2f}")
+    return resultado
+
+
+# Mínimo de repeticiones mediciones de funcion, en segundos. Con preparar, se
+# llama antes de cada medición sin contarla y funcion recibe su resultado
+def minimo_tiempo(funcion, repeticiones, preparar=None):
+    tiempos = []
+    for _ in range(repeticiones):
+        argumentos = () if preparar is None else (preparar(),)
+        inicio = time.perf_counter()
+        funcion(*argumentos)
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos)
+
+
+# Memoria que reservó funcion por encima de la que había al llamarla, en MiB:
+# (resultado, memoria que sigue reservada al terminar, pico). Si tracemalloc
+# no está activo se activa solo durante la llamada; si lo está, se puede
+# medir lo que reserva una función sobre lo que dejó otra
+def memoria(funcion):
+    activo = tracemalloc.is_tracing()
+    if not activo:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        antes = tracemalloc.get_traced_memory()[0]
+        resultado = funcion()
+        actual, pico = tracemalloc.get_traced_memory()
+    finally:
+        if not activo:
+            tracemalloc.stop()
+    return resultado, (actual - antes) / MIB, (pico - antes) / MIB
@@ -0,0 +1,246 @@
+# Suite de benchmarks con cargas sintéticas (ver generadores.py): bucles
+# mientras anidados, cadenas de llamadas anidadas, programas con muchas
+# sentencias crear_nodo y las operaciones de conjuntos de bigrafos grandes.
+#
+# De cada programa se miden por separado el análisis (analizador.analizar) y
+# la ejecución (traducción, optimización, compilación y ejecución con el
+# motor elegido); de cada operación de bigrafos, solo la operación (armar los
+# bigrafos no se cuenta). Los tiempos son el mínimo de las repeticiones. El
+# pico de memoria de cada fase se mide aparte, en una pasada más con
+# tracemalloc (que hace todo más lento), como lo que se reservó por encima
+# de lo que ya estaba reservado al empezar la fase.
+#
+# Uso:
+#   python benchmarks/suite.py [--motor MOTOR] [--repeticiones N]
+#       [--casos CASO,...] [--guardar ARCHIVO] [--comparar ARCHIVO]
+#       [--umbral FRACCION] [--umbral-memoria FRACCION]
+#
+# --guardar escribe los resultados en JSON para compararlos más adelante.
+# Con --comparar se compara contra un JSON guardado antes: cada métrica que
+# empeoró más que el umbral (0.25 es un 25 %) es una regresión y el proceso
+# termina con código 1, así que sirve para frenar un cambio. Los tiempos que
+# crecen menos de MINIMO_TIEMPO segundos y los picos que crecen menos de
+# MINIMO_MEMORIA MiB no cuentan, porque a esa escala domina el ruido.
+import argparse
+import datetime
+import io
+import json
+import platform
+import sys
+import time
+
+from generadores import (
+    bigrafos_solapados,
+    crear_nodos,
+    llamadas_anidadas,
+    memoria,
+    mientras_anidados,
+    minimo_tiempo,
+)
+from analizador import analizar
+from dreamchaser_interpreter import DreamchaserInterpreter, MOTORES
+from salida import SalidaSilenciosa
+
+UMBRAL_TIEMPO = 0.25  # fracción que puede empeorar un tiempo
+UMBRAL_MEMORIA = 0.10  # fracción que puede empeorar un pico de memoria
+MINIMO_TIEMPO = 0.005  # segundos; diferencias menores no son regresiones
+MINIMO_MEMORIA = 0.1  # MiB; diferencias menores no son regresiones
+
+# Programas: nombre -> (generador, parámetros)
+PROGRAMAS = {
+    "mientras_anidados": (mientras_anidados, {"profundidad": 3, "iteraciones": 25}),
+    "llamadas_anidadas": (llamadas_anidadas, {"profundidad": 8, "llamadas": 100}),
+    "crear_nodos": (crear_nodos, {"cantidad": 2000}),
+}
+
+# Operaciones sobre dos bigrafos de NODOS_BIGRAFOS nodos (ver
+# generadores.bigrafos_solapados): nombre -> función de los dos bigrafos.
+# Clonar es O(1) (ver estructuras_persistentes.py); clonar_y_modificar mide
+# además lo que cuesta la primera escritura en el clon
+NODOS_BIGRAFOS = 100000
+OPERACIONES = {
+    "unir_bigrafos": lambda a, b: a.union(b),
+    "interseccion_bigrafos": lambda a, b: a.interseccion(b),
+    "diferencia_bigrafos": lambda a, b: a.diferencia(b),
+    "clonar_bigrafo": lambda a, b: a.clonar(),
+    "clonar_y_modificar": lambda a, b: modificar(a.clonar()),
+}
+CASOS = list(PROGRAMAS) + list(OPERACIONES)
+
+
+def modificar(bigrafo):
+    bigrafo.agregar_nodo("nuevo", "lugar", "nuevo")
+    bigrafo.agregar_enlace("nuevo", bigrafo.ids[0])
+    return bigrafo
+
+
+def medir_programa(texto_programa, motor, repeticiones):
+    def analizar_programa():
+        return analizar(texto_programa)[0]
+
+    def ejecutar(arbol):
+        interprete = DreamchaserInterpreter(salida=SalidaSilenciosa(io.StringIO()))
+        interprete.ejecutar(arbol, motor)
+        return interprete
+
+    arbol = analizar_programa()
+    resultado = {
+        "analisis_s": minimo_tiempo(analizar_programa, repeticiones),
+        "ejecucion_s": minimo_tiempo(lambda: ejecutar(arbol), repeticiones),
+    }
+    del arbol
+    arbol, _, resultado["pico_analisis_mib"] = memoria(analizar_programa)
+    _, _, resultado["pico_ejecucion_mib"] = memoria(lambda: ejecutar(arbol))
+    return resultado
+
+
+def medir_operacion(operacion, a, b, repeticiones):
+    resultado = {"ejecucion_s": minimo_tiempo(lambda: operacion(a, b), repeticiones)}
+    _, _, resultado["pico_ejecucion_mib"] = memoria(lambda: operacion(a, b))
+    return resultado
+
+
+def ejecutar_suite(casos, motor, repeticiones):
+    resultados = {}
+    for nombre in casos:
+        if nombre in PROGRAMAS:
+            generador, parametros = PROGRAMAS[nombre]
+            resultado = medir_programa(generador(**parametros), motor, repeticiones)
+            resultados[nombre] = {"parametros": parametros, **resultado}
+            print(formatear_caso(nombre, resultados[nombre]), flush=True)
+
+    operaciones = [nombre for nombre in casos if nombre in OPERACIONES]
+    if operaciones:
+        inicio = time.perf_counter()
+        a, b = bigrafos_solapados(NODOS_BIGRAFOS)
+        print(
+            f"dos bigrafos de {NODOS_BIGRAFOS:,} nodos construidos en "
+            f"{time.perf_counter() - inicio:.1f} s",
+            flush=True,
+        )
+        for nombre in operaciones:
+            resultado = medir_operacion(OPERACIONES[nombre], a, b, repeticiones)
+            resultados[nombre] = {"parametros": {"nodos": NODOS_BIGRAFOS}, **resultado}
+            print(formatear_caso(nombre, resultados[nombre]), flush=True)
+    return resultados
+
+
+def formatear_caso(nombre, resultado):
+    def columna(clave, formato):
+        valor = resultado.get(clave)
+        return f"{'-':>14}" if valor is None else f"{valor:>14{formato}}"
+
+    return (
+        f"{nombre:<24}{columna('analisis_s', '.4f')}{columna('ejecucion_s', '.4f')}"
+        f"{columna('pico_analisis_mib', '.2f')}{columna('pico_ejecucion_mib', '.2f')}"
+    )
+
+
+# Regresiones de actual respecto de base: (caso, métrica, base, actual) de
+# cada métrica que empeoró más que su umbral. Los casos que no están en los
+# dos, o que se midieron con otros parámetros, se informan y no se comparan
+def comparar(base, actual, umbral=UMBRAL_TIEMPO, umbral_memoria=UMBRAL_MEMORIA):
+    if base.get("motor") != actual.get("motor"):
+        print(
+            f"Advertencia: la base se midió con el motor {base.get('motor')} y "
+            f"esta ejecución con {actual.get('motor')}"
+        )
+    regresiones = []
+    print(f"\n{'caso':<24}{'métrica':<22}{'base':>12}{'actual':>12}{'cambio':>10}")
+    for nombre, resultado in actual["casos"].items():
+        anterior = base["casos"].get(nombre)
+        if anterior is None:
+            print(f"{nombre:<24}(no está en la base)")
+            continue
+        if anterior.get("parametros") != resultado.get("parametros"):
+            print(f"{nombre:<24}(medido con otros parámetros en la base)")
+            continue
+        for metrica, valor in resultado.items():
+            valor_base = anterior.get(metrica)
+            if metrica == "parametros" or valor_base is None:
+                continue
+            if metrica.endswith("_s"):
+                limite, minimo = umbral, MINIMO_TIEMPO
+            else:
+                limite, minimo = umbral_memoria, MINIMO_MEMORIA
+            cambio = (valor - valor_base) / valor_base if valor_base else 0.0
+            regresion = cambio > limite and valor - valor_base >= minimo
+            print(
+                f"{nombre:<24}{metrica:<22}{valor_base:>12.4f}{valor:>12.4f}"
+                f"{cambio:>+10.1%}{'  REGRESIÓN' if regresion else ''}"
+            )
+            if regresion:
+                regresiones.append((nombre, metrica, valor_base, valor))
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Suite de benchmarks de Dreamchaser con cargas sintéticas"
+    )
+    parser.add_argument("--motor", choices=MOTORES, default=MOTORES[0])
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument(
+        "--casos",
+        default=",".join(CASOS),
+        help=f"casos a medir, separados por comas (de {', '.join(CASOS)})",
+    )
+    parser.add_argument("--guardar", metavar="ARCHIVO", help="guardar en JSON")
+    parser.add_argument(
+        "--comparar",
+        metavar="ARCHIVO",
+        help="comparar con un JSON guardado antes y terminar con código 1 si "
+        "hay regresiones",
+    )
+    parser.add_argument(
+        "--umbral",
+        type=float,
+        default=UMBRAL_TIEMPO,
+        help="fracción que puede empeorar un tiempo (por omisión %(default)s)",
+    )
+    parser.add_argument(
+        "--umbral-memoria",
+        type=float,
+        default=UMBRAL_MEMORIA,
+        help="fracción que puede empeorar un pico de memoria (por omisión "
+        "%(default)s)",
+    )
+    args = parser.parse_args()
+
+    casos = [caso.strip() for caso in args.casos.split(",") if caso.strip()]
+    desconocidos = [caso for caso in casos if caso not in CASOS]
+    if desconocidos:
+        parser.error(f"casos desconocidos: {', '.join(desconocidos)}")
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            base = json.load(archivo)
+
+    print(f"motor {args.motor}, mínimo de {args.repeticiones} repeticiones")
+    print(
+        f"{'caso':<24}{'análisis s':>14}{'ejecución s':>14}"
+        f"{'pico an. MiB':>14}{'pico ej. MiB':>14}"
+    )
+    actual = {
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "motor": args.motor,
+        "repeticiones": args.repeticiones,
+        "casos": ejecutar_suite(casos, args.motor, args.repeticiones),
+    }
+    if args.guardar:
+        with open(args.guardar, "w", encoding="utf-8") as archivo:
+            json.dump(actual, archivo, ensure_ascii=False, indent=2)
+            archivo.write("\n")
+
+    if base is not None:
+        regresiones = comparar(base, actual, args.umbral, args.umbral_memoria)
+        if regresiones:
+            print(f"\n{len(regresiones)} regresiones")
+            sys.exit(1)
+        print("\nSin regresiones")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,82 +1,1139 @@
+from array import array
+from collections.abc import Mapping
+from itertools import repeat
+from operator import itemgetter
+import numpy as np
+from estructuras_persistentes import VectorPersistente, IndicePersistente
+
+# Almacenamiento compacto de bigrafos.
+#
+# Los ids de los nodos se convierten en índices enteros consecutivos. El tipo
+# de cada nodo se guarda como un código en una columna array('i') que apunta
+# a una tabla de tipos (hay pocos tipos distintos), el valor en una columna
+# aparte (casi siempre es distinto en cada nodo), y los lugares y enlaces se
+# guardan como listas de aristas (origen, destino) en arreglos de enteros. La
+# vista CSR de cada adyacencia (inicio de cada nodo en un arreglo de vecinos)
+# se construye con NumPy al consultarla y se descarta cuando se agregan
+# aristas. Las aristas entrantes y los grados de entrada, en cambio, se
+# mantienen al agregar cada arista una vez consultados, para que contar las
+# aristas que llegan a un nodo o buscar su padre sea O(1).
+#
+# Las columnas y el índice de ids son estructuras persistentes con copia en
+# escritura (estructuras_persistentes.py): clonar un bigrafo es O(1) y cada
+# copia solo duplica los bloques que modifica. Las operaciones de conjuntos
+# nunca modifican sus operandos.
+#
+# Nodo ya no guarda datos: es una vista de un índice dentro de un Bigrafo, que
+# se crea al acceder a bigrafo.nodos[id].
+#
+# Para buscar nodos por tipo o por valor sin recorrer el bigrafo hay dos
+# índices secundarios: código de tipo -> índices de sus nodos, y valor ->
+# índice del nodo (o lista de índices si el valor se repite). Se construyen en
+# la primera búsqueda y desde entonces se mantienen al agregar nodos; clonar
+# los comparte como al resto de las columnas. Los lugares forman un bosque
+# (cada nodo está como mucho en un lugar y no hay ciclos) y tienen además un
+# índice del bosque para saber en O(1) si un nodo está dentro de
+# otro y a qué profundidad (ver Adyacencia).
+#
+# guardar y abrir escriben y leen instantáneas binarias del bigrafo
+# (instantanea.py): al abrir, las columnas quedan sobre el archivo mapeado y
+# se copian a memoria bloque por bloque al modificarlas.
+
+SIN_TIPO = -1  # Código de un tipo None
+CUALQUIERA = object()  # Filtro de buscar_nodos que acepta cualquier valor
+
+
+# Elementos de valores en las posiciones dadas (un arreglo de NumPy), como
+# lista
+def _tomar(valores, posiciones):
+    posiciones = posiciones.tolist()
+    if not posiciones:
+        return []
+    if len(posiciones) == 1:
+        return [valores[posiciones[0]]]
+    return list(itemgetter(*posiciones)(valores))
+
+
+# Pares (código, posiciones en orden) de un arreglo de códigos de tipo
+def _agrupar(codigos):
+    if not len(codigos):
+        return []
+    orden = np.argsort(codigos, kind="stable")
+    ordenados = codigos[orden]
+    cortes = np.flatnonzero(ordenados[1:] != ordenados[:-1]) + 1
+    return zip(ordenados[np.r_[0, cortes]].tolist(), np.split(orden, cortes))
+
+
+# Origenes y destinos de un arreglo de claves de aristas
+def _separar(claves):
+    return claves >> 32, claves & 0xFFFFFFFF
+
+
+# Claves sin repetir, en el orden de su primera aparición
+def _sin_repetir(claves):
+    orden = np.argsort(claves, kind="stable")
+    ordenadas = claves[orden]
+    primeras = np.ones(len(claves), dtype=bool)
+    primeras[1:] = ordenadas[1:] != ordenadas[:-1]
+    if primeras.all():
+        return claves
+    return claves[np.sort(orden[primeras])]
+
+
+# Máscara de las claves que están en el conjunto (como np.isin, pero con una
+# búsqueda binaria sobre el conjunto ordenado, que es más rápida)
+def _pertenecen(claves, conjunto):
+    if not len(conjunto):
+        return np.zeros(len(claves), dtype=bool)
+    ordenado = np.sort(conjunto)
+    posiciones = np.searchsorted(ordenado, claves)
+    np.minimum(posiciones, len(ordenado) - 1, out=posiciones)
+    return ordenado[posiciones] == claves
+
+
+# Índice en el bigrafo de indices (id -> índice) de cada nodo de otro, o -1
+def _traduccion(indices, otro):
+    return np.fromiter(
+        map(indices.get, otro.ids, repeat(-1)), dtype=np.int64, count=len(otro.ids)
+    )
+
+
+# Claves de las aristas de una adyacencia de otro bigrafo, traducidas con
+# _traduccion; se descartan las que tienen un extremo que no está
+def _traducir_claves(adyacencia, traduccion):
+    origenes = traduccion[adyacencia.origenes.a_numpy()]
+    destinos = traduccion[adyacencia.destinos.a_numpy()]
+    validas = (origenes >= 0) & (destinos >= 0)
+    return (origenes[validas] << 32) | destinos[validas]
+
+
+# Suma a un VectorPersistente de enteros la cantidad de veces que aparece
+# cada posición en el arreglo dado, y lo devuelve. Si cambian pocas
+# posiciones solo se copian sus bloques; si no, se reconstruye con NumPy
+def _contar(vector, posiciones):
+    if len(posiciones) * 16 < len(vector):
+        cambiadas, cantidades = np.unique(posiciones, return_counts=True)
+        for posicion, cantidad in zip(cambiadas.tolist(), cantidades.tolist()):
+            vector.sumar(posicion, cantidad)
+        return vector
+    arreglo = vector.a_numpy()
+    arreglo += np.bincount(posiciones, minlength=len(arreglo)).astype(arreglo.dtype)
+    return VectorPersistente.desde_numpy(vector.codigo_tipo, arreglo)
+
+
+# vector[posiciones] como arreglo de NumPy, leyendo solo esas posiciones si
+# son pocas
+def _leer(vector, posiciones):
+    if len(posiciones) * 16 < len(vector):
+        return np.fromiter(
+            map(vector.__getitem__, posiciones.tolist()),
+            dtype=np.int64,
+            count=len(posiciones),
+        )
+    return vector.a_numpy()[posiciones].astype(np.int64)
+
+
+# Asigna vector[posiciones] = valores y devuelve el vector, como _contar
+def _asignar(vector, posiciones, valores):
+    if len(posiciones) * 16 < len(vector):
+        for posicion, valor in zip(posiciones.tolist(), valores.tolist()):
+            vector[posicion] = valor
+        return vector
+    arreglo = vector.a_numpy()
+    arreglo[posiciones] = valores
+    return VectorPersistente.desde_numpy(vector.codigo_tipo, arreglo)
+
+
+# Cadenas de aristas entrantes de un lote de aristas nuevas, numeradas desde
+# inicio: (destinos, primeras, últimas, anteriores), con la primera y la
+# última arista nueva de cada destino, y la arista nueva anterior a cada una
+# con el mismo destino (-1 para las primeras)
+def _encadenar_entrantes(inicio, destinos):
+    orden = np.argsort(destinos, kind="stable")
+    ordenados = destinos[orden]
+    primeras_de_grupo = np.ones(len(orden), dtype=bool)
+    primeras_de_grupo[1:] = ordenados[1:] != ordenados[:-1]
+    ultimas_de_grupo = np.ones(len(orden), dtype=bool)
+    ultimas_de_grupo[:-1] = primeras_de_grupo[1:]
+    anteriores = np.full(len(orden), -1, dtype=np.int64)
+    anteriores[orden[1:]] = np.where(primeras_de_grupo[1:], -1, orden[:-1] + inicio)
+    return (
+        ordenados[primeras_de_grupo],
+        orden[primeras_de_grupo] + inicio,
+        orden[ultimas_de_grupo] + inicio,
+        anteriores,
+    )
+
+
+# Padre de cada nodo en el bosque de lugares (-1 en las raíces): el origen de
+# la arista que le llega (de la última, en una instantánea vieja con más de
+# una), como en Bigrafo.padre
+def _padres(cantidad_nodos, origenes, destinos):
+    padres = np.full(cantidad_nodos, -1, dtype=np.int64)
+    hijos, posiciones = np.unique(destinos[::-1], return_index=True)
+    padres[hijos] = origenes[::-1][posiciones]
+    return padres
+
+
+# Niveles del bosque desde las raíces: cada nivel es un arreglo con los hijos
+# de los nodos del nivel anterior, agrupados por padre
+def _niveles(padres):
+    orden = np.argsort(padres, kind="stable")
+    raices = orden[: np.count_nonzero(padres < 0)]
+    orden = orden[len(raices) :]
+    inicios = np.zeros(len(padres) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(padres[orden], minlength=len(padres)), out=inicios[1:])
+    niveles = [raices]
+    frontera = raices
+    while True:
+        cantidades = inicios[frontera + 1] - inicios[frontera]
+        total = int(cantidades.sum())
+        if not total:
+            return niveles
+        saltos = np.repeat(
+            inicios[frontera] - (np.cumsum(cantidades) - cantidades), cantidades
+        )
+        frontera = orden[saltos + np.arange(total)]
+        niveles.append(frontera)
+
+
+# Corta los ciclos de padres (que solo pueden venir de una instantánea
+# guardada antes de que los lugares fueran un bosque, ver
+# Bigrafo.agregar_lugar): cada nodo que no se alcanza desde una raíz está en
+# un ciclo o debajo de uno, y cada ciclo se corta en el primer nodo repetido al
+# subir por los padres, que pasa a ser una raíz
+def _cortar_ciclos(padres, alcanzados):
+    resueltos = alcanzados.copy()
+    for inicio in np.flatnonzero(~alcanzados):
+        camino = set()
+        nodo = inicio
+        while nodo >= 0 and not resueltos[nodo]:
+            if nodo in camino:
+                padres[nodo] = -1
+                break
+            camino.add(nodo)
+            nodo = padres[nodo]
+        resueltos[list(camino)] = True
+
+
+# Raíz del árbol de cada nodo en el bosque de padres. Se salta de a punteros
+# (cada pasada duplica la distancia recorrida), así que hay O(log altura)
+# pasadas con NumPy. Los ciclos se cortan como en _recorrer_bosque
+def _raices(padres):
+    raices = np.where(padres < 0, np.arange(len(padres)), padres)
+    for _ in range(max(len(padres), 1).bit_length()):
+        siguientes = raices[raices]
+        if np.array_equal(siguientes, raices):
+            break
+        raices = siguientes
+    # Los nodos que no llegaron a una raíz están en un ciclo o debajo de uno
+    alcanzados = padres[raices] < 0
+    if alcanzados.all():
+        return raices
+    padres = padres.copy()
+    _cortar_ciclos(padres, alcanzados)
+    return _raices(padres)
+
+
+# Lugares nuevos (claves, ver Adyacencia.claves) que se pueden agregar a un
+# bosque sin que un nodo quede en dos lugares ni se forme un ciclo, dados el
+# padre de cada destino y la raíz del árbol de cada origen antes de
+# agregarlos: de las aristas que llegan a un nodo sin padre se conserva la
+# primera, y de cada ciclo que formarían se descarta la última.
+#
+# Cada arista conservada cuelga un árbol (el de su destino, que es una raíz)
+# del árbol de la raíz de su origen, así que un ciclo solo puede pasar por
+# las raíces que se cuelgan en el lote y se buscan en el grafo de esas
+# raíces, que tiene el tamaño del lote y no el del bosque
+def _filtrar_bosque(claves, padres_destinos, raices_origenes):
+    _, destinos = _separar(claves)
+    posiciones = np.flatnonzero(padres_destinos < 0)
+    _, primeras = np.unique(destinos[posiciones], return_index=True)
+    posiciones = np.sort(posiciones[primeras])
+    colgadas = destinos[posiciones]
+    # Número (en colgadas) de la raíz de la que se cuelga cada una, o -1 si
+    # esa raíz no se cuelga en el lote
+    orden = np.argsort(colgadas)
+    numeros = np.searchsorted(colgadas[orden], raices_origenes[posiciones])
+    np.minimum(numeros, len(colgadas) - 1, out=numeros)
+    numeros = orden[numeros] if len(orden) else numeros
+    padres = np.where(colgadas[numeros] == raices_origenes[posiciones], numeros, -1)
+
+    resueltos = np.zeros(len(padres), dtype=bool)
+    for nivel in _niveles(padres):
+        resueltos[nivel] = True
+    descartadas = []
+    for inicio in np.flatnonzero(~resueltos).tolist():
+        camino = {}  # número -> posición en el camino
+        numero = inicio
+        while numero >= 0 and not resueltos[numero]:
+            if numero in camino:
+                # Los números siguen el orden de las aristas en el lote
+                descartadas.append(max(list(camino)[camino[numero] :]))
+                break
+            camino[numero] = len(camino)
+            numero = int(padres[numero])
+        resueltos[list(camino)] = True
+    if descartadas:
+        posiciones = np.delete(posiciones, descartadas)
+    return claves[posiciones]
+
+
+# Recorrido de Euler del bosque de lugares: los descendientes de un nodo son
+# los que tienen su entrada en [entradas[i] + 1, salidas[i]). Devuelve
+# (entradas, salidas, profundidades). Hay una iteración con NumPy por nivel, así
+# que el costo es O(n) más O(altura) operaciones vectoriales
+def _recorrer_bosque(padres):
+    niveles = _niveles(padres)
+    if sum(len(nivel) for nivel in niveles) < len(padres):
+        alcanzados = np.zeros(len(padres), dtype=bool)
+        for nivel in niveles:
+            alcanzados[nivel] = True
+        _cortar_ciclos(padres, alcanzados)
+        niveles = _niveles(padres)
+
+    tamanos = np.ones(len(padres), dtype=np.int64)
+    for nivel in reversed(niveles[1:]):
+        np.add.at(tamanos, padres[nivel], tamanos[nivel])
+
+    entradas = np.zeros(len(padres), dtype=np.int64)
+    profundidades = np.zeros(len(padres), dtype=np.int64)
+    raices = niveles[0]
+    entradas[raices] = np.cumsum(tamanos[raices]) - tamanos[raices]
+    for profundidad, nivel in enumerate(niveles[1:], 1):
+        # Los hermanos van uno detrás de otro dentro del intervalo del padre
+        padres_nivel = padres[nivel]
+        anteriores = np.cumsum(tamanos[nivel]) - tamanos[nivel]
+        primeros = np.ones(len(nivel), dtype=bool)
+        primeros[1:] = padres_nivel[1:] != padres_nivel[:-1]
+        primero_grupo = np.maximum.accumulate(
+            np.where(primeros, np.arange(len(nivel)), 0)
+        )
+        entradas[nivel] = (
+            entradas[padres_nivel] + 1 + anteriores - anteriores[primero_grupo]
+        )
+        profundidades[nivel] = profundidad
+    return entradas, entradas + tamanos, profundidades
+
+
+# Aristas de un nodo a otros (lugares o enlaces). Las aristas se guardan en el
+# orden en que se agregaron y los vecinos de salida se consultan con una vista
+# CSR que se construye al pedirla. Las aristas entrantes forman cadenas de la
+# más nueva a la más vieja: ultima_entrante es la última arista que llegó a
+# cada nodo y anterior_entrante la arista anterior con el mismo destino (-1 al
+# final de la cadena). Las cadenas y los grados de entrada se construyen en la
+# primera consulta y desde entonces se mantienen al agregar cada arista.
+#
+# Para los lugares, padres_bosque tiene el padre de cada nodo en el bosque
+# (el origen de su último entrante, -1 en las raíces) y raices_bosque un
+# bosque de unión y búsqueda sobre los mismos nodos: cada nodo apunta a otro
+# de su árbol y las raíces de los árboles a sí mismas, así que raiz()
+# encuentra la raíz del árbol de un nodo en tiempo casi constante, y colgar
+# una raíz de otro árbol es una asignación. Con eso agregar un lugar cuesta
+# O(1) y no O(profundidad). Los dos se construyen en la primera consulta y
+# desde entonces se mantienen al agregar nodos y aristas; raices_bosque solo
+# se reconstruye después de un lote grande o de un lugar que le cambia el
+# árbol a un nodo (en una instantánea vieja).
+#
+# arbol tiene el recorrido de Euler del bosque (ver _recorrer_bosque), que
+# responde si un nodo está dentro de otro y a qué profundidad en O(1). Se
+# construye en la primera consulta, se mantiene al agregar nodos (que son
+# raíces nuevas) y se descarta al agregar aristas, como la vista CSR
+class Adyacencia:
+    def __init__(self):
+        self.origenes = VectorPersistente("i")
+        self.destinos = VectorPersistente("i")
+        self.grados = VectorPersistente("i")  # Grado de salida de cada nodo
+        # None hasta la primera consulta de aristas entrantes
+        self.grados_entrada = None
+        self.ultima_entrante = None
+        self.anterior_entrante = None
+        self.csr = None
+        self.padres_bosque = None  # None hasta la primera consulta del bosque
+        self.raices_bosque = None
+        self.arbol = None  # (entradas, salidas, profundidades)
+
+    def copiar(self):
+        copia = Adyacencia.__new__(Adyacencia)
+        copia.origenes = self.origenes.copiar()
+        copia.destinos = self.destinos.copiar()
+        copia.grados = self.grados.copiar()
+        copia.grados_entrada = copia.ultima_entrante = None
+        copia.anterior_entrante = None
+        if self.grados_entrada is not None:
+            copia.grados_entrada = self.grados_entrada.copiar()
+            copia.ultima_entrante = self.ultima_entrante.copiar()
+            copia.anterior_entrante = self.anterior_entrante.copiar()
+        copia.csr = self.csr
+        copia.padres_bosque = copia.raices_bosque = None
+        if self.padres_bosque is not None:
+            copia.padres_bosque = self.padres_bosque.copiar()
+        if self.raices_bosque is not None:
+            copia.raices_bosque = self.raices_bosque.copiar()
+        copia.arbol = None
+        if self.arbol is not None:
+            copia.arbol = tuple(vector.copiar() for vector in self.arbol)
+        return copia
+
+    # Adyacencia con las aristas de un arreglo de claves (ver claves())
+    @classmethod
+    def desde_claves(cls, cantidad_nodos, claves):
+        origenes, destinos = _separar(claves)
+        adyacencia = cls()
+        adyacencia.origenes = VectorPersistente.desde_numpy("i", origenes)
+        adyacencia.destinos = VectorPersistente.desde_numpy("i", destinos)
+        adyacencia.grados = VectorPersistente.desde_numpy(
+            "i", np.bincount(origenes, minlength=cantidad_nodos)
+        )
+        return adyacencia
+
+    def agregar_nodo(self):
+        if self.arbol is not None:
+            entradas, salidas, profundidades = self.arbol
+            entradas.append(len(self.grados))
+            salidas.append(len(self.grados) + 1)
+            profundidades.append(0)
+        if self.padres_bosque is not None:
+            self.padres_bosque.append(-1)
+        if self.raices_bosque is not None:
+            self.raices_bosque.append(len(self.grados))
+        self.grados.append(0)
+        if self.grados_entrada is not None:
+            self.grados_entrada.append(0)
+            self.ultima_entrante.append(-1)
+        self.csr = None
+
+    def agregar_nodos(self, cantidad):
+        if self.arbol is not None:
+            entradas, salidas, profundidades = self.arbol
+            nuevos = np.arange(len(self.grados), len(self.grados) + cantidad)
+            entradas.extend(nuevos)
+            salidas.extend(nuevos + 1)
+            profundidades.extend(array("i", [0]) * cantidad)
+        if self.padres_bosque is not None:
+            self.padres_bosque.extend(array("i", [-1]) * cantidad)
+        if self.raices_bosque is not None:
+            self.raices_bosque.extend(
+                np.arange(len(self.grados), len(self.grados) + cantidad)
+            )
+        self.grados.extend(array("i", [0]) * cantidad)
+        if self.grados_entrada is not None:
+            self.grados_entrada.extend(array("i", [0]) * cantidad)
+            self.ultima_entrante.extend(array("i", [-1]) * cantidad)
+        self.csr = None
+
+    def agregar(self, origen, destino):
+        if self.grados_entrada is not None:
+            self.anterior_entrante.append(self.ultima_entrante[destino])
+            self.ultima_entrante[destino] = len(self.origenes)
+            self.grados_entrada.sumar(destino, 1)
+        if self.padres_bosque is not None:
+            self._colgar(origen, destino)
+        self.origenes.append(origen)
+        self.destinos.append(destino)
+        self.grados.sumar(origen, 1)
+        self.csr = None
+        self.arbol = None
+
+    # Agrega al final las aristas de un arreglo de claves
+    def agregar_claves(self, claves):
+        if not len(claves):
+            return
+        origenes, destinos = _separar(claves)
+        if self.grados_entrada is not None:
+            self._encadenar(len(self.origenes), destinos)
+        if self.padres_bosque is not None:
+            if len(claves) * 16 < len(self.grados):
+                for origen, destino in zip(origenes.tolist(), destinos.tolist()):
+                    self._colgar(origen, destino)
+            else:
+                self.padres_bosque = _asignar(self.padres_bosque, destinos, origenes)
+                self.raices_bosque = None
+        self.origenes.extend(origenes)
+        self.destinos.extend(destinos)
+        self.grados = _contar(self.grados, origenes)
+        self.csr = None
+        self.arbol = None
+
+    # Agrega a las cadenas de entrantes las aristas nuevas con los destinos
+    # dados, numeradas desde inicio
+    def _encadenar(self, inicio, destinos):
+        con_entrantes, primeras, ultimas, anteriores = _encadenar_entrantes(
+            inicio, destinos
+        )
+        # Las cadenas nuevas continúan las que ya tenían sus destinos
+        anteriores[primeras - inicio] = _leer(self.ultima_entrante, con_entrantes)
+        self.anterior_entrante.extend(anteriores)
+        self.ultima_entrante = _asignar(self.ultima_entrante, con_entrantes, ultimas)
+        self.grados_entrada = _contar(self.grados_entrada, destinos)
+
+    def indexar_entrantes(self):
+        if self.grados_entrada is None:
+            cantidad_nodos = len(self.grados)
+            self.grados_entrada = VectorPersistente(
+                "i", array("i", [0]) * cantidad_nodos
+            )
+            self.ultima_entrante = VectorPersistente(
+                "i", array("i", [-1]) * cantidad_nodos
+            )
+            self.anterior_entrante = VectorPersistente("i")
+            self._encadenar(0, self.destinos.a_numpy().astype(np.int64))
+
+    # Actualiza el índice del bosque con el lugar (origen, destino)
+    def _colgar(self, origen, destino):
+        anterior = self.padres_bosque[destino]
+        self.padres_bosque[destino] = origen
+        if self.raices_bosque is None:
+            return
+        raiz = self.raiz(origen)
+        if anterior < 0 and raiz != destino:
+            self.raices_bosque[destino] = raiz
+        else:
+            # El nodo cambia de árbol o se formó un ciclo (ver _raices)
+            self.raices_bosque = None
+
+    def indexar_bosque(self):
+        if self.padres_bosque is None:
+            self.padres_bosque = VectorPersistente.desde_numpy(
+                "i",
+                _padres(
+                    len(self.grados), self.origenes.a_numpy(), self.destinos.a_numpy()
+                ),
+            )
+        if self.raices_bosque is None:
+            self.raices_bosque = VectorPersistente.desde_numpy(
+                "i", _raices(self.padres_bosque.a_numpy().astype(np.int64))
+            )
+
+    # Padre de cada nodo en el bosque (ver _padres), como arreglo de NumPy
+    def padres(self):
+        self.indexar_bosque()
+        return self.padres_bosque.a_numpy().astype(np.int64)
+
+    # Padre del nodo en el bosque, o None en una raíz
+    def padre(self, indice):
+        self.indexar_bosque()
+        padre = self.padres_bosque[indice]
+        return None if padre < 0 else padre
+
+    # Raíz del árbol del nodo. Cada nodo del camino pasa a apuntar a su
+    # abuelo (división de caminos), que deja los caminos cortos
+    def raiz(self, indice):
+        self.indexar_bosque()
+        raices = self.raices_bosque
+        siguiente = raices[indice]
+        while siguiente != indice:
+            abuelo = raices[siguiente]
+            if abuelo != siguiente:
+                raices[indice] = abuelo
+            indice, siguiente = siguiente, abuelo
+        return indice
+
+    # Lugares nuevos (claves) que dejan un bosque (ver _filtrar_bosque). Con
+    # un lote chico se leen los padres y las raíces solo de sus nodos
+    def filtrar_bosque(self, claves):
+        origenes, destinos = _separar(claves)
+        if len(claves) * 16 < len(self.grados):
+            self.indexar_bosque()
+            padres_destinos = _leer(self.padres_bosque, destinos)
+            raices_origenes = np.fromiter(
+                map(self.raiz, origenes.tolist()), dtype=np.int64, count=len(claves)
+            )
+        else:
+            padres = self.padres()
+            padres_destinos = padres[destinos]
+            raices_origenes = _raices(padres)[origenes]
+        return _filtrar_bosque(claves, padres_destinos, raices_origenes)
+
+    def indexar_arbol(self):
+        if self.arbol is None:
+            self.arbol = tuple(
+                VectorPersistente.desde_numpy("i", columna)
+                for columna in _recorrer_bosque(self.padres())
+            )
+
+    # Si el nodo indice está dentro del lugar de ancestro, a cualquier
+    # profundidad (un nodo no se contiene a sí mismo)
+    def contiene(self, ancestro, indice):
+        self.indexar_arbol()
+        entradas, salidas, _ = self.arbol
+        return entradas[ancestro] < entradas[indice] < salidas[ancestro]
+
+    # Cantidad de lugares que rodean al nodo (0 en una raíz)
+    def profundidad(self, indice):
+        self.indexar_arbol()
+        return self.arbol[2][indice]
+
+    # Cada arista (origen, destino) como un entero origen << 32 | destino, en
+    # el orden en que se agregaron
+    def claves(self):
+        return (
+            self.origenes.a_numpy().astype(np.int64) << 32
+        ) | self.destinos.a_numpy()
+
+    def __len__(self):
+        return len(self.origenes)
+
+    # Devuelve (inicios, vecinos): los vecinos del nodo i están en
+    # vecinos[inicios[i]:inicios[i + 1]], en el orden en que se agregaron
+    def obtener_csr(self):
+        if self.csr is None:
+            inicios = np.zeros(len(self.grados) + 1, dtype=np.int64)
+            np.cumsum(self.grados.a_numpy(), out=inicios[1:])
+            orden = np.argsort(self.origenes.a_numpy(), kind="stable")
+            self.csr = (inicios, self.destinos.a_numpy()[orden])
+        return self.csr
+
+    def vecinos(self, indice):
+        inicios, vecinos = self.obtener_csr()
+        return vecinos[inicios[indice] : inicios[indice + 1]].tolist()
+
+    def grado_entrada(self, indice):
+        self.indexar_entrantes()
+        return self.grados_entrada[indice]
+
+    # Origen de la última arista que llegó al nodo, o None
+    def ultimo_entrante(self, indice):
+        self.indexar_entrantes()
+        arista = self.ultima_entrante[indice]
+        return None if arista < 0 else self.origenes[arista]
+
+    # Origenes de las aristas que llegan al nodo, en el orden en que se
+    # agregaron
+    def entrantes(self, indice):
+        self.indexar_entrantes()
+        resultado = []
+        arista = self.ultima_entrante[indice]
+        while arista >= 0:
+            resultado.append(self.origenes[arista])
+            arista = self.anterior_entrante[arista]
+        resultado.reverse()
+        return resultado
+
+
 class Nodo:
-    def __init__(self, id, tipo, valor=None):
-        self.id = id
-        self.tipo = tipo
-        self.valor = valor
-        self.lugares = []
-        self.enlaces = []
+    __slots__ = ("bigrafo", "indice")
+
+    def __init__(self, bigrafo, indice):
+        self.bigrafo = bigrafo
+        self.indice = indice
+
+    @property
+    def id(self):
+        return self.bigrafo.ids[self.indice]
+
+    @property
+    def tipo(self):
+        return self.bigrafo.tipo(self.bigrafo.tipos[self.indice])
+
+    @property
+    def valor(self):
+        return self.bigrafo.valores[self.indice]
+
+    @property
+    def lugares(self):
+        return [
+            Nodo(self.bigrafo, i) for i in self.bigrafo.lugares.vecinos(self.indice)
+        ]
+
+    @property
+    def enlaces(self):
+        return [
+            Nodo(self.bigrafo, i) for i in self.bigrafo.enlaces.vecinos(self.indice)
+        ]
+
+    # Nodo cuyo lugar contiene a este, o None. Un nodo está como mucho en un
+    # lugar (en una instantánea vieja puede haber más de uno: vale el
+    # último que se agregó)
+    @property
+    def padre(self):
+        indice = self.bigrafo.indice_padre(self.indice)
+        return None if indice is None else Nodo(self.bigrafo, indice)
+
+    @property
+    def enlaces_entrantes(self):
+        return [
+            Nodo(self.bigrafo, i) for i in self.bigrafo.enlaces.entrantes(self.indice)
+        ]
 
     def agregar_lugar(self, nodo):
-        self.lugares.append(nodo)
+        self.bigrafo.agregar_lugar(self.id, nodo.id)
 
     def agregar_enlace(self, nodo):
-        self.enlaces.append(nodo)
+        self.bigrafo.agregar_enlace(self.id, nodo.id)
+
+    def __eq__(self, otro):
+        return (
+            isinstance(otro, Nodo)
+            and self.bigrafo is otro.bigrafo
+            and self.indice == otro.indice
+        )
+
+    def __hash__(self):
+        return hash((id(self.bigrafo), self.indice))
 
     def __repr__(self):
         return f"Nodo(id={self.id}, tipo={self.tipo}, valor={self.valor}, lugares={self.lugares}, enlaces={self.enlaces})"
 
 
+# Vista de solo lectura id -> Nodo, para recorrer un bigrafo como antes
+class VistaNodos(Mapping):
+    def __init__(self, bigrafo):
+        self.bigrafo = bigrafo
+
+    def __getitem__(self, id):
+        return Nodo(self.bigrafo, self.bigrafo.indices[id])
+
+    def __contains__(self, id):
+        return id in self.bigrafo.indices
+
+    def __iter__(self):
+        return iter(self.bigrafo.ids)
+
+    def __len__(self):
+        return len(self.bigrafo.ids)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
 class Bigrafo:
     def __init__(self):
-        self.nodos = {}
+        self.indices = IndicePersistente()  # id -> índice
+        self.ids = VectorPersistente()  # índice -> id
+        self.tipos = VectorPersistente("i")
+        self.valores = VectorPersistente()
+        # Tabla de tipos
+        self.nombres_tipos = []
+        self.codigos_tipos = {}
+        self.lugares = Adyacencia()
+        self.enlaces = Adyacencia()
+        # Índices secundarios, None hasta la primera búsqueda
+        self.por_tipo = None  # código de tipo -> VectorPersistente de índices
+        self.por_valor = None  # valor -> índice, o lista de índices
+
+    @property
+    def nodos(self):
+        return VistaNodos(self)
+
+    def codigo_tipo(self, tipo):
+        if tipo is None:
+            return SIN_TIPO
+        codigo = self.codigos_tipos.get(tipo)
+        if codigo is None:
+            codigo = len(self.nombres_tipos)
+            self.codigos_tipos[tipo] = codigo
+            self.nombres_tipos.append(tipo)
+        return codigo
+
+    def tipo(self, codigo):
+        if codigo == SIN_TIPO:
+            return None
+        return self.nombres_tipos[codigo]
 
     def agregar_nodo(self, id, tipo, valor=None):
-        if id not in self.nodos:
-            self.nodos[id] = Nodo(id, tipo, valor)
-        return self.nodos[id]
+        indice = self.indices.get(id)
+        if indice is None:
+            indice = self._agregar_indice(id, self.codigo_tipo(tipo), valor)
+        return Nodo(self, indice)
 
+    def _agregar_indice(self, id, codigo_tipo, valor):
+        indice = len(self.ids)
+        self.indices[id] = indice
+        self.ids.append(id)
+        self.tipos.append(codigo_tipo)
+        self.valores.append(valor)
+        self.lugares.agregar_nodo()
+        self.enlaces.agregar_nodo()
+        if self.por_tipo is not None:
+            self._indexar_tipo(codigo_tipo, indice)
+        if self.por_valor is not None:
+            self._indexar_valor(valor, indice)
+        return indice
+
+    # Los lugares forman un bosque: el lugar solo se agrega si el hijo no
+    # está todavía en otro lugar y no se formaría un ciclo (ver
+    # crearia_ciclo). Devuelve si se agregó
     def agregar_lugar(self, id_padre, id_hijo):
-        if id_padre in self.nodos and id_hijo in self.nodos:
-            self.nodos[id_padre].agregar_lugar(self.nodos[id_hijo])
+        padre = self.indices.get(id_padre)
+        hijo = self.indices.get(id_hijo)
+        if (
+            padre is None
+            or hijo is None
+            or self.indice_padre(hijo) is not None
+            or self._crearia_ciclo(padre, hijo)
+        ):
+            return False
+        self.lugares.agregar(padre, hijo)
+        return True
 
     def agregar_enlace(self, id_origen, id_destino):
-        if id_origen in self.nodos and id_destino in self.nodos:
-            self.nodos[id_origen].agregar_enlace(self.nodos[id_destino])
+        origen = self.indices.get(id_origen)
+        destino = self.indices.get(id_destino)
+        if origen is not None and destino is not None:
+            self.enlaces.agregar(origen, destino)
 
-    def union(self, otro_bigrafo):
-        nuevo_bigrafo = Bigrafo()
-        # Copiar nodos y conexiones del primer bigrafo
-        for id, nodo in self.nodos.items():
-            nuevo_bigrafo.nodos[id] = nodo
-        # Copiar nodos y conexiones del segundo bigrafo
-        for id, nodo in otro_bigrafo.nodos.items():
-            if id not in nuevo_bigrafo.nodos:
-                nuevo_bigrafo.nodos[id] = nodo
+    # Cambia el tipo y el valor de un nodo que ya está. Los índices por tipo y
+    # por valor se descartan y se vuelven a construir en la próxima búsqueda
+    def cambiar_nodo(self, id, tipo, valor):
+        indice = self.indices[id]
+        self.tipos[indice] = self.codigo_tipo(tipo)
+        self.valores[indice] = valor
+        self.por_tipo = None
+        self.por_valor = None
+
+    # Carga masiva (ver cargador.py). agregar_nodos equivale a llamar a
+    # agregar_nodo con cada fila: los ids que ya están se ignoran, y si un id
+    # se repite en el lote vale la primera fila. Devuelve la cantidad de nodos
+    # agregados
+    def agregar_nodos(self, ids, tipos, valores):
+        indices = self.indices
+        vistos = set()
+        seleccion = []
+        for posicion, id in enumerate(ids):
+            if id not in vistos and indices.get(id) is None:
+                vistos.add(id)
+                seleccion.append(posicion)
+        if len(seleccion) < len(ids):
+            ids = [ids[posicion] for posicion in seleccion]
+            tipos = [tipos[posicion] for posicion in seleccion]
+            valores = [valores[posicion] for posicion in seleccion]
+        self._agregar_nodos(
+            list(ids), [self.codigo_tipo(tipo) for tipo in tipos], list(valores)
+        )
+        return len(ids)
+
+    # Agregan las aristas entre pares de ids, en orden, descartando las que
+    # tienen un extremo que no está y los lugares que no dejarían un bosque
+    # (ver _filtrar_bosque). Devuelven la cantidad agregada
+    def agregar_lugares(self, ids_padres, ids_hijos):
+        return self._agregar_aristas(self.lugares, ids_padres, ids_hijos)
+
+    def agregar_enlaces(self, ids_origenes, ids_destinos):
+        return self._agregar_aristas(self.enlaces, ids_origenes, ids_destinos)
+
+    def _agregar_aristas(self, adyacencia, ids_origenes, ids_destinos):
+        extremos = []
+        for ids in (ids_origenes, ids_destinos):
+            extremos.append(
+                np.fromiter(
+                    map(self.indices.get, ids, repeat(-1)),
+                    dtype=np.int64,
+                    count=len(ids),
+                )
+            )
+        origenes, destinos = extremos
+        validas = (origenes >= 0) & (destinos >= 0)
+        claves = (origenes[validas] << 32) | destinos[validas]
+        if adyacencia is self.lugares:
+            claves = adyacencia.filtrar_bosque(claves)
+        adyacencia.agregar_claves(claves)
+        return len(claves)
+
+    # Agrega nodos al final a partir de columnas ya decodificadas
+    def _agregar_nodos(self, ids, tipos, valores):
+        inicio = len(self.ids)
+        self.indices.update(zip(ids, range(inicio, inicio + len(ids))))
+        self.ids.extend(ids)
+        self.tipos.extend(tipos)
+        self.valores.extend(valores)
+        self.lugares.agregar_nodos(len(ids))
+        self.enlaces.agregar_nodos(len(ids))
+        if self.por_tipo is not None:
+            self._indexar_tipos(inicio, np.asarray(tipos))
+        if self.por_valor is not None:
+            for indice, valor in enumerate(valores, inicio):
+                self._indexar_valor(valor, indice)
+
+    def _indexar_tipo(self, codigo_tipo, indice):
+        vector = self.por_tipo.get(codigo_tipo)
+        if vector is None:
+            vector = self.por_tipo[codigo_tipo] = VectorPersistente("i")
+        vector.append(indice)
+
+    # Agrega al índice por tipo los nodos desde inicio, con los códigos dados
+    def _indexar_tipos(self, inicio, codigos):
+        for codigo, posiciones in _agrupar(codigos):
+            vector = self.por_tipo.get(codigo)
+            if vector is None:
+                vector = self.por_tipo[codigo] = VectorPersistente("i")
+            vector.extend(posiciones + inicio)
+
+    def _indexar_valor(self, valor, indice):
+        entrada = self.por_valor.get(valor)
+        if entrada is None:
+            self.por_valor[valor] = indice
+        elif isinstance(entrada, int):
+            self.por_valor[valor] = [entrada, indice]
+        else:
+            self.por_valor.propio(valor).append(indice)
+
+    def indice_tipos(self):
+        if self.por_tipo is None:
+            self.por_tipo = {}
+            self._indexar_tipos(0, self.tipos.a_numpy())
+        return self.por_tipo
+
+    def indice_valores(self):
+        if self.por_valor is None:
+            self.por_valor = IndicePersistente()
+            valores = list(self.valores)
+            # Lo común es que no haya valores repetidos
+            unicos = dict(zip(valores, range(len(valores))))
+            if len(unicos) == len(valores):
+                self.por_valor.update(unicos)
             else:
-                # Si el nodo ya existe, combinar lugares y enlaces
-                nuevo_bigrafo.nodos[id].lugares.extend(nodo.lugares)
-                nuevo_bigrafo.nodos[id].enlaces.extend(nodo.enlaces)
+                for indice, valor in enumerate(valores):
+                    self._indexar_valor(valor, indice)
+        return self.por_valor
+
+    # Índices de los nodos con el tipo y el valor dados, en orden. El costo es
+    # proporcional a los candidatos del filtro más selectivo
+    def _buscar(self, tipo, valor):
+        por_valor = None
+        if valor is not CUALQUIERA:
+            entrada = self.indice_valores().get(valor)
+            if entrada is None:
+                return ()
+            por_valor = [entrada] if isinstance(entrada, int) else entrada
+        if tipo is CUALQUIERA:
+            return range(len(self.ids)) if por_valor is None else por_valor
+
+        codigo = SIN_TIPO if tipo is None else self.codigos_tipos.get(tipo)
+        por_tipo = self.indice_tipos().get(codigo, ())
+        if por_valor is None:
+            return por_tipo
+        if len(por_valor) <= len(por_tipo):
+            return [indice for indice in por_valor if self.tipos[indice] == codigo]
+        return [indice for indice in por_tipo if self.valores[indice] == valor]
+
+    # Ids de los nodos con el tipo y el valor dados (CUALQUIERA no filtra por
+    # ese campo), en el orden en que se agregaron
+    def buscar_nodos(self, tipo=CUALQUIERA, valor=CUALQUIERA):
+        ids = self.ids
+        return [ids[indice] for indice in self._buscar(tipo, valor)]
+
+    def contar_nodos(self, tipo=CUALQUIERA, valor=CUALQUIERA):
+        return len(self._buscar(tipo, valor))
+
+    # Códigos de tipo de este bigrafo para los nodos de otro; el último
+    # elemento traduce SIN_TIPO (-1) a sí mismo
+    def _traducir_tipos(self, otro):
+        return [self.codigo_tipo(tipo) for tipo in otro.nombres_tipos] + [SIN_TIPO]
+
+    # Las operaciones de conjuntos trabajan por lotes sobre columnas enteras
+    # con NumPy, en lugar de un ciclo por nodo. Los nodos se comparan por id
+    # (con los diccionarios de índices) y las aristas como conjuntos de pares
+    # (origen, destino) codificados en un entero de 64 bits: ningún resultado
+    # tiene aristas repetidas, aunque agregar_lugar o agregar_enlace hayan
+    # repetido alguna en un operando.
+    #
+    # La unión tiene los nodos de ambos bigrafos, en orden (el tipo y el valor
+    # de un id repetido son los del primero), y la unión de sus aristas: las
+    # del primero y después las del segundo que el primero no tiene. De los
+    # lugares del segundo solo se agregan los que dejan un bosque (ver
+    # _filtrar_bosque): si un nodo está en lugares distintos en los dos,
+    # queda en el del primero
+    def union(self, otro_bigrafo):
+        traduccion = _traduccion(self.indices.diccionario(), otro_bigrafo)
+        nuevo_bigrafo = self.clonar()
+        # Los nodos del segundo que faltan van al final, en su orden
+        faltantes = np.flatnonzero(traduccion < 0)
+        if len(faltantes):
+            traduccion[faltantes] = len(self.ids) + np.arange(len(faltantes))
+            tipos = otro_bigrafo.tipos.a_numpy()[faltantes]
+            nuevo_bigrafo._agregar_nodos(
+                _tomar(list(otro_bigrafo.ids), faltantes),
+                np.asarray(nuevo_bigrafo._traducir_tipos(otro_bigrafo))[tipos],
+                _tomar(list(otro_bigrafo.valores), faltantes),
+            )
+
+        cantidad_nodos = len(nuevo_bigrafo.ids)
+        for nombre in ("lugares", "enlaces"):
+            propia = getattr(nuevo_bigrafo, nombre)
+            existentes = propia.claves()
+            unicas = _sin_repetir(existentes)
+            if len(unicas) < len(existentes):
+                propia = Adyacencia.desde_claves(cantidad_nodos, unicas)
+                setattr(nuevo_bigrafo, nombre, propia)
+            ajenas = _traducir_claves(getattr(otro_bigrafo, nombre), traduccion)
+            nuevas = _sin_repetir(ajenas[~_pertenecen(ajenas, unicas)])
+            if nombre == "lugares":
+                nuevas = propia.filtrar_bosque(nuevas)
+            propia.agregar_claves(nuevas)
         return nuevo_bigrafo
 
+    # La intersección tiene los nodos del primer bigrafo que también están en
+    # el segundo y las aristas que están en los dos
     def interseccion(self, otro_bigrafo):
-        nuevo_bigrafo = Bigrafo()
-        for id, nodo in self.nodos.items():
-            if id in otro_bigrafo.nodos:
-                nuevo_bigrafo.nodos[id] = nodo
-        return nuevo_bigrafo
+        traduccion = _traduccion(self.indices.diccionario(), otro_bigrafo)
+        conservados = np.sort(traduccion[traduccion >= 0])
+        aristas = []
+        for nombre in ("lugares", "enlaces"):
+            propias = _sin_repetir(getattr(self, nombre).claves())
+            ajenas = _traducir_claves(getattr(otro_bigrafo, nombre), traduccion)
+            aristas.append(propias[_pertenecen(propias, ajenas)])
+        return self._subgrafo(conservados, *aristas)
 
+    # La diferencia tiene los nodos del primer bigrafo que no están en el
+    # segundo y las aristas del primero entre esos nodos
     def diferencia(self, otro_bigrafo):
+        traduccion = _traduccion(self.indices.diccionario(), otro_bigrafo)
+        vivos = np.ones(len(self.ids), dtype=bool)
+        vivos[traduccion[traduccion >= 0]] = False
+        conservados = np.flatnonzero(vivos)
+        aristas = []
+        for nombre in ("lugares", "enlaces"):
+            propias = _sin_repetir(getattr(self, nombre).claves())
+            origenes, destinos = _separar(propias)
+            aristas.append(propias[vivos[origenes] & vivos[destinos]])
+        return self._subgrafo(conservados, *aristas)
+
+    # Bigrafo con los nodos conservados (índices de este, en orden) y las
+    # aristas dadas, que deben unir nodos conservados. Si se conservan todos
+    # los nodos el resultado comparte las columnas de este, y si además las
+    # aristas son las mismas es un clon. Si no, los índices secundarios se
+    # vuelven a construir en la próxima búsqueda
+    def _subgrafo(self, conservados, lugares, enlaces):
+        cantidad_nodos = len(self.ids)
+        if len(conservados) == cantidad_nodos:
+            nuevo_bigrafo = self.clonar()
+            if len(lugares) < len(self.lugares):
+                nuevo_bigrafo.lugares = Adyacencia.desde_claves(cantidad_nodos, lugares)
+            if len(enlaces) < len(self.enlaces):
+                nuevo_bigrafo.enlaces = Adyacencia.desde_claves(cantidad_nodos, enlaces)
+            return nuevo_bigrafo
+
         nuevo_bigrafo = Bigrafo()
-        for id, nodo in self.nodos.items():
-            if id not in otro_bigrafo.nodos:
-                nuevo_bigrafo.nodos[id] = nodo
+        nuevo_bigrafo.nombres_tipos = list(self.nombres_tipos)
+        nuevo_bigrafo.codigos_tipos = dict(self.codigos_tipos)
+        nuevo_bigrafo._agregar_nodos(
+            _tomar(list(self.ids), conservados),
+            self.tipos.a_numpy()[conservados],
+            _tomar(list(self.valores), conservados),
+        )
+        traduccion = np.full(cantidad_nodos, -1, dtype=np.int64)
+        traduccion[conservados] = np.arange(len(conservados))
+        for nombre, claves in (("lugares", lugares), ("enlaces", enlaces)):
+            origenes, destinos = _separar(claves)
+            claves = (traduccion[origenes] << 32) | traduccion[destinos]
+            setattr(
+                nuevo_bigrafo,
+                nombre,
+                Adyacencia.desde_claves(len(conservados), claves),
+            )
         return nuevo_bigrafo
 
     def clonar(self):
-        nuevo_bigrafo = Bigrafo()
-        for id, nodo in self.nodos.items():
-            nuevo_bigrafo.nodos[id] = nodo
+        nuevo_bigrafo = Bigrafo.__new__(Bigrafo)
+        nuevo_bigrafo.indices = self.indices.copiar()
+        nuevo_bigrafo.ids = self.ids.copiar()
+        nuevo_bigrafo.tipos = self.tipos.copiar()
+        nuevo_bigrafo.valores = self.valores.copiar()
+        nuevo_bigrafo.nombres_tipos = list(self.nombres_tipos)
+        nuevo_bigrafo.codigos_tipos = dict(self.codigos_tipos)
+        nuevo_bigrafo.lugares = self.lugares.copiar()
+        nuevo_bigrafo.enlaces = self.enlaces.copiar()
+        nuevo_bigrafo.por_tipo = None
+        if self.por_tipo is not None:
+            nuevo_bigrafo.por_tipo = {
+                codigo: vector.copiar() for codigo, vector in self.por_tipo.items()
+            }
+        nuevo_bigrafo.por_valor = None
+        if self.por_valor is not None:
+            nuevo_bigrafo.por_valor = self.por_valor.copiar()
         return nuevo_bigrafo
 
     def contar_lugares(self, id_nodo):
-        if id_nodo in self.nodos:
-            return len(self.nodos[id_nodo].lugares)
+        indice = self.indices.get(id_nodo)
+        if indice is not None:
+            return self.lugares.grados[indice]
         return 0
 
     def contar_enlaces(self, id_nodo):
-        if id_nodo in self.nodos:
-            return len(self.nodos[id_nodo].enlaces)
+        indice = self.indices.get(id_nodo)
+        if indice is not None:
+            return self.enlaces.grados[indice]
+        return 0
+
+    def contar_lugares_entrantes(self, id_nodo):
+        indice = self.indices.get(id_nodo)
+        if indice is not None:
+            return self.lugares.grado_entrada(indice)
         return 0
 
+    def contar_enlaces_entrantes(self, id_nodo):
+        indice = self.indices.get(id_nodo)
+        if indice is not None:
+            return self.enlaces.grado_entrada(indice)
+        return 0
+
+    def indice_padre(self, indice):
+        return self.lugares.padre(indice)
+
+    # Id del nodo cuyo lugar contiene al nodo dado, o None si no tiene. Un
+    # nodo está como mucho en un lugar (en una instantánea guardada antes de
+    # que los lugares fueran un bosque puede haber más de uno: vale el último
+    # que se agregó)
+    def padre(self, id_nodo):
+        indice = self.indices.get(id_nodo)
+        if indice is not None:
+            indice = self.indice_padre(indice)
+        return None if indice is None else self.ids[indice]
+
+    # Guarda una instantánea binaria del bigrafo (ver instantanea.py)
+    def guardar(self, ruta):
+        from instantanea import guardar_bigrafo
+
+        guardar_bigrafo(self, ruta)
+
+    # Abre una instantánea con mmap; los datos se leen al consultarlos
+    @classmethod
+    def abrir(cls, ruta):
+        from instantanea import abrir_bigrafo
+
+        return abrir_bigrafo(ruta)
+
+    # Si el nodo id_hijo está dentro del lugar de id_ancestro, a cualquier
+    # profundidad
+    def contiene(self, id_ancestro, id_hijo):
+        ancestro = self.indices.get(id_ancestro)
+        hijo = self.indices.get(id_hijo)
+        if ancestro is None or hijo is None:
+            return False
+        return self.lugares.contiene(ancestro, hijo)
+
+    def profundidad(self, id_nodo):
+        indice = self.indices.get(id_nodo)
+        return None if indice is None else self.lugares.profundidad(indice)
+
+    # Si agregar el lugar (id_padre, id_hijo) formaría un ciclo, es decir, si
+    # el hijo es el padre o lo contiene. Si el árbol de lugares no está
+    # construido no se construye, para que agregar lugares uno por uno no lo
+    # reconstruya en cada paso: si el hijo es una raíz, lo contiene si es la
+    # raíz del árbol del padre (ver Adyacencia.raiz), y si no, se sube por los
+    # padres
+    def crearia_ciclo(self, id_padre, id_hijo):
+        padre = self.indices.get(id_padre)
+        hijo = self.indices.get(id_hijo)
+        if padre is None or hijo is None:
+            return False
+        return self._crearia_ciclo(padre, hijo)
+
+    def _crearia_ciclo(self, padre, hijo):
+        if padre == hijo:
+            return True
+        if self.lugares.arbol is not None:
+            return self.lugares.contiene(hijo, padre)
+        if self.indice_padre(hijo) is None:
+            return self.lugares.raiz(padre) == hijo
+        vistos = set()
+        while padre is not None and padre not in vistos:
+            if padre == hijo:
+                return True
+            vistos.add(padre)
+            padre = self.indice_padre(padre)
+        return False
+
     def __repr__(self):
         return f"Bigrafo(nodos={self.nodos})"
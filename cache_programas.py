@@ -0,0 +1,155 @@
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+
+# Caché en disco de programas ya compilados a la RI de compilador.py.
+#
+# Cada entrada es un archivo <version>-<hash>.ri con la RI serializada con
+# pickle. El hash se calcula sobre el texto del programa y la versión, que
+# depende del contenido de Dreamchaser.g4 y del formato de la RI; al cambiar la
+# gramática las entradas anteriores dejan de coincidir y se borran al abrir la
+# caché. La fecha de modificación de cada archivo se actualiza en cada
+# acierto, y al superar el tamaño máximo se borran las menos usadas (LRU).
+#
+# Las advertencias (una entrada dañada, un programa que no se pudo guardar)
+# van a la salida del intérprete que se pase (ver salida.py), como el resto
+# de sus mensajes; sin salida, a la salida estándar de errores.
+
+# Cambiar este número cuando cambie la forma de las tuplas de la RI
+VERSION_RI = 1
+
+DIRECTORIO_PREDETERMINADO = os.environ.get(
+    "DREAMCHASER_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "dreamchaser"),
+)
+TAMANO_MAXIMO_PREDETERMINADO = 64 * 1024 * 1024  # bytes
+
+RUTA_GRAMATICA = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "Dreamchaser.g4"
+)
+
+
+def version_gramatica(ruta_gramatica=RUTA_GRAMATICA):
+    resumen = hashlib.sha256(f"ri{VERSION_RI}".encode())
+    with open(ruta_gramatica, "rb") as archivo:
+        resumen.update(archivo.read())
+    return resumen.hexdigest()[:16]
+
+
+class CacheProgramas:
+    def __init__(
+        self,
+        directorio=DIRECTORIO_PREDETERMINADO,
+        tamano_maximo=TAMANO_MAXIMO_PREDETERMINADO,
+    ):
+        self.directorio = directorio
+        self.tamano_maximo = tamano_maximo
+        self.version = version_gramatica()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        os.makedirs(directorio, exist_ok=True)
+        self.borrar_obsoletas()
+
+    def ruta(self, texto_programa):
+        resumen = hashlib.sha256(self.version.encode())
+        resumen.update(texto_programa.encode("utf-8"))
+        return os.path.join(self.directorio, f"{self.version}-{resumen.hexdigest()}.ri")
+
+    def entradas(self):
+        for nombre in os.listdir(self.directorio):
+            if nombre.endswith(".ri"):
+                yield nombre, os.path.join(self.directorio, nombre)
+
+    # Borra las entradas guardadas con otra versión de la gramática
+    def borrar_obsoletas(self):
+        for nombre, ruta in self.entradas():
+            if not nombre.startswith(self.version + "-"):
+                self._borrar(ruta)
+
+    def obtener(self, texto_programa, salida=None):
+        ruta = self.ruta(texto_programa)
+        try:
+            with open(ruta, "rb") as archivo:
+                programa = pickle.load(archivo)
+            os.utime(ruta)
+        except FileNotFoundError:
+            self.fallos += 1
+            return None
+        except Exception as e:
+            # Una entrada dañada se trata como un fallo y se descarta
+            _advertir(
+                salida, f"Advertencia: Entrada de caché inválida '{ruta}': {str(e)}"
+            )
+            self._borrar(ruta)
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        return programa
+
+    def guardar(self, texto_programa, programa, salida=None):
+        ruta = self.ruta(texto_programa)
+        try:
+            datos = pickle.dumps(programa, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            _advertir(
+                salida,
+                f"Advertencia: No se pudo guardar el programa en caché: {str(e)}",
+            )
+            return
+        # Escribir en un archivo temporal y renombrarlo para que otro proceso
+        # nunca lea una entrada a medias. Si el disco está lleno o no se puede
+        # escribir en el directorio, el programa se ejecuta igual sin guardarlo
+        temporal = None
+        try:
+            descriptor, temporal = tempfile.mkstemp(dir=self.directorio, suffix=".tmp")
+            with os.fdopen(descriptor, "wb") as archivo:
+                archivo.write(datos)
+            os.replace(temporal, ruta)
+            temporal = None
+            self.desalojar()
+        except OSError as e:
+            if temporal is not None:
+                self._borrar(temporal)
+            _advertir(
+                salida,
+                f"Advertencia: No se pudo guardar el programa en caché: {str(e)}",
+            )
+
+    # Borra las entradas usadas hace más tiempo hasta quedar bajo el máximo
+    def desalojar(self):
+        entradas = []
+        total = 0
+        for _, ruta in self.entradas():
+            try:
+                estado = os.stat(ruta)
+            except FileNotFoundError:
+                continue
+            entradas.append((estado.st_mtime, estado.st_size, ruta))
+            total += estado.st_size
+        entradas.sort()
+        for _, tamano, ruta in entradas:
+            if total <= self.tamano_maximo:
+                break
+            self._borrar(ruta)
+            self.desalojos += 1
+            total -= tamano
+
+    def limpiar(self):
+        for _, ruta in self.entradas():
+            self._borrar(ruta)
+
+    def _borrar(self, ruta):
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            pass
+
+
+def _advertir(salida, mensaje):
+    if salida is None:
+        print(mensaje, file=sys.stderr)
+    else:
+        salida.advertencia(mensaje)
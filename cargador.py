@@ -0,0 +1,144 @@
+import csv
+import json
+import mmap
+import os
+
+# Carga masiva de bigrafos desde archivos CSV o JSON Lines.
+#
+# El archivo de nodos tiene una fila por nodo con id, tipo y valor; el de
+# aristas, una fila por arista con origen, destino y clase ('lugar' o
+# 'enlace'; en un lugar el origen es el padre). En CSV la primera fila puede
+# ser el encabezado con esos nombres; en JSON Lines cada línea es un objeto
+# con esas claves. El formato se elige por la extensión (.jsonl o .ndjson;
+# cualquier otra se lee como CSV), y cada fila debe ocupar una sola línea.
+#
+# Los archivos se recorren con mmap por trozos de unos TAMANO_LOTE bytes
+# cortados en un fin de línea, y cada trozo se agrega al bigrafo como un lote
+# con Bigrafo.agregar_nodos, agregar_lugares y agregar_enlaces: la memoria
+# que usa la carga depende del tamaño del lote, no del archivo.
+
+TAMANO_LOTE = 1024 * 1024  # bytes
+
+COLUMNAS_NODOS = ("id", "tipo", "valor")
+COLUMNAS_ARISTAS = ("origen", "destino", "clase")
+
+
+def _es_jsonl(ruta):
+    return os.path.splitext(ruta)[1].lower() in (".jsonl", ".ndjson")
+
+
+# Devuelve los trozos de texto del archivo, cada uno con líneas completas
+def leer_trozos(ruta, tamano_lote=TAMANO_LOTE):
+    with open(ruta, "rb") as archivo:
+        if os.fstat(archivo.fileno()).st_size == 0:
+            return
+        with mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+            inicio = 0
+            while inicio < len(datos):
+                fin = datos.rfind(b"\n", inicio, inicio + tamano_lote) + 1
+                if fin <= inicio:
+                    # Una línea más larga que el lote va sola en su trozo
+                    fin = datos.find(b"\n", inicio + tamano_lote) + 1 or len(datos)
+                yield datos[inicio:fin].decode("utf-8-sig" if inicio == 0 else "utf-8")
+                inicio = fin
+
+
+# Devuelve listas de filas (tuplas con las columnas dadas) y la cantidad de
+# filas que no se pudieron leer en cada lote
+def leer_lotes(ruta, columnas, tamano_lote=TAMANO_LOTE):
+    jsonl = _es_jsonl(ruta)
+    primero = True
+    for trozo in leer_trozos(ruta, tamano_lote):
+        lineas = [linea for linea in trozo.splitlines() if linea.strip()]
+        del trozo
+        if jsonl:
+            filas, errores = _filas_jsonl(lineas, columnas)
+        else:
+            filas, errores = _filas_csv(lineas, columnas, primero)
+        del lineas
+        primero = False
+        yield filas, errores
+
+
+# La primera fila del archivo se descarta si es el encabezado
+def _filas_csv(lineas, columnas, primero):
+    cantidad = len(columnas)
+    filas = [tuple(fila) for fila in csv.reader(lineas) if len(fila) == cantidad]
+    errores = len(lineas) - len(filas)
+    if primero and filas and filas[0] == columnas:
+        filas = filas[1:]
+    return filas, errores
+
+
+def _filas_jsonl(lineas, columnas):
+    filas = []
+    errores = 0
+    for linea in lineas:
+        try:
+            objeto = json.loads(linea)
+            filas.append(tuple(objeto[columna] for columna in columnas))
+        except (ValueError, KeyError, TypeError):
+            errores += 1
+    return filas, errores
+
+
+# Los ids se comparan como texto, igual que en los programas; un valor que no
+# es un escalar se guarda como su JSON
+def _normalizar_nodos(filas):
+    return [
+        (
+            str(id),
+            None if tipo is None else str(tipo),
+            json.dumps(valor) if isinstance(valor, (dict, list)) else valor,
+        )
+        for id, tipo, valor in filas
+    ]
+
+
+def cargar_nodos(bigrafo, ruta, tamano_lote=TAMANO_LOTE):
+    agregados = errores = 0
+    jsonl = _es_jsonl(ruta)
+    for filas, errores_lote in leer_lotes(ruta, COLUMNAS_NODOS, tamano_lote):
+        errores += errores_lote
+        if jsonl:
+            filas = _normalizar_nodos(filas)
+        if filas:
+            ids, tipos, valores = zip(*filas)
+            agregados += bigrafo.agregar_nodos(ids, tipos, valores)
+    return agregados, errores
+
+
+# Devuelve (lugares, enlaces, errores). Las aristas con un extremo que no está
+# en el bigrafo se descartan, como en agregar_lugar y agregar_enlace, y
+# también los lugares que dejarían un nodo en dos lugares o formarían un
+# ciclo (ver Bigrafo.agregar_lugares)
+def cargar_aristas(bigrafo, ruta, tamano_lote=TAMANO_LOTE):
+    lugares = enlaces = errores = 0
+    for filas, errores_lote in leer_lotes(ruta, COLUMNAS_ARISTAS, tamano_lote):
+        errores += errores_lote
+        por_clase = {"lugar": ([], []), "enlace": ([], [])}
+        for origen, destino, clase in filas:
+            columnas = por_clase.get(clase)
+            if columnas is None:
+                errores += 1
+                continue
+            columnas[0].append(str(origen))
+            columnas[1].append(str(destino))
+        lugares += bigrafo.agregar_lugares(*por_clase["lugar"])
+        enlaces += bigrafo.agregar_enlaces(*por_clase["enlace"])
+    return lugares, enlaces, errores
+
+
+# Carga los nodos y, si se da su archivo, las aristas. Devuelve un diccionario
+# con las cantidades de nodos, lugares y enlaces agregados y de filas con
+# errores. Los errores al abrir un archivo (OSError) o al decodificarlo
+# (UnicodeDecodeError) no se atrapan
+def cargar_bigrafo(bigrafo, ruta_nodos, ruta_aristas=None, tamano_lote=TAMANO_LOTE):
+    nodos, errores = cargar_nodos(bigrafo, ruta_nodos, tamano_lote)
+    lugares = enlaces = 0
+    if ruta_aristas is not None:
+        lugares, enlaces, errores_aristas = cargar_aristas(
+            bigrafo, ruta_aristas, tamano_lote
+        )
+        errores += errores_aristas
+    return {"nodos": nodos, "lugares": lugares, "enlaces": enlaces, "errores": errores}
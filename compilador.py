@@ -0,0 +1,837 @@
+from antlr4 import ParserRuleContext
+from antlr_output.DreamchaserParser import DreamchaserParser
+import operator
+from memoizacion import SIN_RESULTADO, clave_memo
+
+# Compilación de programas Dreamchaser en dos pasos:
+#
+# 1. traducir_programa convierte el árbol de ANTLR en una representación
+#    intermedia (RI) hecha de tuplas y listas, con los literales ya
+#    decodificados. Después de este paso no se vuelve a tocar ningún contexto.
+# 2. CompiladorClausuras convierte la RI en clausuras de Python ligadas a un
+#    DreamchaserInterpreter, que se ejecutan sin despacho por isinstance.
+#
+# Las clausuras reproducen exactamente lo que hace ParseTreeWalker con el
+# listener: cada sentencia ejecuta su acción "enter" y después se recorren sus
+# hijos, de modo que los bloques de si/mientras/funcion y las llamadas dentro
+# de expresiones se vuelven a ejecutar igual que en el recorrido del árbol.
+
+MAX_ITERACIONES_MIENTRAS = 10000
+
+# Marca, en el marco de una llamada, una variable que no existía al entrar
+SIN_VALOR = object()
+
+
+# ---------------------------------------------------------------------------
+# Traducción del árbol de ANTLR a la RI
+# ---------------------------------------------------------------------------
+
+
+def traducir_programa(arbol):
+    return [traducir_sentencia(sentencia) for sentencia in arbol.statement()]
+
+
+# Línea de cada sentencia de un programa traducido de arbol, como un
+# diccionario id(sentencia) -> línea + desplazamiento. Sirve también para el
+# programa optimizado, porque el optimizador no cambia la forma de los
+# bloques. Lo usa el perfilador (ver perfilador.py)
+def lineas_programa(arbol, programa, desplazamiento=0):
+    lineas = {}
+    _lineas_bloque(arbol.statement(), programa, desplazamiento, lineas)
+    return lineas
+
+
+def _lineas_bloque(contextos, bloque, desplazamiento, lineas):
+    for ctx, sentencia in zip(contextos, bloque):
+        lineas[id(sentencia)] = ctx.start.line + desplazamiento
+        tipo = sentencia[0]
+        if tipo == "si":
+            bloques_ctx = ctx.conditionalStatement().block()
+            bloques = sentencia[2]
+        elif tipo == "mientras":
+            bloques_ctx = [ctx.whileStatement().block()]
+            bloques = [sentencia[2]]
+        elif tipo == "funcion":
+            bloques_ctx = [ctx.functionDefinition().block()]
+            bloques = [sentencia[3]]
+        else:
+            continue
+        for bloque_ctx, bloque_sentencia in zip(bloques_ctx, bloques):
+            if bloque_ctx is not None and bloque_sentencia is not None:
+                _lineas_bloque(
+                    bloque_ctx.statement(), bloque_sentencia, desplazamiento, lineas
+                )
+
+
+def traducir_bloque(ctx):
+    if ctx is None:
+        return None
+    return [traducir_sentencia(sentencia) for sentencia in ctx.statement()]
+
+
+def traducir_sentencia(ctx):
+    # Un contexto incompleto (por errores de sintaxis) hace fallar al listener
+    # en tiempo de ejecución; se guarda la excepción para lanzarla en el mismo
+    # punto del programa
+    try:
+        for hijo in ctx.getChildren():
+            if isinstance(hijo, ParserRuleContext):
+                traductor = _TRADUCTORES_SENTENCIA.get(type(hijo))
+                if traductor is not None:
+                    return traductor(hijo)
+        return ("comentario",)
+    except Exception as e:
+        return ("error", e)
+
+
+def traducir_literal(ctx):
+    if isinstance(ctx, DreamchaserParser.NumberLiteralContext):
+        texto = ctx.NUMBER().getText()
+        if "e" in texto.lower() or "." in texto:
+            return ("literal", float(texto))
+        return ("literal", int(texto))
+    elif isinstance(ctx, DreamchaserParser.StringLiteralContext):
+        return ("literal", ctx.STRING().getText()[1:-1])
+    elif isinstance(ctx, DreamchaserParser.BooleanLiteralContext):
+        return ("literal", ctx.BOOLEAN().getText() == "verdadero")
+    return ("literal", None)
+
+
+def traducir_expresion(ctx):
+    if isinstance(ctx, DreamchaserParser.LiteralExprContext):
+        return traducir_literal(ctx.literal())
+    elif isinstance(ctx, DreamchaserParser.IdentifierExprContext):
+        return ("variable", ctx.ID().getText())
+    elif isinstance(ctx, DreamchaserParser.ParenExprContext):
+        return traducir_expresion(ctx.expression())
+    elif isinstance(
+        ctx,
+        (
+            DreamchaserParser.MulDivExprContext,
+            DreamchaserParser.AddSubExprContext,
+            DreamchaserParser.RelationalExprContext,
+        ),
+    ):
+        return (
+            "binaria",
+            ctx.op.text,
+            traducir_expresion(ctx.expression(0)),
+            traducir_expresion(ctx.expression(1)),
+        )
+    elif isinstance(ctx, DreamchaserParser.FunctionCallExprContext):
+        return traducir_llamada(ctx.functionCall())
+    return ("literal", None)
+
+
+def traducir_llamada(ctx):
+    args = []
+    if ctx.argList():
+        args = [traducir_expresion(expr) for expr in ctx.argList().expression()]
+    return ("llamada", ctx.ID().getText(), args)
+
+
+def _expresion_opcional(ctx):
+    return traducir_expresion(ctx) if ctx is not None else None
+
+
+def _traducir_importar(ctx):
+    if ctx.STRING() is None:
+        return ("importar", None)
+    return ("importar", ctx.STRING().getText()[1:-1])
+
+
+def _traducir_const(ctx):
+    nombre = ctx.ID().getText()
+    if ctx.literal() is None:
+        return ("const", nombre, None)
+    return ("const", nombre, traducir_literal(ctx.literal()))
+
+
+def _traducir_asignar(ctx):
+    return ("asignar", ctx.ID().getText(), _expresion_opcional(ctx.expression()))
+
+
+def _traducir_si(ctx):
+    return (
+        "si",
+        [traducir_expresion(expr) for expr in ctx.expression()],
+        [traducir_bloque(bloque) for bloque in ctx.block()],
+    )
+
+
+def _traducir_mientras(ctx):
+    return (
+        "mientras",
+        _expresion_opcional(ctx.expression()),
+        traducir_bloque(ctx.block()),
+    )
+
+
+def _traducir_funcion(ctx):
+    params = []
+    if ctx.paramList():
+        params = [param.getText() for param in ctx.paramList().ID()]
+    return (
+        "funcion",
+        ctx.ID().getText(),
+        params,
+        traducir_bloque(ctx.block()),
+        ctx.PURA() is not None,
+    )
+
+
+def _traducir_retornar(ctx):
+    return ("retornar", _expresion_opcional(ctx.expression()))
+
+
+def _traducir_llamar(ctx):
+    return ("llamar", traducir_llamada(ctx))
+
+
+def _traducir_crear_nodo(ctx):
+    return (
+        "crear_nodo",
+        ctx.ID().getText(),
+        ctx.STRING(0).getText()[1:-1],
+        ctx.STRING(1).getText()[1:-1],
+    )
+
+
+# ("buscar_nodos", tipo, valor, variable); un tipo '*' o un valor omitido
+# quedan en None y no filtran
+def _traducir_buscar_nodos(ctx):
+    cadenas = [cadena.getText()[1:-1] for cadena in ctx.STRING()]
+    if ctx.MULTIPLY() is not None:
+        cadenas.insert(0, None)
+    if len(cadenas) == 1:
+        cadenas.append(None)
+    return ("buscar_nodos", cadenas[0], cadenas[1], ctx.ID().getText())
+
+
+# ("cargar_bigrafo", id, ruta_nodos, ruta_aristas); sin archivo de aristas la
+# ruta queda en None
+def _traducir_cargar_bigrafo(ctx):
+    rutas = [cadena.getText()[1:-1] for cadena in ctx.STRING()]
+    if len(rutas) == 1:
+        rutas.append(None)
+    return ("cargar_bigrafo", ctx.ID().getText(), rutas[0], rutas[1])
+
+
+# ("guardar_bigrafo", id, ruta) y ("abrir_bigrafo", ruta, id)
+def _traducir_guardar_bigrafo(ctx):
+    return ("guardar_bigrafo", ctx.ID().getText(), ctx.STRING().getText()[1:-1])
+
+
+def _traducir_abrir_bigrafo(ctx):
+    return ("abrir_bigrafo", ctx.STRING().getText()[1:-1], ctx.ID().getText())
+
+
+# ("reducir", reaccion, ...)
+def _traducir_reducir(ctx):
+    return ("reducir",) + tuple(id.getText() for id in ctx.ID())
+
+
+def _traductor_ids(etiqueta, cantidad):
+    def traducir(ctx):
+        return (etiqueta,) + tuple(
+            ctx.getToken(DreamchaserParser.ID, i).getText() for i in range(cantidad)
+        )
+
+    return traducir
+
+
+_TRADUCTORES_SENTENCIA = {
+    DreamchaserParser.ImportStatementContext: _traducir_importar,
+    DreamchaserParser.ConstStatementContext: _traducir_const,
+    DreamchaserParser.AssignmentStatementContext: _traducir_asignar,
+    DreamchaserParser.ConditionalStatementContext: _traducir_si,
+    DreamchaserParser.WhileStatementContext: _traducir_mientras,
+    DreamchaserParser.FunctionDefinitionContext: _traducir_funcion,
+    DreamchaserParser.ReturnStatementContext: _traducir_retornar,
+    DreamchaserParser.FunctionCallContext: _traducir_llamar,
+    DreamchaserParser.CrearNodoStatementContext: _traducir_crear_nodo,
+    DreamchaserParser.CrearBigrafoStatementContext: _traductor_ids("crear_bigrafo", 1),
+    DreamchaserParser.SeleccionarBigrafoStatementContext: _traductor_ids(
+        "seleccionar_bigrafo", 1
+    ),
+    DreamchaserParser.UnirBigrafosStatementContext: _traductor_ids("unir_bigrafos", 3),
+    DreamchaserParser.InterseccionBigrafosStatementContext: _traductor_ids(
+        "interseccion_bigrafos", 3
+    ),
+    DreamchaserParser.DiferenciaBigrafosStatementContext: _traductor_ids(
+        "diferencia_bigrafos", 3
+    ),
+    DreamchaserParser.ClonarBigrafoStatementContext: _traductor_ids(
+        "clonar_bigrafo", 2
+    ),
+    DreamchaserParser.ContarLugaresStatementContext: _traductor_ids(
+        "contar_lugares", 1
+    ),
+    DreamchaserParser.ContarEnlacesStatementContext: _traductor_ids(
+        "contar_enlaces", 1
+    ),
+    DreamchaserParser.BuscarNodosStatementContext: _traducir_buscar_nodos,
+    DreamchaserParser.ContarLugaresEntrantesStatementContext: _traductor_ids(
+        "contar_lugares_entrantes", 1
+    ),
+    DreamchaserParser.ContarEnlacesEntrantesStatementContext: _traductor_ids(
+        "contar_enlaces_entrantes", 1
+    ),
+    DreamchaserParser.BuscarPadreStatementContext: _traductor_ids("buscar_padre", 2),
+    DreamchaserParser.AgregarLugarStatementContext: _traductor_ids("agregar_lugar", 2),
+    DreamchaserParser.AgregarEnlaceStatementContext: _traductor_ids(
+        "agregar_enlace", 2
+    ),
+    DreamchaserParser.ContieneStatementContext: _traductor_ids("contiene", 2),
+    DreamchaserParser.ProfundidadStatementContext: _traductor_ids("profundidad", 1),
+    DreamchaserParser.DefinirReaccionStatementContext: _traductor_ids(
+        "definir_reaccion", 3
+    ),
+    DreamchaserParser.BuscarOcurrenciasStatementContext: _traductor_ids(
+        "buscar_ocurrencias", 2
+    ),
+    DreamchaserParser.AplicarReaccionStatementContext: _traductor_ids(
+        "aplicar_reaccion", 1
+    ),
+    DreamchaserParser.ReducirStatementContext: _traducir_reducir,
+    DreamchaserParser.CargarBigrafoStatementContext: _traducir_cargar_bigrafo,
+    DreamchaserParser.GuardarBigrafoStatementContext: _traducir_guardar_bigrafo,
+    DreamchaserParser.AbrirBigrafoStatementContext: _traducir_abrir_bigrafo,
+}
+
+
+def llamadas_en_preorden(expr, resultado=None):
+    # Orden en que ParseTreeWalker visita los functionCall de una expresión
+    if resultado is None:
+        resultado = []
+    if expr is None:
+        return resultado
+    if expr[0] == "llamada":
+        resultado.append(expr)
+        for arg in expr[2]:
+            llamadas_en_preorden(arg, resultado)
+    elif expr[0] == "binaria":
+        llamadas_en_preorden(expr[2], resultado)
+        llamadas_en_preorden(expr[3], resultado)
+    return resultado
+
+
+# ---------------------------------------------------------------------------
+# Compilación de la RI a clausuras
+# ---------------------------------------------------------------------------
+
+OPERACIONES = {
+    "*": operator.mul,
+    "+": operator.add,
+    "-": operator.sub,
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+}
+
+DIVISIONES = {
+    "/": (operator.truediv, "Error: División por cero"),
+    "//": (operator.floordiv, "Error: División por cero"),
+    "%": (operator.mod, "Error: Módulo por cero"),
+}
+
+
+def _nada():
+    pass
+
+
+def _encadenar(acciones):
+    acciones = [accion for accion in acciones if accion is not _nada]
+    if not acciones:
+        return _nada
+    if len(acciones) == 1:
+        return acciones[0]
+    acciones = tuple(acciones)
+
+    def ejecutar():
+        for accion in acciones:
+            accion()
+
+    return ejecutar
+
+
+# Con un control de ejecución cada sentencia compilada lo avisa antes de
+# ejecutarse (ver dreamchaser_interpreter.ControlEjecucion)
+def _controlar(paso, control):
+    contar = control.contar
+
+    def controlado():
+        contar()
+        paso()
+
+    return controlado
+
+
+class CompiladorClausuras:
+    # Con un perfil en el intérprete, las sentencias cuya línea está en
+    # lineas (ver lineas_programa), las llamadas y las operaciones de bigrafos
+    # se envuelven para medirlas (ver perfilador.py)
+    def __init__(self, interprete, lineas=None):
+        self.interprete = interprete
+        self.control = interprete.control
+        self.perfil = interprete.perfil
+        self.lineas = lineas or {}
+        self.compiladores_sentencia = {
+            "comentario": lambda sentencia: _nada,
+            "error": self.compilar_error,
+            "importar": self.compilar_importar,
+            "const": self.compilar_const,
+            "asignar": self.compilar_asignar,
+            "si": self.compilar_si,
+            "mientras": self.compilar_mientras,
+            "funcion": self.compilar_funcion,
+            "retornar": self.compilar_retornar,
+            "llamar": self.compilar_llamar,
+            "crear_bigrafo": self.compilar_metodo("crear_bigrafo"),
+            "seleccionar_bigrafo": self.compilar_metodo("seleccionar_bigrafo"),
+            "crear_nodo": self.compilar_metodo("crear_nodo"),
+            "unir_bigrafos": self.compilar_metodo("unir_bigrafos"),
+            "interseccion_bigrafos": self.compilar_metodo("interseccion_bigrafos"),
+            "diferencia_bigrafos": self.compilar_metodo("diferencia_bigrafos"),
+            "clonar_bigrafo": self.compilar_metodo("clonar_bigrafo"),
+            "contar_lugares": self.compilar_metodo("contar_lugares"),
+            "contar_enlaces": self.compilar_metodo("contar_enlaces"),
+            "buscar_nodos": self.compilar_metodo("buscar_nodos"),
+            "contar_lugares_entrantes": self.compilar_metodo(
+                "contar_lugares_entrantes"
+            ),
+            "contar_enlaces_entrantes": self.compilar_metodo(
+                "contar_enlaces_entrantes"
+            ),
+            "buscar_padre": self.compilar_metodo("buscar_padre"),
+            "agregar_lugar": self.compilar_metodo("agregar_lugar"),
+            "agregar_enlace": self.compilar_metodo("agregar_enlace"),
+            "contiene": self.compilar_metodo("contiene"),
+            "profundidad": self.compilar_metodo("profundidad"),
+            "definir_reaccion": self.compilar_metodo("definir_reaccion"),
+            "buscar_ocurrencias": self.compilar_metodo("buscar_ocurrencias"),
+            "aplicar_reaccion": self.compilar_metodo("aplicar_reaccion"),
+            "reducir": self.compilar_metodo("reducir"),
+            "cargar_bigrafo": self.compilar_metodo("cargar_bigrafo"),
+            "guardar_bigrafo": self.compilar_metodo("guardar_bigrafo"),
+            "abrir_bigrafo": self.compilar_metodo("abrir_bigrafo"),
+        }
+        self.ejecutar_bloque = self.crear_ejecutor_bloque()
+
+    # Con continuar=True no se reinicia valor_actual, como al ejecutar un
+    # programa por partes (DreamchaserInterpreter.ejecutar_flujo)
+    def compilar_programa(self, programa, continuar=False):
+        it = self.interprete
+        ejecutar_sentencias = _encadenar(
+            [self.compilar_sentencia(sentencia) for sentencia in programa]
+        )
+        if continuar:
+            return ejecutar_sentencias
+
+        def ejecutar():
+            it.valor_actual = None
+            ejecutar_sentencias()
+
+        return ejecutar
+
+    def compilar_bloque(self, bloque):
+        if bloque is None:
+            return None
+        return tuple(self.compilar_sentencia(sentencia) for sentencia in bloque)
+
+    def compilar_sentencia(self, sentencia):
+        paso = self.compiladores_sentencia[sentencia[0]](sentencia)
+        if paso is _nada:
+            return paso
+        if self.perfil is not None:
+            linea = self.lineas.get(id(sentencia))
+            if linea is not None:
+                paso = self.perfil.envolver("linea", linea, paso)
+        if self.control is not None:
+            paso = _controlar(paso, self.control)
+        return paso
+
+    # Equivalente a DreamchaserInterpreter.ejecutar_bloque para bloques compilados
+    def crear_ejecutor_bloque(self):
+        it = self.interprete
+
+        def ejecutar_bloque(pasos):
+            if pasos is None:
+                it.salida.error("Error: Falta el bloque")
+                return
+
+            valor_anterior = it.valor_actual
+            for paso in pasos:
+                try:
+                    paso()
+                    # Si encontramos una declaración de retorno, salir
+                    if (
+                        it.valor_actual is not None
+                        and it.valor_actual != valor_anterior
+                    ):
+                        break
+                except Exception as e:
+                    it.errores_capturados += 1
+                    it.salida.error(f"Error al ejecutar la declaración: {str(e)}")
+
+        return ejecutar_bloque
+
+    # Recorrido de los hijos que hace ParseTreeWalker después de la acción
+    # "enter": cada functionCall vuelve a evaluarse en enterFunctionCall
+    def descenso_expresion(self, expr):
+        return [self.accion_llamada(llamada) for llamada in llamadas_en_preorden(expr)]
+
+    def descenso_bloque(self, pasos):
+        return list(pasos) if pasos is not None else []
+
+    def accion_llamada(self, llamada):
+        it = self.interprete
+        llamar = self.compilar_llamada(llamada)
+
+        def accion():
+            it.valor_actual = llamar()
+
+        return accion
+
+    # Sentencias
+
+    def compilar_error(self, sentencia):
+        error = sentencia[1]
+
+        def lanzar():
+            raise error
+
+        return lanzar
+
+    def compilar_importar(self, sentencia):
+        it = self.interprete
+        nombre_libreria = sentencia[1]
+
+        def importar():
+            if nombre_libreria is None:
+                it.salida.error(
+                    "Error: Falta el nombre de la librería en la declaración de importación"
+                )
+            elif nombre_libreria in it.librerias:
+                it.librerias_importadas.add(nombre_libreria)
+            else:
+                it.salida.advertencia(
+                    f"Advertencia: Librería '{nombre_libreria}' no encontrada"
+                )
+
+        return importar
+
+    def compilar_const(self, sentencia):
+        it = self.interprete
+        _, nombre_id, literal = sentencia
+
+        if literal is None:
+
+            def falta_valor():
+                it.salida.error(
+                    f"Error: Falta el valor para la constante '{nombre_id}'"
+                )
+
+            return falta_valor
+
+        valor = literal[1]
+
+        def definir_constante():
+            it.definir_constante(nombre_id, valor)
+
+        return definir_constante
+
+    def compilar_asignar(self, sentencia):
+        it = self.interprete
+        _, nombre_id, expr = sentencia
+
+        if expr is None:
+
+            def falta_expresion():
+                it.salida.error(
+                    f"Error: Falta la expresión en la asignación a '{nombre_id}'"
+                )
+
+            return falta_expresion
+
+        evaluar = self.compilar_expresion(expr)
+
+        marcos = it.marcos
+
+        def asignar():
+            valor = evaluar()
+            if nombre_id in it.constants:
+                it.salida.error(
+                    f"Error: No se puede asignar a la constante '{nombre_id}'"
+                )
+                return
+            variables = it.variables
+            # Dentro de una llamada se guarda el valor anterior para restaurarlo
+            if marcos:
+                marco = marcos[-1]
+                if nombre_id not in marco:
+                    marco[nombre_id] = variables.get(nombre_id, SIN_VALOR)
+            variables[nombre_id] = valor
+
+        return _encadenar([asignar] + self.descenso_expresion(expr))
+
+    def compilar_si(self, sentencia):
+        _, condiciones, bloques = sentencia
+        pasos = [self.compilar_bloque(bloque) for bloque in bloques]
+        ejecutar_bloque = self.ejecutar_bloque
+
+        # enterConditionalStatement evalúa ctx.expression(), que devuelve la
+        # lista de expresiones del si/sino y por lo tanto siempre da None: la
+        # condición nunca se cumple y solo se ejecuta el bloque 'sino'
+        if len(pasos) > 1:
+            pasos_sino = pasos[1]
+
+            def si():
+                ejecutar_bloque(pasos_sino)
+
+        else:
+            si = _nada
+
+        acciones = [si]
+        if condiciones:
+            acciones += self.descenso_expresion(condiciones[0])
+        if pasos:
+            acciones += self.descenso_bloque(pasos[0])
+        for condicion in condiciones[1:]:
+            acciones += self.descenso_expresion(condicion)
+        for pasos_bloque in pasos[1:]:
+            acciones += self.descenso_bloque(pasos_bloque)
+        return _encadenar(acciones)
+
+    def compilar_mientras(self, sentencia):
+        it = self.interprete
+        perfil = self.perfil
+        _, condicion, bloque = sentencia
+        pasos = self.compilar_bloque(bloque)
+        ejecutar_bloque = self.ejecutar_bloque
+
+        if condicion is None:
+
+            def mientras():
+                it.salida.error(
+                    "Error: Falta la condición en la declaración 'mientras'"
+                )
+
+        else:
+            evaluar = self.compilar_expresion(condicion)
+
+            def mientras():
+                # Límite de seguridad para evitar bucles infinitos
+                contador_iteraciones = 0
+                while evaluar() and contador_iteraciones < MAX_ITERACIONES_MIENTRAS:
+                    ejecutar_bloque(pasos)
+                    contador_iteraciones += 1
+
+                if perfil is not None:
+                    perfil.contar_iteraciones(contador_iteraciones)
+                if contador_iteraciones >= MAX_ITERACIONES_MIENTRAS:
+                    it.salida.advertencia(
+                        "Advertencia: Se alcanzó el máximo de iteraciones del bucle, posible bucle infinito"
+                    )
+
+        return _encadenar(
+            [mientras]
+            + self.descenso_expresion(condicion)
+            + self.descenso_bloque(pasos)
+        )
+
+    def compilar_funcion(self, sentencia):
+        it = self.interprete
+        _, nombre_funcion, params, bloque, _ = sentencia
+        pasos = self.compilar_bloque(bloque)
+
+        def definir_funcion():
+            it.definir_funcion(nombre_funcion, params, pasos)
+
+        return _encadenar([definir_funcion] + self.descenso_bloque(pasos))
+
+    def compilar_retornar(self, sentencia):
+        it = self.interprete
+        expr = sentencia[1]
+
+        if expr is None:
+
+            def retornar():
+                it.salida.error(
+                    "Error: Falta la expresión en la declaración 'retornar'"
+                )
+                it.valor_actual = None
+
+            return retornar
+
+        evaluar = self.compilar_expresion(expr)
+
+        def retornar():
+            it.valor_actual = evaluar()
+
+        return _encadenar([retornar] + self.descenso_expresion(expr))
+
+    def compilar_llamar(self, sentencia):
+        return _encadenar(self.descenso_expresion(sentencia[1]))
+
+    def compilar_metodo(self, nombre_metodo):
+        # Sentencias de bigrafos: delegan en el método del intérprete
+        def compilar(sentencia):
+            metodo = getattr(self.interprete, nombre_metodo)
+            if self.perfil is not None:
+                metodo = self.perfil.envolver("bigrafo", nombre_metodo, metodo)
+            args = sentencia[1:]
+
+            def ejecutar():
+                metodo(*args)
+
+            return ejecutar
+
+        return compilar
+
+    # Expresiones
+
+    def compilar_expresion(self, expr):
+        tipo = expr[0]
+        if tipo == "literal":
+            return self.compilar_literal(expr)
+        elif tipo == "variable":
+            return self.compilar_variable(expr)
+        elif tipo == "binaria":
+            return self.compilar_binaria(expr)
+        elif tipo == "llamada":
+            return self.compilar_llamada(expr)
+        raise ValueError(f"Expresión desconocida: {tipo}")
+
+    def compilar_literal(self, expr):
+        valor = expr[1]
+        return lambda: valor
+
+    def compilar_variable(self, expr):
+        it = self.interprete
+        nombre_var = expr[1]
+        mensaje = f"Error: Variable o constante '{nombre_var}' no está definida"
+
+        def variable():
+            variables = it.variables
+            if nombre_var in variables:
+                return variables[nombre_var]
+            constants = it.constants
+            if nombre_var in constants:
+                return constants[nombre_var]
+            it.salida.error(mensaje)
+            return None
+
+        return variable
+
+    def compilar_binaria(self, expr):
+        it = self.interprete
+        _, op, izq, der = expr
+        izquierda = self.compilar_expresion(izq)
+        derecha = self.compilar_expresion(der)
+
+        if op in DIVISIONES:
+            operacion, mensaje = DIVISIONES[op]
+
+            def division():
+                a = izquierda()
+                b = derecha()
+                if a is None or b is None:
+                    return None
+                if b == 0:
+                    it.salida.error(mensaje)
+                    return None
+                return operacion(a, b)
+
+            return division
+
+        operacion = OPERACIONES.get(op)
+
+        def binaria():
+            a = izquierda()
+            b = derecha()
+            if a is None or b is None or operacion is None:
+                return None
+            return operacion(a, b)
+
+        return binaria
+
+    def compilar_llamada(self, expr):
+        it = self.interprete
+        _, nombre_funcion, args = expr
+        evaluar_args = tuple(self.compilar_expresion(arg) for arg in args)
+        llamar_libreria = it.llamar_libreria
+        ejecutar_bloque = self.ejecutar_bloque
+        if self.perfil is not None:
+            llamar_libreria = self.perfil.envolver(
+                "libreria", nombre_funcion, llamar_libreria
+            )
+            ejecutar_bloque = self.perfil.envolver(
+                "funcion", nombre_funcion, ejecutar_bloque
+            )
+        mensaje_arg = f"Error: Fallo en la evaluación del argumento en la llamada a la función '{nombre_funcion}'"
+
+        def llamada():
+            valores = []
+            for evaluar in evaluar_args:
+                valor_arg = evaluar()
+                if valor_arg is None:
+                    it.salida.error(mensaje_arg)
+                    return None
+                valores.append(valor_arg)
+
+            if (
+                nombre_funcion in it.librerias_importadas
+                or nombre_funcion in it.librerias
+            ):
+                return llamar_libreria(nombre_funcion, valores)
+
+            definicion_funcion = it.functions.get(nombre_funcion)
+            if definicion_funcion is None:
+                it.salida.error(
+                    f"Error: La función '{nombre_funcion}' no está definida"
+                )
+                return None
+
+            params = definicion_funcion["params"]
+            if len(valores) != len(params):
+                it.salida.error(
+                    f"Error: La función '{nombre_funcion}' espera {len(params)} argumentos, pero recibió {len(valores)}"
+                )
+                return None
+
+            bloque = definicion_funcion["block"]
+            memo = it.memo if definicion_funcion["memo"] else None
+            if memo is not None:
+                clave = clave_memo(id(bloque), valores)
+                valor_final = memo.obtener(clave)
+                if valor_final is not SIN_RESULTADO:
+                    resultado = valor_final
+                    if resultado is None:
+                        resultado = it.valor_actual
+                    it.valor_actual = valor_final
+                    return resultado
+                errores = it.errores_capturados
+
+            it.abrir_marco(params, valores)
+            valor_anterior = it.valor_actual
+            it.valor_actual = None
+            try:
+                ejecutar_bloque(bloque)
+            except BaseException:
+                it.abandonar_marco()
+                raise
+            resultado = it.valor_actual
+            if resultado is None:
+                resultado = valor_anterior
+            # Una llamada en la que se atrapó un error no se guarda
+            if memo is not None and it.errores_capturados == errores:
+                memo.guardar(clave, it.valor_actual)
+
+            it.cerrar_marco()
+            return resultado
+
+        return llamada
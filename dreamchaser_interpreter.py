@@ -1,12 +1,64 @@
 from antlr4 import *
 from antlr_output.DreamchaserParser import DreamchaserParser
 from antlr_output.DreamchaserListener import DreamchaserListener
+import copy
 import math
-from bigrafo import Bigrafo, Nodo
+from compilador import (
+    traducir_programa,
+    lineas_programa,
+    CompiladorClausuras,
+    SIN_VALOR,
+)
+from maquina_virtual import CompiladorBytecode, MaquinaVirtual
+from optimizador import optimizar_programa
+from memoizacion import CacheMemo, funciones_memoizables
+from analizador import analizar, fragmentos_programa
+from salida import Salida
+
+MOTORES = ("clausuras", "bytecode", "arbol")
+
+
+class EjecucionCancelada(BaseException):
+    # BaseException para que no la atrapen los manejadores de errores por
+    # sentencia de los motores, que atrapan Exception
+    pass
+
+
+# Control de una ejecución desde otro hilo (por ejemplo, la GUI): los motores
+# llaman a contar antes de cada sentencia, que cuenta las sentencias
+# ejecutadas y, si se pidió cancelar, lanza EjecucionCancelada. Sin control
+# (DreamchaserInterpreter.control en None) los motores no cuentan nada
+class ControlEjecucion:
+    def __init__(self):
+        self.sentencias = 0
+        self.cancelado = False
+
+    def cancelar(self):
+        self.cancelado = True
+
+    def contar(self):
+        self.sentencias += 1
+        if self.cancelado:
+            raise EjecucionCancelada()
+
+
+# bigrafo (y con él NumPy), cargador y reacciones se importan la primera vez
+# que un programa usa bigrafos, para que los que no los usan arranquen más
+# rápido (ver benchmarks/bench_arranque.py). Con perfil se importan antes de
+# empezar a medir (ver comprobar_perfil)
+MODULOS_PEREZOSOS = ("bigrafo", "cargador", "reacciones")
 
 
 class DreamchaserInterpreter(DreamchaserListener):
-    def __init__(self):
+    # salida recibe todo lo que informan e imprimen los programas (ver
+    # salida.py); por omisión se escribe en sys.stdout. control es un
+    # ControlEjecucion opcional y perfil un perfilador.Perfil opcional, que
+    # solo funciona con el motor de clausuras
+    def __init__(self, tamano_memo=0, salida=None, control=None, perfil=None):
+        self.salida = Salida() if salida is None else salida
+        self.control = control
+        self.perfil = perfil
+        self.desplazamiento_lineas = 0  # Líneas antes del fragmento analizado
         self.variables = {}
         self.constants = {}
         self.functions = {}
@@ -15,28 +67,43 @@ class DreamchaserInterpreter(DreamchaserListener):
         self.resultados_bloque = {}
         self.bigrafos = {}  # Diccionario para almacenar múltiples bigrafos
         self.bigrafo_actual = None  # Identificador del bigrafo actual
+        self.reacciones = {}  # Reacciones definidas (ver reacciones.py)
+        self.programa = None  # Programa compilado que se ejecutó
+        self.marcos = []  # Marcos de las llamadas en curso (motores compilados)
+        self.nodos_plegados = 0  # Nodos plegados por el optimizador
+        self.memo = None  # Caché de llamadas a funciones puras (desactivada)
+        self.funciones_memoizables = set()
+        self.errores_capturados = 0  # Errores atrapados por sentencia
+        self.configurar_memo(tamano_memo)
 
         # Librerías predefinidas
         self.librerias = {
             "raizCuadrada": math.sqrt,
             "potencia": pow,
-            "imprimir": print,
+            "imprimir": self.imprimir,
         }
 
+    def imprimir(self, *valores):
+        self.salida.imprimir(*valores)
+
     def crear_bigrafo(self, id):
         if id not in self.bigrafos:
+            from bigrafo import Bigrafo
+
             self.bigrafos[id] = Bigrafo()
             self.bigrafo_actual = id
-            print(f"Bigrafo creado: {id}")
+            self.salida.traza("bigrafo_creado", "Bigrafo creado: {id}", id=id)
         else:
-            print(f"Error: Bigrafo '{id}' ya existe")
+            self.salida.error(f"Error: Bigrafo '{id}' ya existe")
 
     def seleccionar_bigrafo(self, id):
         if id in self.bigrafos:
             self.bigrafo_actual = id
-            print(f"Bigrafo seleccionado: {id}")
+            self.salida.traza(
+                "bigrafo_seleccionado", "Bigrafo seleccionado: {id}", id=id
+            )
         else:
-            print(f"Error: Bigrafo '{id}' no existe")
+            self.salida.error(f"Error: Bigrafo '{id}' no existe")
 
     # Método auxiliar para evaluar expresiones
     def evaluar(self, ctx):
@@ -72,7 +139,9 @@ class DreamchaserInterpreter(DreamchaserListener):
             elif nombre_var in self.constants:
                 return self.constants[nombre_var]
             else:
-                print(f"Error: Variable o constante '{nombre_var}' no está definida")
+                self.salida.error(
+                    f"Error: Variable o constante '{nombre_var}' no está definida"
+                )
                 return None
 
         elif isinstance(ctx, DreamchaserParser.ParenExprContext):
@@ -90,17 +159,17 @@ class DreamchaserInterpreter(DreamchaserListener):
                 return izquierda * derecha
             elif op == "/":
                 if derecha == 0:
-                    print("Error: División por cero")
+                    self.salida.error("Error: División por cero")
                     return None
                 return izquierda / derecha
             elif op == "//":
                 if derecha == 0:
-                    print("Error: División por cero")
+                    self.salida.error("Error: División por cero")
                     return None
                 return izquierda // derecha
             elif op == "%":
                 if derecha == 0:
-                    print("Error: Módulo por cero")
+                    self.salida.error("Error: Módulo por cero")
                     return None
                 return izquierda % derecha
 
@@ -150,7 +219,7 @@ class DreamchaserInterpreter(DreamchaserListener):
             for expr in ctx.argList().expression():
                 valor_arg = self.evaluar(expr)
                 if valor_arg is None:
-                    print(
+                    self.salida.error(
                         f"Error: Fallo en la evaluación del argumento en la llamada a la función '{nombre_funcion}'"
                     )
                     return None
@@ -161,30 +230,14 @@ class DreamchaserInterpreter(DreamchaserListener):
             nombre_funcion in self.librerias_importadas
             or nombre_funcion in self.librerias
         ):
-            if nombre_funcion in self.librerias:
-                try:
-                    resultado = self.librerias[nombre_funcion](*args)
-                    # Para la función imprimir, devolver None ya que imprimir no devuelve un valor en Python
-                    if nombre_funcion == "imprimir":
-                        return None
-                    return resultado
-                except Exception as e:
-                    print(
-                        f"Error al ejecutar la función de librería '{nombre_funcion}': {str(e)}"
-                    )
-                    return None
-            else:
-                print(
-                    f"Error: La función de librería '{nombre_funcion}' está importada pero no definida"
-                )
-                return None
+            return self.llamar_libreria(nombre_funcion, args)
 
         # Verificar si es una función definida por el usuario
         if nombre_funcion in self.functions:
             definicion_funcion = self.functions[nombre_funcion]
 
             if len(args) != len(definicion_funcion["params"]):
-                print(
+                self.salida.error(
                     f"Error: La función '{nombre_funcion}' espera {len(definicion_funcion['params'])} argumentos, pero recibió {len(args)}"
                 )
                 return None
@@ -210,19 +263,290 @@ class DreamchaserInterpreter(DreamchaserListener):
             return resultado
 
         # Verificar si es una función incorporada
-        print(f"Error: La función '{nombre_funcion}' no está definida")
+        self.salida.error(f"Error: La función '{nombre_funcion}' no está definida")
         return None
 
+    def llamar_libreria(self, nombre_funcion, args):
+        if nombre_funcion in self.librerias:
+            try:
+                resultado = self.librerias[nombre_funcion](*args)
+                # Para la función imprimir, devolver None ya que imprimir no devuelve un valor en Python
+                if nombre_funcion == "imprimir":
+                    return None
+                return resultado
+            except Exception as e:
+                self.salida.error(
+                    f"Error al ejecutar la función de librería '{nombre_funcion}': {str(e)}"
+                )
+                return None
+        else:
+            self.salida.error(
+                f"Error: La función de librería '{nombre_funcion}' está importada pero no definida"
+            )
+            return None
+
+    # Marcos de llamada de los motores compilados. Una llamada ve las
+    # variables de quien la llama y al retornar deshace todo lo que escribió;
+    # en lugar de copiar el diccionario de variables en cada llamada, el marco
+    # guarda el valor anterior de cada variable la primera vez que se escribe
+    def abrir_marco(self, params, args):
+        variables = self.variables
+        marco = {}
+        for param, valor in zip(params, args):
+            if param not in marco:
+                marco[param] = variables.get(param, SIN_VALOR)
+            variables[param] = valor
+        self.marcos.append(marco)
+
+    def cerrar_marco(self):
+        variables = self.variables
+        for nombre, anterior in self.marcos.pop().items():
+            if anterior is SIN_VALOR:
+                variables.pop(nombre, None)
+            else:
+                variables[nombre] = anterior
+
+    # Asignación hecha por una sentencia que no es una asignación (por ejemplo
+    # buscar_nodos), con las mismas reglas que compilar_asignar
+    def asignar_variable(self, nombre_id, valor):
+        if nombre_id in self.constants:
+            self.salida.error(
+                f"Error: No se puede asignar a la constante '{nombre_id}'"
+            )
+            return
+        if self.marcos:
+            marco = self.marcos[-1]
+            if nombre_id not in marco:
+                marco[nombre_id] = self.variables.get(nombre_id, SIN_VALOR)
+        self.variables[nombre_id] = valor
+
+    # Si una excepción sale de la llamada las variables no se restauran (igual
+    # que en evaluar_llamada_funcion); los valores guardados pasan al marco de
+    # quien llama para que se restauren cuando este retorne
+    def abandonar_marco(self):
+        marco = self.marcos.pop()
+        if self.marcos:
+            padre = self.marcos[-1]
+            for nombre, anterior in marco.items():
+                padre.setdefault(nombre, anterior)
+
+    # Memoización de funciones puras en los motores compilados; con tamaño 0
+    # o None se desactiva
+    def configurar_memo(self, tamano):
+        if tamano:
+            self.memo = CacheMemo(tamano)
+        else:
+            self.memo = None
+
+    def estadisticas_memo(self):
+        if self.memo is None:
+            return None
+        return {
+            "tamano": self.memo.tamano,
+            "entradas": len(self.memo.entradas),
+            "aciertos": self.memo.aciertos,
+            "fallos": self.memo.fallos,
+            "desalojos": self.memo.desalojos,
+            "funciones": sorted(self.funciones_memoizables),
+        }
+
+    # Definiciones usadas por los motores compilados. Los resultados guardados
+    # dejan de valer si cambia una constante o se redefine una función
+    # (en la máquina virtual el bloque es una dirección dentro de codigo)
+    def definir_funcion(self, nombre_funcion, params, bloque, codigo=None):
+        anterior = self.functions.get(nombre_funcion)
+        if (
+            self.memo is not None
+            and anterior
+            and (anterior["block"] != bloque or anterior.get("codigo") is not codigo)
+        ):
+            self.memo.limpiar()
+        self.functions[nombre_funcion] = {
+            "params": params,
+            "block": bloque,
+            "codigo": codigo,
+            "memo": self.memo is not None
+            and nombre_funcion in self.funciones_memoizables,
+        }
+
+    def definir_constante(self, nombre_id, valor):
+        if nombre_id in self.constants:
+            self.salida.advertencia(
+                f"Advertencia: La constante '{nombre_id}' ya está definida y será sobrescrita"
+            )
+            anterior = self.constants[nombre_id]
+            if self.memo is not None and (type(anterior), anterior) != (
+                type(valor),
+                valor,
+            ):
+                self.memo.limpiar()
+        self.constants[nombre_id] = valor
+
+    # Ejecuta el programa con el motor indicado:
+    #   "clausuras": compila el árbol a clausuras de Python
+    #   "bytecode": compila el árbol a bytecode y lo ejecuta en la máquina virtual
+    #   "arbol": recorre el árbol de ANTLR con este listener
+    # Con optimizar=True los motores compilados pliegan antes las expresiones
+    # constantes; el programa resultante queda en self.programa. Si la
+    # memoización está activa se guardan los resultados de las funciones puras
+    def ejecutar(self, arbol, motor="clausuras", optimizar=True):
+        self.comprobar_perfil(motor)
+        if motor == "arbol":
+            try:
+                ParseTreeWalker().walk(self, arbol)
+            finally:
+                self.salida.vaciar()
+            return
+        self.ejecutar_ri(traducir_programa(arbol), motor, optimizar, arbol)
+
+    # Ejecuta un programa ya traducido a la RI (por ejemplo, leído de la caché
+    # de programas) con uno de los motores compilados. Con el árbol del que se
+    # tradujo, el perfil mide el tiempo de cada línea
+    def ejecutar_ri(self, programa, motor="clausuras", optimizar=True, arbol=None):
+        self.comprobar_perfil(motor)
+        if optimizar:
+            programa, self.nodos_plegados = optimizar_programa(programa)
+        self.programa = programa
+        if self.memo is not None:
+            self.memo.limpiar()
+            self.funciones_memoizables = funciones_memoizables(programa)
+        lineas = None
+        if self.perfil is not None and arbol is not None:
+            lineas = lineas_programa(arbol, programa)
+        try:
+            self.ejecutar_compilado(programa, motor, lineas=lineas)
+        finally:
+            self.salida.vaciar()
+
+    # Con perfil, además importa los módulos perezosos para que su importación
+    # no se cuente en la primera sentencia que los usa
+    def comprobar_perfil(self, motor):
+        if self.perfil is None:
+            return
+        if motor != "clausuras":
+            raise ValueError(
+                f"El perfilador solo funciona con el motor 'clausuras', no con '{motor}'"
+            )
+        self.perfil.importar(MODULOS_PEREZOSOS)
+
+    def ejecutar_compilado(self, programa, motor, continuar=False, lineas=None):
+        if motor == "clausuras":
+            CompiladorClausuras(self, lineas).compilar_programa(programa, continuar)()
+        elif motor == "bytecode":
+            codigo = CompiladorBytecode(self.control is not None).compilar_programa(
+                programa, continuar
+            )
+            MaquinaVirtual(self).ejecutar(codigo)
+        else:
+            raise ValueError(f"Motor de ejecución desconocido: '{motor}'")
+
+    # Ejecuta un programa muy grande por partes: lee las líneas de a una,
+    # analiza y ejecuta cada sentencia del nivel superior (ver
+    # analizador.fragmentos_programa) y descarta su árbol antes de pasar a la
+    # siguiente. La memoria usada por el análisis queda acotada por el
+    # fragmento más grande, no por el archivo. Las funciones puras no se
+    # memoizan en este modo, porque el análisis de pureza necesita el
+    # programa completo
+    def ejecutar_flujo(self, lineas, motor="clausuras", optimizar=True):
+        self.ejecutar_fragmentos(fragmentos_programa(lineas), motor, optimizar)
+
+    # Ejecuta pares (línea de inicio, texto) de fragmentos_programa. Si se
+    # da, al_terminar se llama después de cada fragmento con la cantidad de
+    # fragmentos ejecutados hasta ese momento (ver incremental.py)
+    def ejecutar_fragmentos(
+        self, fragmentos, motor="clausuras", optimizar=True, al_terminar=None
+    ):
+        if motor not in MOTORES:
+            raise ValueError(f"Motor de ejecución desconocido: '{motor}'")
+        self.comprobar_perfil(motor)
+        self.valor_actual = None
+        self.programa = None
+        self.funciones_memoizables = set()
+        caminante = ParseTreeWalker()
+        try:
+            for ejecutados, (inicio, fragmento) in enumerate(fragmentos, 1):
+                arbol, _ = analizar(fragmento)
+                if motor == "arbol":
+                    self.desplazamiento_lineas = inicio - 1
+                    for sentencia in arbol.statement():
+                        caminante.walk(self, sentencia)
+                else:
+                    self.salida.linea = inicio
+                    programa = traducir_programa(arbol)
+                    if optimizar:
+                        programa, plegados = optimizar_programa(programa)
+                        self.nodos_plegados += plegados
+                    lineas = None
+                    if self.perfil is not None:
+                        lineas = lineas_programa(arbol, programa, inicio - 1)
+                    self.ejecutar_compilado(
+                        programa, motor, continuar=True, lineas=lineas
+                    )
+                if al_terminar is not None:
+                    al_terminar(ejecutados)
+        finally:
+            self.desplazamiento_lineas = 0
+            self.salida.vaciar()
+
+    # Copia del estado que dejan las sentencias del nivel superior, para
+    # volver a él con restaurar_estado. Los bigrafos se clonan, que cuesta
+    # O(1) gracias a las estructuras persistentes; las variables y las
+    # constantes guardan valores inmutables, así que basta con copiar los
+    # diccionarios
+    def capturar_estado(self):
+        return {
+            "variables": dict(self.variables),
+            "constants": dict(self.constants),
+            "functions": dict(self.functions),
+            "librerias_importadas": set(self.librerias_importadas),
+            "bigrafos": {id: bigrafo.clonar() for id, bigrafo in self.bigrafos.items()},
+            "bigrafo_actual": self.bigrafo_actual,
+            "reacciones": {
+                nombre: copy.copy(reaccion)
+                for nombre, reaccion in self.reacciones.items()
+            },
+            "nodos_plegados": self.nodos_plegados,
+            "errores_capturados": self.errores_capturados,
+        }
+
+    # Vuelve al estado capturado, que se puede seguir usando: se copia otra
+    # vez para que lo que ejecute el intérprete después no lo cambie
+    def restaurar_estado(self, estado):
+        self.variables = dict(estado["variables"])
+        self.constants = dict(estado["constants"])
+        self.functions = dict(estado["functions"])
+        self.librerias_importadas = set(estado["librerias_importadas"])
+        self.bigrafos = {
+            id: bigrafo.clonar() for id, bigrafo in estado["bigrafos"].items()
+        }
+        self.bigrafo_actual = estado["bigrafo_actual"]
+        self.reacciones = {
+            nombre: copy.copy(reaccion)
+            for nombre, reaccion in estado["reacciones"].items()
+        }
+        self.nodos_plegados = estado["nodos_plegados"]
+        self.errores_capturados = estado["errores_capturados"]
+        self.valor_actual = None
+        self.marcos = []
+        if self.memo is not None:
+            self.memo.limpiar()
+
     # Métodos del listener
     def enterProgram(self, ctx):
         self.valor_actual = None
 
+    # La salida guarda la línea de la sentencia para los eventos
+    def enterStatement(self, ctx):
+        self.salida.linea = ctx.start.line + self.desplazamiento_lineas
+        if self.control is not None:
+            self.control.contar()
+
     def exitProgram(self, ctx):
         pass
 
     def enterImportStatement(self, ctx):
         if ctx.STRING() is None:
-            print(
+            self.salida.error(
                 "Error: Falta el nombre de la librería en la declaración de importación"
             )
             return
@@ -233,19 +557,21 @@ class DreamchaserInterpreter(DreamchaserListener):
         if nombre_libreria in self.librerias:
             self.librerias_importadas.add(nombre_libreria)
         else:
-            print(f"Advertencia: Librería '{nombre_libreria}' no encontrada")
+            self.salida.advertencia(
+                f"Advertencia: Librería '{nombre_libreria}' no encontrada"
+            )
 
     def enterConstStatement(self, ctx):
         nombre_id = ctx.ID().getText()
 
         if ctx.literal() is None:
-            print(f"Error: Falta el valor para la constante '{nombre_id}'")
+            self.salida.error(f"Error: Falta el valor para la constante '{nombre_id}'")
             return
 
         valor = self.evaluar(ctx.literal())
 
         if nombre_id in self.constants:
-            print(
+            self.salida.advertencia(
                 f"Advertencia: La constante '{nombre_id}' ya está definida y será sobrescrita"
             )
 
@@ -255,20 +581,24 @@ class DreamchaserInterpreter(DreamchaserListener):
         nombre_id = ctx.ID().getText()
 
         if ctx.expression() is None:
-            print(f"Error: Falta la expresión en la asignación a '{nombre_id}'")
+            self.salida.error(
+                f"Error: Falta la expresión en la asignación a '{nombre_id}'"
+            )
             return
 
         valor = self.evaluar(ctx.expression())
 
         if nombre_id in self.constants:
-            print(f"Error: No se puede asignar a la constante '{nombre_id}'")
+            self.salida.error(
+                f"Error: No se puede asignar a la constante '{nombre_id}'"
+            )
             return
 
         self.variables[nombre_id] = valor
 
     def enterConditionalStatement(self, ctx):
         if ctx.expression() is None:
-            print("Error: Falta la condición en la declaración 'si'")
+            self.salida.error("Error: Falta la condición en la declaración 'si'")
             return
 
         condicion = self.evaluar(ctx.expression())
@@ -281,7 +611,7 @@ class DreamchaserInterpreter(DreamchaserListener):
 
     def enterWhileStatement(self, ctx):
         if ctx.expression() is None:
-            print("Error: Falta la condición en la declaración 'mientras'")
+            self.salida.error("Error: Falta la condición en la declaración 'mientras'")
             return
 
         # Agregar un límite de seguridad para evitar bucles infinitos durante el desarrollo
@@ -293,7 +623,7 @@ class DreamchaserInterpreter(DreamchaserListener):
             contador_iteraciones += 1
 
         if contador_iteraciones >= max_iteraciones:
-            print(
+            self.salida.advertencia(
                 "Advertencia: Se alcanzó el máximo de iteraciones del bucle, posible bucle infinito"
             )
 
@@ -310,7 +640,7 @@ class DreamchaserInterpreter(DreamchaserListener):
 
     def enterReturnStatement(self, ctx):
         if ctx.expression() is None:
-            print("Error: Falta la expresión en la declaración 'retornar'")
+            self.salida.error("Error: Falta la expresión en la declaración 'retornar'")
             self.valor_actual = None
             return
 
@@ -322,31 +652,43 @@ class DreamchaserInterpreter(DreamchaserListener):
     def enterCrearBigrafoStatement(self, ctx):
         id_bigrafo = ctx.ID().getText()
         if id_bigrafo not in self.bigrafos:
+            from bigrafo import Bigrafo
+
             self.bigrafos[id_bigrafo] = Bigrafo()
             self.bigrafo_actual = id_bigrafo
-            print(f"Bigrafo creado: {id_bigrafo}")
+            self.salida.traza("bigrafo_creado", "Bigrafo creado: {id}", id=id_bigrafo)
         else:
-            print(f"Error: Bigrafo '{id_bigrafo}' ya existe")
+            self.salida.error(f"Error: Bigrafo '{id_bigrafo}' ya existe")
 
     def enterSeleccionarBigrafoStatement(self, ctx):
         id_bigrafo = ctx.ID().getText()
         if id_bigrafo in self.bigrafos:
             self.bigrafo_actual = id_bigrafo
-            print(f"Bigrafo seleccionado: {id_bigrafo}")
+            self.salida.traza(
+                "bigrafo_seleccionado", "Bigrafo seleccionado: {id}", id=id_bigrafo
+            )
         else:
-            print(f"Error: Bigrafo '{id_bigrafo}' no existe")
+            self.salida.error(f"Error: Bigrafo '{id_bigrafo}' no existe")
 
     def enterCrearNodoStatement(self, ctx):
-        if self.bigrafo_actual is None:
-            print("Error: No hay un bigrafo seleccionado")
-            return
-
         id_nodo = ctx.ID().getText()
         tipo = ctx.STRING(0).getText()[1:-1]  # Eliminar comillas
         valor = ctx.STRING(1).getText()[1:-1]  # Eliminar comillas
+        self.crear_nodo(id_nodo, tipo, valor)
+
+    def crear_nodo(self, id_nodo, tipo, valor):
+        if self.bigrafo_actual is None:
+            self.salida.error("Error: No hay un bigrafo seleccionado")
+            return
+
         self.bigrafos[self.bigrafo_actual].agregar_nodo(id_nodo, tipo, valor)
-        print(
-            f"Nodo creado en {self.bigrafo_actual}: {id_nodo} (tipo: {tipo}, valor: {valor})"
+        self.salida.traza(
+            "nodo_creado",
+            "Nodo creado en {bigrafo}: {id} (tipo: {tipo}, valor: {valor})",
+            bigrafo=self.bigrafo_actual,
+            id=id_nodo,
+            tipo=tipo,
+            valor=valor,
         )
 
     def enterUnirBigrafosStatement(self, ctx):
@@ -367,11 +709,17 @@ class DreamchaserInterpreter(DreamchaserListener):
             bigrafo2 = self.bigrafos[id2]
             nuevo_bigrafo = bigrafo1.interseccion(bigrafo2)
             self.bigrafos[id_nuevo] = nuevo_bigrafo
-            print(
-                f"Bigrafo '{id_nuevo}' creado por la intersección de '{id1}' y '{id2}'"
+            self.salida.traza(
+                "bigrafo_creado",
+                "Bigrafo '{id}' creado por la intersección de '{id1}' y '{id2}'",
+                id=id_nuevo,
+                id1=id1,
+                id2=id2,
             )
         else:
-            print(f"Error: Uno o ambos bigrafos '{id1}' y '{id2}' no existen")
+            self.salida.error(
+                f"Error: Uno o ambos bigrafos '{id1}' y '{id2}' no existen"
+            )
 
     def enterDiferenciaBigrafosStatement(self, ctx):
         id1 = ctx.ID(0).getText()
@@ -385,9 +733,17 @@ class DreamchaserInterpreter(DreamchaserListener):
             bigrafo2 = self.bigrafos[id2]
             nuevo_bigrafo = bigrafo1.diferencia(bigrafo2)
             self.bigrafos[id_nuevo] = nuevo_bigrafo
-            print(f"Bigrafo '{id_nuevo}' creado por la diferencia de '{id1}' y '{id2}'")
+            self.salida.traza(
+                "bigrafo_creado",
+                "Bigrafo '{id}' creado por la diferencia de '{id1}' y '{id2}'",
+                id=id_nuevo,
+                id1=id1,
+                id2=id2,
+            )
         else:
-            print(f"Error: Uno o ambos bigrafos '{id1}' y '{id2}' no existen")
+            self.salida.error(
+                f"Error: Uno o ambos bigrafos '{id1}' y '{id2}' no existen"
+            )
 
     def enterClonarBigrafoStatement(self, ctx):
         id_original = ctx.ID(0).getText()
@@ -399,9 +755,14 @@ class DreamchaserInterpreter(DreamchaserListener):
             bigrafo_original = self.bigrafos[id_original]
             bigrafo_clon = bigrafo_original.clonar()
             self.bigrafos[id_clon] = bigrafo_clon
-            print(f"Bigrafo '{id_clon}' creado como clon de '{id_original}'")
+            self.salida.traza(
+                "bigrafo_creado",
+                "Bigrafo '{id}' creado como clon de '{original}'",
+                id=id_clon,
+                original=id_original,
+            )
         else:
-            print(f"Error: Bigrafo '{id_original}' no existe")
+            self.salida.error(f"Error: Bigrafo '{id_original}' no existe")
 
     def unir_bigrafos(self, id1, id2, id_nuevo):
         if id1 in self.bigrafos and id2 in self.bigrafos:
@@ -409,9 +770,17 @@ class DreamchaserInterpreter(DreamchaserListener):
             bigrafo2 = self.bigrafos[id2]
             nuevo_bigrafo = bigrafo1.union(bigrafo2)
             self.bigrafos[id_nuevo] = nuevo_bigrafo
-            print(f"Bigrafo '{id_nuevo}' creado por la unión de '{id1}' y '{id2}'")
+            self.salida.traza(
+                "bigrafo_creado",
+                "Bigrafo '{id}' creado por la unión de '{id1}' y '{id2}'",
+                id=id_nuevo,
+                id1=id1,
+                id2=id2,
+            )
         else:
-            print(f"Error: Uno o ambos bigrafos '{id1}' y '{id2}' no existen")
+            self.salida.error(
+                f"Error: Uno o ambos bigrafos '{id1}' y '{id2}' no existen"
+            )
 
     def enterContarLugaresStatement(self, ctx):
         id_nodo = ctx.ID().getText()
@@ -419,14 +788,19 @@ class DreamchaserInterpreter(DreamchaserListener):
 
     def contar_lugares(self, id_nodo):
         if self.bigrafo_actual is None:
-            print("Error: No hay un bigrafo seleccionado")
+            self.salida.error("Error: No hay un bigrafo seleccionado")
             return
 
         if id_nodo in self.bigrafos[self.bigrafo_actual].nodos:
             count = self.bigrafos[self.bigrafo_actual].contar_lugares(id_nodo)
-            print(f"Nodo '{id_nodo}' tiene {count} lugares")
+            self.salida.traza(
+                "lugares",
+                "Nodo '{id}' tiene {cantidad} lugares",
+                id=id_nodo,
+                cantidad=count,
+            )
         else:
-            print(f"Error: Nodo '{id_nodo}' no existe")
+            self.salida.error(f"Error: Nodo '{id_nodo}' no existe")
 
     def enterContarEnlacesStatement(self, ctx):
         id_nodo = ctx.ID().getText()
@@ -434,19 +808,427 @@ class DreamchaserInterpreter(DreamchaserListener):
 
     def contar_enlaces(self, id_nodo):
         if self.bigrafo_actual is None:
-            print("Error: No hay un bigrafo seleccionado")
+            self.salida.error("Error: No hay un bigrafo seleccionado")
             return
 
         if id_nodo in self.bigrafos[self.bigrafo_actual].nodos:
             count = self.bigrafos[self.bigrafo_actual].contar_enlaces(id_nodo)
-            print(f"Nodo '{id_nodo}' tiene {count} enlaces")
+            self.salida.traza(
+                "enlaces",
+                "Nodo '{id}' tiene {cantidad} enlaces",
+                id=id_nodo,
+                cantidad=count,
+            )
+        else:
+            self.salida.error(f"Error: Nodo '{id_nodo}' no existe")
+
+    def enterContarLugaresEntrantesStatement(self, ctx):
+        self.contar_lugares_entrantes(ctx.ID().getText())
+
+    def contar_lugares_entrantes(self, id_nodo):
+        if self.bigrafo_actual is None:
+            self.salida.error("Error: No hay un bigrafo seleccionado")
+            return
+
+        if id_nodo in self.bigrafos[self.bigrafo_actual].nodos:
+            count = self.bigrafos[self.bigrafo_actual].contar_lugares_entrantes(id_nodo)
+            self.salida.traza(
+                "lugares_entrantes",
+                "Nodo '{id}' tiene {cantidad} lugares entrantes",
+                id=id_nodo,
+                cantidad=count,
+            )
+        else:
+            self.salida.error(f"Error: Nodo '{id_nodo}' no existe")
+
+    def enterContarEnlacesEntrantesStatement(self, ctx):
+        self.contar_enlaces_entrantes(ctx.ID().getText())
+
+    def contar_enlaces_entrantes(self, id_nodo):
+        if self.bigrafo_actual is None:
+            self.salida.error("Error: No hay un bigrafo seleccionado")
+            return
+
+        if id_nodo in self.bigrafos[self.bigrafo_actual].nodos:
+            count = self.bigrafos[self.bigrafo_actual].contar_enlaces_entrantes(id_nodo)
+            self.salida.traza(
+                "enlaces_entrantes",
+                "Nodo '{id}' tiene {cantidad} enlaces entrantes",
+                id=id_nodo,
+                cantidad=count,
+            )
         else:
-            print(f"Error: Nodo '{id_nodo}' no existe")
+            self.salida.error(f"Error: Nodo '{id_nodo}' no existe")
+
+    def enterBuscarPadreStatement(self, ctx):
+        self.buscar_padre(ctx.ID(0).getText(), ctx.ID(1).getText())
+
+    # Guarda en la variable el id del nodo cuyo lugar contiene al nodo dado, o
+    # '' si no tiene padre
+    def buscar_padre(self, id_nodo, nombre_id):
+        if self.bigrafo_actual is None:
+            self.salida.error("Error: No hay un bigrafo seleccionado")
+            return
+
+        bigrafo = self.bigrafos[self.bigrafo_actual]
+        if id_nodo not in bigrafo.nodos:
+            self.salida.error(f"Error: Nodo '{id_nodo}' no existe")
+            return
+
+        padre = bigrafo.padre(id_nodo)
+        if padre is None:
+            self.asignar_variable(nombre_id, "")
+            self.salida.traza(
+                "padre", "Nodo '{id}' no tiene padre", id=id_nodo, padre=None
+            )
+        else:
+            self.asignar_variable(nombre_id, padre)
+            self.salida.traza(
+                "padre", "Padre de '{id}': {padre}", id=id_nodo, padre=padre
+            )
+
+    def enterAgregarLugarStatement(self, ctx):
+        self.agregar_lugar(ctx.ID(0).getText(), ctx.ID(1).getText())
+
+    def agregar_lugar(self, id_padre, id_hijo):
+        if self.bigrafo_actual is None:
+            self.salida.error("Error: No hay un bigrafo seleccionado")
+            return
+
+        bigrafo = self.bigrafos[self.bigrafo_actual]
+        for id_nodo in (id_padre, id_hijo):
+            if id_nodo not in bigrafo.nodos:
+                self.salida.error(f"Error: Nodo '{id_nodo}' no existe")
+                return
+        # Los lugares forman un bosque (ver Bigrafo.agregar_lugar)
+        padre_actual = bigrafo.padre(id_hijo)
+        if padre_actual is not None:
+            self.salida.error(
+                f"Error: El nodo {id_hijo} ya está dentro de {padre_actual}; un "
+                f"nodo solo puede estar en un lugar"
+            )
+            return
+        if bigrafo.crearia_ciclo(id_padre, id_hijo):
+            self.salida.error(
+                f"Error: El lugar {id_padre} -> {id_hijo} formaría un ciclo "
+                f"({id_hijo} contiene a {id_padre})"
+            )
+            return
+        bigrafo.agregar_lugar(id_padre, id_hijo)
+        self.salida.traza(
+            "lugar_agregado",
+            "Lugar agregado en {bigrafo}: {padre} contiene a {hijo}",
+            bigrafo=self.bigrafo_actual,
+            padre=id_padre,
+            hijo=id_hijo,
+        )
+
+    def enterAgregarEnlaceStatement(self, ctx):
+        self.agregar_enlace(ctx.ID(0).getText(), ctx.ID(1).getText())
+
+    def agregar_enlace(self, id_origen, id_destino):
+        if self.bigrafo_actual is None:
+            self.salida.error("Error: No hay un bigrafo seleccionado")
+            return
+
+        bigrafo = self.bigrafos[self.bigrafo_actual]
+        for id_nodo in (id_origen, id_destino):
+            if id_nodo not in bigrafo.nodos:
+                self.salida.error(f"Error: Nodo '{id_nodo}' no existe")
+                return
+        bigrafo.agregar_enlace(id_origen, id_destino)
+        self.salida.traza(
+            "enlace_agregado",
+            "Enlace agregado en {bigrafo}: {origen} -> {destino}",
+            bigrafo=self.bigrafo_actual,
+            origen=id_origen,
+            destino=id_destino,
+        )
+
+    def enterContieneStatement(self, ctx):
+        self.contiene(ctx.ID(0).getText(), ctx.ID(1).getText())
+
+    def contiene(self, id_ancestro, id_nodo):
+        if self.bigrafo_actual is None:
+            self.salida.error("Error: No hay un bigrafo seleccionado")
+            return
+
+        bigrafo = self.bigrafos[self.bigrafo_actual]
+        for id in (id_ancestro, id_nodo):
+            if id not in bigrafo.nodos:
+                self.salida.error(f"Error: Nodo '{id}' no existe")
+                return
+        if bigrafo.contiene(id_ancestro, id_nodo):
+            self.salida.traza(
+                "contiene",
+                "Nodo '{ancestro}' contiene a '{id}'",
+                ancestro=id_ancestro,
+                id=id_nodo,
+                contiene=True,
+            )
+        else:
+            self.salida.traza(
+                "contiene",
+                "Nodo '{ancestro}' no contiene a '{id}'",
+                ancestro=id_ancestro,
+                id=id_nodo,
+                contiene=False,
+            )
+
+    def enterProfundidadStatement(self, ctx):
+        self.profundidad(ctx.ID().getText())
+
+    def profundidad(self, id_nodo):
+        if self.bigrafo_actual is None:
+            self.salida.error("Error: No hay un bigrafo seleccionado")
+            return
+
+        bigrafo = self.bigrafos[self.bigrafo_actual]
+        if id_nodo in bigrafo.nodos:
+            self.salida.traza(
+                "profundidad",
+                "Nodo '{id}' tiene profundidad {profundidad}",
+                id=id_nodo,
+                profundidad=bigrafo.profundidad(id_nodo),
+            )
+        else:
+            self.salida.error(f"Error: Nodo '{id_nodo}' no existe")
+
+    def enterDefinirReaccionStatement(self, ctx):
+        self.definir_reaccion(
+            ctx.ID(0).getText(), ctx.ID(1).getText(), ctx.ID(2).getText()
+        )
+
+    # La reacción guarda copias del redex y del reactum
+    def definir_reaccion(self, id_redex, id_reactum, nombre):
+        for id_bigrafo in (id_redex, id_reactum):
+            if id_bigrafo not in self.bigrafos:
+                self.salida.error(f"Error: Bigrafo '{id_bigrafo}' no existe")
+                return
+        redex = self.bigrafos[id_redex]
+        if not len(redex.nodos):
+            self.salida.error(f"Error: El redex '{id_redex}' no tiene nodos")
+            return
+
+        from reacciones import Reaccion
+
+        self.reacciones[nombre] = Reaccion(redex, self.bigrafos[id_reactum])
+        self.salida.traza(
+            "reaccion_definida",
+            "Reacción definida: {nombre} ({redex} -> {reactum})",
+            nombre=nombre,
+            redex=id_redex,
+            reactum=id_reactum,
+        )
+
+    def enterBuscarOcurrenciasStatement(self, ctx):
+        self.buscar_ocurrencias(ctx.ID(0).getText(), ctx.ID(1).getText())
+
+    # Guarda en la variable la cantidad de ocurrencias del redex de la
+    # reacción en el bigrafo seleccionado
+    def buscar_ocurrencias(self, nombre, nombre_id):
+        reaccion = self.reaccion_y_bigrafo(nombre)
+        if reaccion is None:
+            return
+
+        cantidad = sum(
+            1 for _ in reaccion.ocurrencias(self.bigrafos[self.bigrafo_actual])
+        )
+        self.asignar_variable(nombre_id, cantidad)
+        self.salida.traza(
+            "ocurrencias",
+            "Ocurrencias de '{nombre}' en {bigrafo}: {cantidad}",
+            nombre=nombre,
+            bigrafo=self.bigrafo_actual,
+            cantidad=cantidad,
+        )
+
+    def enterAplicarReaccionStatement(self, ctx):
+        self.aplicar_reaccion(ctx.ID().getText())
+
+    # Aplica la reacción a la primera ocurrencia en el bigrafo seleccionado
+    def aplicar_reaccion(self, nombre):
+        reaccion = self.reaccion_y_bigrafo(nombre)
+        if reaccion is None:
+            return
+
+        bigrafo, aplicadas = reaccion.aplicar(self.bigrafos[self.bigrafo_actual])
+        if aplicadas:
+            self.bigrafos[self.bigrafo_actual] = bigrafo
+            self.salida.traza(
+                "reaccion_aplicada",
+                "Reacción '{nombre}' aplicada en {bigrafo}",
+                nombre=nombre,
+                bigrafo=self.bigrafo_actual,
+                aplicada=True,
+            )
+        else:
+            self.salida.traza(
+                "reaccion_aplicada",
+                "Reacción '{nombre}' sin ocurrencias en {bigrafo}",
+                nombre=nombre,
+                bigrafo=self.bigrafo_actual,
+                aplicada=False,
+            )
+
+    def enterReducirStatement(self, ctx):
+        self.reducir(*(id.getText() for id in ctx.ID()))
+
+    # Aplica las reacciones al bigrafo seleccionado hasta que ninguna tenga
+    # ocurrencias (ver reacciones.reducir)
+    def reducir(self, *nombres):
+        for nombre in nombres:
+            if self.reaccion_y_bigrafo(nombre) is None:
+                return
+
+        from reacciones import reducir
+
+        bigrafo, aplicadas, rondas, punto_fijo = reducir(
+            self.bigrafos[self.bigrafo_actual],
+            [self.reacciones[nombre] for nombre in nombres],
+        )
+        self.bigrafos[self.bigrafo_actual] = bigrafo
+        self.salida.traza(
+            "reduccion",
+            "Reducción de {bigrafo}: {aplicadas} reacciones en {rondas} rondas",
+            bigrafo=self.bigrafo_actual,
+            aplicadas=aplicadas,
+            rondas=rondas,
+            punto_fijo=punto_fijo,
+        )
+        if not punto_fijo:
+            self.salida.advertencia(
+                f"Advertencia: No se llegó a un punto fijo en {rondas} rondas"
+            )
+
+    # Devuelve la reacción si existe y hay un bigrafo seleccionado; si no,
+    # muestra el error y devuelve None
+    def reaccion_y_bigrafo(self, nombre):
+        if self.bigrafo_actual is None:
+            self.salida.error("Error: No hay un bigrafo seleccionado")
+            return None
+        reaccion = self.reacciones.get(nombre)
+        if reaccion is None:
+            self.salida.error(f"Error: Reacción '{nombre}' no existe")
+        return reaccion
+
+    def enterCargarBigrafoStatement(self, ctx):
+        rutas = [cadena.getText()[1:-1] for cadena in ctx.STRING()]
+        self.cargar_bigrafo(ctx.ID().getText(), *rutas)
+
+    # Carga nodos y aristas desde archivos (ver cargador.py) en el bigrafo,
+    # que se crea si no existe, y lo selecciona. Las filas no se imprimen una
+    # por una, solo el resumen
+    def cargar_bigrafo(self, id_bigrafo, ruta_nodos, ruta_aristas=None):
+        from bigrafo import Bigrafo
+        from cargador import cargar_bigrafo
+
+        bigrafo = self.bigrafos.get(id_bigrafo)
+        if bigrafo is None:
+            bigrafo = Bigrafo()
+        try:
+            resumen = cargar_bigrafo(bigrafo, ruta_nodos, ruta_aristas)
+        except (OSError, ValueError) as e:
+            self.salida.error(
+                f"Error: No se pudo cargar el bigrafo '{id_bigrafo}': {e}"
+            )
+            return
+
+        self.bigrafos[id_bigrafo] = bigrafo
+        self.bigrafo_actual = id_bigrafo
+        self.salida.traza(
+            "bigrafo_cargado",
+            "Bigrafo cargado: {id} ({nodos} nodos, {lugares} lugares, "
+            "{enlaces} enlaces)",
+            id=id_bigrafo,
+            **resumen,
+        )
+        if resumen["errores"]:
+            self.salida.advertencia(
+                f"Advertencia: Se ignoraron {resumen['errores']} filas con errores"
+            )
+
+    def enterGuardarBigrafoStatement(self, ctx):
+        self.guardar_bigrafo(ctx.ID().getText(), ctx.STRING().getText()[1:-1])
+
+    # Guarda una instantánea binaria del bigrafo (ver instantanea.py)
+    def guardar_bigrafo(self, id_bigrafo, ruta):
+        bigrafo = self.bigrafos.get(id_bigrafo)
+        if bigrafo is None:
+            self.salida.error(f"Error: Bigrafo '{id_bigrafo}' no existe")
+            return
+        try:
+            bigrafo.guardar(ruta)
+        except (OSError, ValueError) as e:
+            self.salida.error(
+                f"Error: No se pudo guardar el bigrafo '{id_bigrafo}': {e}"
+            )
+            return
+        self.salida.traza(
+            "bigrafo_guardado",
+            "Bigrafo '{id}' guardado en '{ruta}'",
+            id=id_bigrafo,
+            ruta=ruta,
+        )
+
+    def enterAbrirBigrafoStatement(self, ctx):
+        self.abrir_bigrafo(ctx.STRING().getText()[1:-1], ctx.ID().getText())
+
+    # Abre una instantánea en el bigrafo, que reemplaza al que tenga ese id, y
+    # lo selecciona. El archivo se mapea y se lee a medida que se consulta
+    def abrir_bigrafo(self, ruta, id_bigrafo):
+        from bigrafo import Bigrafo
+
+        try:
+            bigrafo = Bigrafo.abrir(ruta)
+        except (OSError, ValueError) as e:
+            self.salida.error(f"Error: No se pudo abrir el bigrafo '{ruta}': {e}")
+            return
+
+        self.bigrafos[id_bigrafo] = bigrafo
+        self.bigrafo_actual = id_bigrafo
+        self.salida.traza(
+            "bigrafo_abierto",
+            "Bigrafo abierto: {id} ({nodos} nodos)",
+            id=id_bigrafo,
+            ruta=ruta,
+            nodos=len(bigrafo.nodos),
+        )
+
+    def enterBuscarNodosStatement(self, ctx):
+        cadenas = [cadena.getText()[1:-1] for cadena in ctx.STRING()]
+        if ctx.MULTIPLY() is not None:
+            cadenas.insert(0, None)  # Cualquier tipo
+        if len(cadenas) == 1:
+            cadenas.append(None)  # Cualquier valor
+        self.buscar_nodos(cadenas[0], cadenas[1], ctx.ID().getText())
+
+    # Guarda en la variable la cantidad de nodos con el tipo y el valor dados
+    # (None no filtra) e imprime sus ids
+    def buscar_nodos(self, tipo, valor, nombre_id):
+        if self.bigrafo_actual is None:
+            self.salida.error("Error: No hay un bigrafo seleccionado")
+            return
+
+        from bigrafo import CUALQUIERA
+
+        ids = self.bigrafos[self.bigrafo_actual].buscar_nodos(
+            CUALQUIERA if tipo is None else tipo,
+            CUALQUIERA if valor is None else valor,
+        )
+        self.asignar_variable(nombre_id, len(ids))
+        self.salida.traza(
+            "nodos_encontrados",
+            "Nodos encontrados en {bigrafo}: {cantidad} ({ids})",
+            bigrafo=self.bigrafo_actual,
+            cantidad=len(ids),
+            ids=", ".join(map(str, ids)),
+        )
 
     # Método auxiliar para ejecutar un bloque de declaraciones
     def ejecutar_bloque(self, ctx_bloque):
         if ctx_bloque is None:
-            print("Error: Falta el bloque")
+            self.salida.error("Error: Falta el bloque")
             return
 
         valor_anterior = self.valor_actual
@@ -461,5 +1243,5 @@ class DreamchaserInterpreter(DreamchaserListener):
                 ):
                     break
             except Exception as e:
-                print(f"Error al ejecutar la declaración: {str(e)}")
+                self.salida.error(f"Error al ejecutar la declaración: {str(e)}")
                 # Continuar la ejecución con la siguiente declaración
@@ -0,0 +1,257 @@
+from array import array
+from itertools import chain, islice
+import numpy as np
+
+# Estructuras persistentes con copia en escritura para los bigrafos.
+#
+# Copiar una estructura es O(1): la copia y el original comparten todos los
+# datos y cada uno copia solo la parte que modifica (copia de caminos). En
+# VectorPersistente el camino es la tabla de bloques y el bloque escrito; en
+# IndicePersistente las claves nunca se borran, así que basta con congelar las
+# capas compartidas y escribir en una capa propia, que tiene prioridad sobre
+# las anteriores.
+
+BITS_BLOQUE = 10
+TAMANO_BLOQUE = 1 << BITS_BLOQUE
+MASCARA_BLOQUE = TAMANO_BLOQUE - 1
+
+# Con más capas que esto, un índice se aplana en un solo diccionario
+MAX_CAPAS = 8
+
+
+class VectorPersistente:
+    __slots__ = ("codigo_tipo", "bloques", "longitud", "tabla_propia", "propios")
+
+    # Con codigo_tipo (por ejemplo "i") los bloques son array; sin él, listas
+    def __init__(self, codigo_tipo=None, valores=()):
+        self.codigo_tipo = codigo_tipo
+        self.bloques = []
+        self.longitud = 0
+        self.tabla_propia = True
+        self.propios = set()
+        self.extend(valores)
+
+    # Vector de enteros con el contenido de un arreglo de NumPy
+    @classmethod
+    def desde_numpy(cls, codigo_tipo, arreglo):
+        vector = cls(codigo_tipo)
+        datos = np.ascontiguousarray(arreglo, dtype=codigo_tipo)
+        for inicio in range(0, len(datos), TAMANO_BLOQUE):
+            bloque = array(
+                codigo_tipo, datos[inicio : inicio + TAMANO_BLOQUE].tobytes()
+            )
+            vector.bloques.append(bloque)
+            vector.propios.add(len(vector.bloques) - 1)
+        vector.longitud = len(datos)
+        return vector
+
+    # Vector sobre una tabla de bloques de solo lectura (ver instantanea.py):
+    # los bloques se copian a bloques propios la primera vez que se escriben
+    @classmethod
+    def desde_bloques(cls, codigo_tipo, bloques, longitud):
+        vector = cls(codigo_tipo)
+        vector.bloques = bloques
+        vector.longitud = longitud
+        vector.tabla_propia = False
+        return vector
+
+    # Copia del contenido de un vector de enteros como arreglo de NumPy
+    def a_numpy(self):
+        a_numpy = getattr(self.bloques, "a_numpy", None)
+        if a_numpy is not None:
+            return a_numpy()
+        if not self.bloques:
+            return np.empty(0, dtype=self.codigo_tipo)
+        return np.concatenate(
+            [np.frombuffer(bloque, dtype=self.codigo_tipo) for bloque in self.bloques]
+        )
+
+    def _nuevo_bloque(self):
+        if self.codigo_tipo is None:
+            return []
+        return array(self.codigo_tipo)
+
+    def copiar(self):
+        copia = VectorPersistente.__new__(VectorPersistente)
+        copia.codigo_tipo = self.codigo_tipo
+        copia.bloques = self.bloques
+        copia.longitud = self.longitud
+        # Desde ahora la tabla y los bloques son de los dos
+        copia.tabla_propia = self.tabla_propia = False
+        copia.propios = set()
+        self.propios = set()
+        return copia
+
+    # Devuelve el bloque i listo para escribir, copiándolo si es compartido
+    def _bloque_propio(self, i):
+        if not self.tabla_propia:
+            self.bloques = list(self.bloques)
+            self.tabla_propia = True
+        if i not in self.propios:
+            bloque = self.bloques[i]
+            if isinstance(bloque, (list, array)):
+                bloque = bloque[:]
+            elif self.codigo_tipo is None:
+                bloque = list(bloque)
+            else:
+                bloque = array(self.codigo_tipo, bloque)
+            self.bloques[i] = bloque
+            self.propios.add(i)
+        return self.bloques[i]
+
+    def __len__(self):
+        return self.longitud
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.longitud:
+            raise IndexError("índice fuera de rango")
+        return self.bloques[i >> BITS_BLOQUE][i & MASCARA_BLOQUE]
+
+    def __setitem__(self, i, valor):
+        if not 0 <= i < self.longitud:
+            raise IndexError("índice fuera de rango")
+        bloque = i >> BITS_BLOQUE
+        if self.tabla_propia and bloque in self.propios:
+            self.bloques[bloque][i & MASCARA_BLOQUE] = valor
+        else:
+            self._bloque_propio(bloque)[i & MASCARA_BLOQUE] = valor
+
+    # self[i] += cantidad, en una sola llamada
+    def sumar(self, i, cantidad):
+        if not 0 <= i < self.longitud:
+            raise IndexError("índice fuera de rango")
+        bloque = i >> BITS_BLOQUE
+        if self.tabla_propia and bloque in self.propios:
+            self.bloques[bloque][i & MASCARA_BLOQUE] += cantidad
+        else:
+            self._bloque_propio(bloque)[i & MASCARA_BLOQUE] += cantidad
+
+    def append(self, valor):
+        i = self.longitud >> BITS_BLOQUE
+        if self.tabla_propia and i in self.propios:
+            self.bloques[i].append(valor)
+            self.longitud += 1
+            return
+        if i == len(self.bloques):
+            if not self.tabla_propia:
+                self.bloques = list(self.bloques)
+                self.tabla_propia = True
+            self.bloques.append(self._nuevo_bloque())
+            self.propios.add(i)
+        self._bloque_propio(i).append(valor)
+        self.longitud += 1
+
+    # Agrega los valores por trozos que llenan cada bloque
+    def extend(self, valores):
+        if isinstance(valores, np.ndarray):
+            valores = array(
+                self.codigo_tipo, valores.astype(self.codigo_tipo).tobytes()
+            )
+        elif not isinstance(valores, (list, tuple, array)):
+            valores = list(valores)
+        inicio = 0
+        while inicio < len(valores):
+            i = self.longitud >> BITS_BLOQUE
+            if i == len(self.bloques):
+                if not self.tabla_propia:
+                    self.bloques = list(self.bloques)
+                    self.tabla_propia = True
+                self.bloques.append(self._nuevo_bloque())
+                self.propios.add(i)
+            bloque = self._bloque_propio(i)
+            trozo = valores[inicio : inicio + TAMANO_BLOQUE - len(bloque)]
+            bloque.extend(trozo)
+            inicio += len(trozo)
+            self.longitud += len(trozo)
+
+    def __iter__(self):
+        return islice(chain.from_iterable(self.bloques), self.longitud)
+
+    def __repr__(self):
+        return f"VectorPersistente({list(self)!r})"
+
+
+class IndicePersistente:
+    __slots__ = ("capas", "propia")
+
+    def __init__(self):
+        self.capas = ()  # Diccionarios congelados, compartidos con otras copias
+        self.propia = {}
+
+    # Índice cuya única capa compartida es un mapeo de solo lectura con get,
+    # keys y __getitem__ (ver instantanea.IndiceMapeado)
+    @classmethod
+    def desde_capa(cls, capa):
+        indice = cls()
+        indice.capas = (capa,)
+        return indice
+
+    def copiar(self):
+        if self.propia:
+            self.capas = self.capas + (self.propia,)
+            self.propia = {}
+            if len(self.capas) > MAX_CAPAS:
+                self.aplanar()
+        copia = IndicePersistente.__new__(IndicePersistente)
+        copia.capas = self.capas
+        copia.propia = {}
+        return copia
+
+    def aplanar(self):
+        plano = {}
+        for capa in self.capas:
+            plano.update(capa)
+        self.capas = (plano,)
+
+    # Devuelve un diccionario con todas las claves, que no se debe modificar.
+    # Si hay más de una capa se aplanan en una sola, que queda congelada
+    def diccionario(self):
+        if not self.capas:
+            return self.propia
+        if self.propia or len(self.capas) > 1:
+            self.capas = self.capas + (self.propia,)
+            self.propia = {}
+            self.aplanar()
+        return self.capas[0]
+
+    def get(self, clave, predeterminado=None):
+        valor = self.propia.get(clave)
+        if valor is not None:
+            return valor
+        for capa in reversed(self.capas):
+            valor = capa.get(clave)
+            if valor is not None:
+                return valor
+        return predeterminado
+
+    def __contains__(self, clave):
+        return self.get(clave) is not None
+
+    def __getitem__(self, clave):
+        valor = self.get(clave)
+        if valor is None:
+            raise KeyError(clave)
+        return valor
+
+    # Reasignar una clave la agrega a la capa propia, que oculta el valor
+    # anterior sin modificar las capas compartidas
+    def __setitem__(self, clave, valor):
+        self.propia[clave] = valor
+
+    # Valor de la clave listo para modificarlo en el lugar: si está en una capa
+    # compartida se copia (con su método copy) a la capa propia
+    def propio(self, clave):
+        valor = self.propia.get(clave)
+        if valor is None:
+            valor = self.get(clave)
+            if valor is not None:
+                valor = self.propia[clave] = valor.copy()
+        return valor
+
+    def update(self, pares):
+        self.propia.update(pares)
+
+    # Cantidad de claves; una clave reasignada después de copiar el índice se
+    # cuenta una vez por cada capa en la que está
+    def __len__(self):
+        return len(self.propia) + sum(len(capa) for capa in self.capas)
@@ -1,21 +1,83 @@
+import queue
+import threading
+import time
 import tkinter as tk
-from tkinter import filedialog, scrolledtext, messagebox
+from itertools import groupby
+from operator import attrgetter
+from tkinter import filedialog, scrolledtext, messagebox, ttk
 from PIL import Image, ImageTk
-from antlr4 import *
-from antlr_output.DreamchaserLexer import DreamchaserLexer
-from antlr_output.DreamchaserParser import DreamchaserParser
-from dreamchaser_interpreter import DreamchaserInterpreter
+from analizador import analizar, traducir_texto, precalentar
+from cache_programas import CacheProgramas
+from dreamchaser_interpreter import (
+    DreamchaserInterpreter,
+    MOTORES,
+    ControlEjecucion,
+    EjecucionCancelada,
+)
+from incremental import EjecucionIncremental
+from perfilador import Perfil
+from salida import Evento, SalidaCola
+from visor_estado import VisorEstado
+
+# El programa se ejecuta en un hilo aparte para que la ventana siga
+# respondiendo. El hilo no toca los widgets: manda los mensajes por una cola
+# (ver salida.SalidaCola) que la ventana lee cada INTERVALO_SONDEO ms, y el
+# botón Detener cancela la ejecución antes de la siguiente sentencia (ver
+# dreamchaser_interpreter.ControlEjecucion). El estado final se muestra en un
+# árbol que carga cada parte cuando se abre (ver visor_estado.py) y, si se
+# perfiló, el reporte del perfil en otra pestaña (ver perfilador.py).
+INTERVALO_SONDEO = 50  # ms
+MAX_EVENTOS_SONDEO = 20000  # mensajes leídos de la cola en cada sondeo
+MAX_LINEAS_SALIDA = 10000  # líneas que se conservan en el área de salida
 
 
 class DreamchaserGUI:
-    def __init__(self, root):
+    def __init__(self, root, precalentar_analizador=True):
         self.root = root
         self.root.title("Lenguaje Dreamchaser - Edición Bigrafos")
 
         # Establecer tamaño mínimo y máximo de la ventana
         self.root.minsize(800, 600)
 
+        # Ejecución en curso (ver run_program)
+        self.hilo = None
+        self.cola = None
+        self.control = None
+        self.interprete = None
+        self.error_ejecucion = None
+        self.detenido = False
+        self.inicio_ejecucion = None
+        self.con_puntos_control = False
+        self.texto_ejecutado = None
+
+        # Puntos de control de la última ejecución (ver incremental.py)
+        self.ejecucion_incremental = EjecucionIncremental()
+
+        # Caché en disco de los programas ya compilados; si no se puede abrir,
+        # se avisa en el área de salida y se ejecuta sin ella
+        advertencia_cache = None
+        try:
+            self.cache = CacheProgramas()
+        except OSError as e:
+            advertencia_cache = (
+                f"Advertencia: No se pudo abrir la caché de programas: {str(e)}"
+            )
+            self.cache = None
+
         self.create_widgets()
+        if advertencia_cache is not None:
+            self.mostrar_salida(
+                [Evento("advertencia", "advertencia", None, advertencia_cache)]
+            )
+
+        # Llenar los DFA del analizador con los programas de ejemplo para que
+        # la primera ejecución no los pague. Se hace en un hilo aparte para no
+        # congelar la ventana al abrirla; los DFA se comparten en todo el
+        # proceso, así que sirven también para el hilo de la ejecución
+        self.precalentamiento = None
+        if precalentar_analizador:
+            self.precalentamiento = threading.Thread(target=precalentar, daemon=True)
+            self.precalentamiento.start()
 
     def create_widgets(self):
         # Título e imagen
@@ -62,15 +124,52 @@ class DreamchaserGUI:
         self.output_area.grid(
             row=3, column=1, columnspan=2, padx=10, pady=10, sticky="nsew"
         )
+        self.output_area.tag_configure("error", foreground="red")
+        self.output_area.tag_configure("advertencia", foreground="dark orange")
 
-        tk.Label(self.root, text="Estado final:").grid(
-            row=4, column=1, columnspan=2, sticky="ew"
+        # Estado final y perfil, en pestañas
+        self.pestanas = ttk.Notebook(self.root)
+        self.pestanas.grid(
+            row=4, column=1, columnspan=2, rowspan=2, padx=10, pady=10, sticky="nsew"
         )
-        self.final_state_area = scrolledtext.ScrolledText(
-            self.root, wrap=tk.WORD, width=60, height=10, state="disabled"
+        self.visor_estado = VisorEstado(self.pestanas)
+        self.pestanas.add(self.visor_estado.marco, text="Estado final")
+        self.perfil_area = scrolledtext.ScrolledText(
+            self.pestanas, wrap=tk.NONE, width=60, height=10, state="disabled"
+        )
+        self.pestanas.add(self.perfil_area, text="Perfil")
+
+        # Selección del motor de ejecución
+        tk.Label(self.root, text="Motor de ejecución:").grid(
+            row=6, column=1, sticky="e"
+        )
+        self.motor = tk.StringVar(value=MOTORES[0])
+        tk.OptionMenu(self.root, self.motor, *MOTORES).grid(
+            row=6, column=2, pady=5, sticky="ew"
+        )
+
+        # Seguir desde la primera sentencia que cambió
+        self.incremental = tk.BooleanVar(value=True)
+        tk.Checkbutton(
+            self.root,
+            text="Reutilizar lo que no cambió desde la ejecución anterior",
+            variable=self.incremental,
+        ).grid(row=8, column=1, columnspan=2, sticky="w")
+        self.perfilar = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            self.root,
+            text="Perfilar (con el motor clausuras)",
+            variable=self.perfilar,
+        ).grid(row=9, column=1, columnspan=2, sticky="w")
+
+        # Detener la ejecución y progreso
+        self.stop_button = tk.Button(
+            self.root, text="Detener", command=self.stop_program, state="disabled"
         )
-        self.final_state_area.grid(
-            row=5, column=1, columnspan=2, padx=10, pady=10, sticky="nsew"
+        self.stop_button.grid(row=7, column=1, pady=5, sticky="ew")
+        self.progreso = tk.StringVar(value="")
+        tk.Label(self.root, textvariable=self.progreso, anchor="w").grid(
+            row=7, column=2, pady=5, sticky="ew"
         )
 
         # Configurar la expansión de filas y columnas
@@ -95,90 +194,131 @@ class DreamchaserGUI:
                 self.text_area.insert(tk.END, program)
 
     def run_program(self):
+        if self.hilo is not None:
+            return
         program = self.text_area.get(1.0, tk.END)
         self.output_area.config(state="normal")
         self.output_area.delete(1.0, tk.END)
-        self.final_state_area.config(state="normal")
-        self.final_state_area.delete(1.0, tk.END)
+        self.output_area.config(state="disabled")
+        self.visor_estado.limpiar()
+        self.mostrar_perfil(None)
 
-        try:
-            # Redirect print to output_area
-            import sys
-            from io import StringIO
+        # El perfilador solo funciona con el motor de clausuras
+        perfil = Perfil() if self.perfilar.get() else None
+        motor = "clausuras" if perfil is not None else self.motor.get()
+        self.texto_ejecutado = program
+        self.cola = queue.SimpleQueue()
+        self.control = ControlEjecucion()
+        self.interprete = DreamchaserInterpreter(
+            salida=SalidaCola(self.cola), control=self.control, perfil=perfil
+        )
+        self.error_ejecucion = None
+        self.detenido = False
+        # Con perfil se ejecuta todo el programa, para medirlo completo
+        self.con_puntos_control = self.incremental.get() and perfil is None
+        self.inicio_ejecucion = time.perf_counter()
+        self.hilo = threading.Thread(
+            target=self.ejecutar_programa,
+            args=(self.interprete, program, motor, self.con_puntos_control),
+            daemon=True,
+        )
+        self.run_button.config(state="disabled")
+        self.stop_button.config(state="normal")
+        self.hilo.start()
+        self.root.after(INTERVALO_SONDEO, self.sondear)
 
-            old_stdout = sys.stdout
-            sys.stdout = mystdout = StringIO()
+    def stop_program(self):
+        if self.hilo is not None:
+            self.control.cancelar()
+            self.stop_button.config(state="disabled")
+            self.progreso.set("Deteniendo...")
+
+    # Se ejecuta en el hilo de la ejecución
+    def ejecutar_programa(self, interprete, texto_programa, motor, incremental=False):
+        # Si el precalentamiento no terminó, esperarlo para que los dos hilos
+        # no llenen los DFA a la vez
+        if self.precalentamiento is not None:
+            self.precalentamiento.join()
+        try:
+            if incremental:
+                self.ejecucion_incremental.ejecutar(interprete, texto_programa, motor)
+            elif motor == "arbol" or interprete.perfil is not None:
+                # El perfil usa el árbol para saber la línea de cada sentencia
+                arbol, _ = analizar(texto_programa)
+                interprete.ejecutar(arbol, motor)
+            else:
+                programa = traducir_texto(texto_programa, self.cache, interprete.salida)
+                interprete.ejecutar_ri(programa, motor)
+        except EjecucionCancelada:
+            self.detenido = True
+        except Exception as e:
+            self.error_ejecucion = e
 
-            # Execute the program
-            self.ejecutar_programa(program)
+    # Muestra los mensajes que llegaron por la cola y el progreso; cuando el
+    # hilo terminó y la cola quedó vacía, el estado final
+    def sondear(self):
+        terminado = not self.hilo.is_alive()
+        eventos = []
+        try:
+            while len(eventos) < MAX_EVENTOS_SONDEO:
+                eventos.append(self.cola.get_nowait())
+        except queue.Empty:
+            pass
+        self.mostrar_salida(eventos)
 
-            # Get the output from print statements
-            output = mystdout.getvalue()
-            self.output_area.insert(tk.END, output)
+        transcurrido = time.perf_counter() - self.inicio_ejecucion
+        sentencias = self.control.sentencias
+        if not terminado or len(eventos) == MAX_EVENTOS_SONDEO:
+            if not self.control.cancelado:
+                self.progreso.set(
+                    f"Ejecutando: {sentencias:,} sentencias ({transcurrido:.1f} s)"
+                )
+            self.root.after(INTERVALO_SONDEO, self.sondear)
+            return
 
-            # Restore stdout
-            sys.stdout = old_stdout
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+        estado = "Detenido" if self.detenido else "Terminado"
+        progreso = f"{estado}: {sentencias:,} sentencias ({transcurrido:.1f} s)"
+        incremental = self.ejecucion_incremental
+        if self.con_puntos_control and incremental.reutilizados:
+            if incremental.linea is None:
+                progreso += ", sin cambios"
+            else:
+                progreso += f", reanudado en la línea {incremental.linea}"
+        self.progreso.set(progreso)
+        self.visor_estado.mostrar(self.interprete)
+        self.mostrar_perfil(self.interprete.perfil)
+        self.hilo = None
+        self.run_button.config(state="normal")
+        self.stop_button.config(state="disabled")
+        if self.error_ejecucion is not None:
+            messagebox.showerror("Error", str(self.error_ejecucion))
 
+    # Los errores y las advertencias se muestran con otro color; los mensajes
+    # seguidos de la misma clase se insertan juntos. Solo se conservan las
+    # últimas MAX_LINEAS_SALIDA líneas
+    def mostrar_salida(self, eventos):
+        if not eventos:
+            return
+        eventos = eventos[-MAX_LINEAS_SALIDA:]
+        self.output_area.config(state="normal")
+        for clase, grupo in groupby(eventos, key=attrgetter("clase")):
+            texto = "".join(evento.mensaje + "\n" for evento in grupo)
+            self.output_area.insert(tk.END, texto, clase)
+        lineas = int(self.output_area.index("end-1c").split(".")[0])
+        if lineas > MAX_LINEAS_SALIDA:
+            self.output_area.delete("1.0", f"{lineas - MAX_LINEAS_SALIDA}.0")
+        self.output_area.see(tk.END)
         self.output_area.config(state="disabled")
-        self.final_state_area.config(state="disabled")
-
-    def ejecutar_programa(self, texto_programa):
-        # Crear lexer y parser
-        flujo_entrada = InputStream(texto_programa)
-        lexer = DreamchaserLexer(flujo_entrada)
-        flujo_tokens = CommonTokenStream(lexer)
-        parser = DreamchaserParser(flujo_tokens)
-        arbol = parser.program()
-        interprete = DreamchaserInterpreter()
-        caminante = ParseTreeWalker()
-        caminante.walk(interprete, arbol)
-
-        # Display final state in final_state_area
-        self.final_state_area.config(state="normal")
-        self.final_state_area.insert(tk.END, "Variables:\n")
-        for var, valor in interprete.variables.items():
-            self.final_state_area.insert(tk.END, f"  {var} = {valor}\n")
-
-        self.final_state_area.insert(tk.END, "==============================\n")
-
-        self.final_state_area.insert(tk.END, "\nConstantes:\n")
-        for const, valor in interprete.constants.items():
-            self.final_state_area.insert(tk.END, f"  {const} = {valor}\n")
-
-        self.final_state_area.insert(tk.END, "==============================\n")
-
-        self.final_state_area.insert(tk.END, "\nFunciones:\n")
-        for nombre_funcion in interprete.functions:
-            self.final_state_area.insert(
-                tk.END,
-                f"  {nombre_funcion}({', '.join(interprete.functions[nombre_funcion]['params'])})\n",
-            )
-
-        self.final_state_area.insert(tk.END, "==============================\n")
 
-        self.final_state_area.insert(tk.END, "\nBigrafos:\n")
-        for id_bigrafo, bigrafo in interprete.bigrafos.items():
-            self.final_state_area.insert(tk.END, f"  {id_bigrafo}:\n")
-            for id_nodo, nodo in bigrafo.nodos.items():
-                self.final_state_area.insert(
-                    tk.END,
-                    f"    Nodo {id_nodo} (tipo: {nodo.tipo}, valor: {nodo.valor})\n",
-                )
-                if nodo.lugares:
-                    self.final_state_area.insert(
-                        tk.END,
-                        f"      Lugares: {[lugar.id for lugar in nodo.lugares]}\n",
-                    )
-                if nodo.enlaces:
-                    self.final_state_area.insert(
-                        tk.END,
-                        f"      Enlaces: {[enlace.id for enlace in nodo.enlaces]}\n",
-                    )
-
-        self.final_state_area.insert(tk.END, "==============================\n")
-        self.final_state_area.config(state="disabled")
+    # Muestra el reporte del perfil (ver perfilador.py) en su pestaña; sin
+    # perfil la deja vacía
+    def mostrar_perfil(self, perfil):
+        self.perfil_area.config(state="normal")
+        self.perfil_area.delete(1.0, tk.END)
+        if perfil is not None:
+            self.perfil_area.insert(tk.END, perfil.reporte(self.texto_ejecutado))
+            self.pestanas.select(self.perfil_area)
+        self.perfil_area.config(state="disabled")
 
 
 if __name__ == "__main__":
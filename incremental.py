@@ -0,0 +1,82 @@
+from analizador import fragmentos_programa
+
+# Reejecución incremental de un programa que se edita (la usa la GUI).
+#
+# El programa se ejecuta por fragmentos del nivel superior, como en
+# DreamchaserInterpreter.ejecutar_flujo, y cada intervalo fragmentos se
+# guarda un punto de control: el estado del intérprete
+# (capturar_estado) junto con la cantidad de fragmentos ejecutados. Al volver
+# a ejecutar, se busca el prefijo de fragmentos que no cambió, se restaura el
+# último punto de control dentro de ese prefijo y se sigue desde ahí.
+#
+# Se guardan como mucho max_puntos puntos de control: al pasarse, el
+# intervalo se duplica y se descartan los puntos que no caen en él, así que
+# un programa de n fragmentos guarda unos max_puntos puntos repartidos de a
+# menos de 2 * n / max_puntos fragmentos. Los bigrafos de los puntos comparten
+# con los del intérprete todo lo que no cambió (ver estructuras_persistentes).
+#
+# Lo que el prefijo reutilizado mostró en la salida no se vuelve a mostrar,
+# y sus efectos fuera del intérprete (archivos guardados con
+# guardar_bigrafo, por ejemplo) no se repiten.
+MAX_PUNTOS_CONTROL = 64
+
+
+class EjecucionIncremental:
+    def __init__(self, max_puntos=MAX_PUNTOS_CONTROL):
+        self.max_puntos = max_puntos
+        self.olvidar()
+
+    def olvidar(self):
+        self.motor = None
+        self.optimizar = None
+        self.fragmentos = []  # Textos de los fragmentos del último programa
+        self.puntos = []  # (fragmentos ejecutados, estado), en orden
+        self.intervalo = 1
+        # De la última ejecución: fragmentos reutilizados y línea del primero
+        # que se volvió a ejecutar (None si no hubo cambios)
+        self.reutilizados = 0
+        self.linea = None
+
+    # Ejecuta texto_programa en interprete, que debe estar recién creado
+    def ejecutar(self, interprete, texto_programa, motor="clausuras", optimizar=True):
+        fragmentos = list(fragmentos_programa(texto_programa.splitlines(True)))
+        textos = [texto for _, texto in fragmentos]
+        if (motor, optimizar) != (self.motor, self.optimizar):
+            # Las funciones definidas guardan código de un motor
+            self.olvidar()
+        comunes = 0
+        for anterior, texto in zip(self.fragmentos, textos):
+            if anterior != texto:
+                break
+            comunes += 1
+        while self.puntos and self.puntos[-1][0] > comunes:
+            self.puntos.pop()
+        self.motor = motor
+        self.optimizar = optimizar
+        self.fragmentos = textos
+
+        reutilizados = 0
+        if self.puntos:
+            reutilizados, estado = self.puntos[-1]
+            interprete.restaurar_estado(estado)
+        self.reutilizados = reutilizados
+        self.linea = None
+        if reutilizados < len(fragmentos):
+            self.linea = fragmentos[reutilizados][0]
+
+        def al_terminar(ejecutados):
+            ejecutados += reutilizados
+            if ejecutados % self.intervalo == 0:
+                self.guardar_punto(ejecutados, interprete.capturar_estado())
+
+        interprete.ejecutar_fragmentos(
+            fragmentos[reutilizados:], motor, optimizar, al_terminar
+        )
+
+    def guardar_punto(self, ejecutados, estado):
+        self.puntos.append((ejecutados, estado))
+        if len(self.puntos) > self.max_puntos:
+            self.intervalo *= 2
+            self.puntos = [
+                punto for punto in self.puntos if punto[0] % self.intervalo == 0
+            ]
@@ -0,0 +1,342 @@
+import json
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+import numpy as np
+from bigrafo import Bigrafo, Adyacencia
+from estructuras_persistentes import (
+    TAMANO_BLOQUE,
+    VectorPersistente,
+    IndicePersistente,
+)
+
+# Instantáneas binarias de bigrafos (guardar_bigrafo / abrir_bigrafo).
+#
+# El archivo empieza con MAGICO, la versión del formato y la posición del
+# encabezado, que es un JSON al final del archivo con la cantidad de nodos y
+# de aristas y la posición de cada sección. Las secciones son columnas de
+# enteros alineadas a 8 bytes:
+#
+# - ids y valores: tablas de cadenas (desplazamientos int64 y datos), con una
+#   etiqueta de un byte por elemento que indica su tipo (ver _codificar)
+# - ids_hash: tabla hash con direccionamiento abierto (crc32 del id
+#   codificado -> índice), para buscar un id sin leer todos
+# - tipos: código de tipo int32 de cada nodo, y la tabla de tipos
+# - lugares y enlaces: origenes, destinos y grados int32 en el orden en que
+#   se agregaron las aristas, y la vista CSR ya armada: inicios int64 y
+#   vecinos int32. Un nodo está como mucho en un lugar; solo en una
+#   instantánea guardada antes de que los lugares fueran un bosque puede
+#   tener más de uno, y entonces su padre es el último que se agregó
+#
+# abrir_bigrafo mapea el archivo con mmap y arma el Bigrafo sobre vistas de
+# esas secciones sin leerlas: cada columna es un VectorPersistente cuyos
+# bloques se crean al pedirlos, así que el sistema solo lee las páginas de los
+# nodos que se tocan. Lo que se modifica se copia a bloques propios (como al
+# clonar), y el archivo nunca se escribe. Los índices secundarios y las
+# aristas entrantes se construyen en la primera consulta, como siempre.
+
+MAGICO = b"DCBG"
+VERSION_FORMATO = 1
+ALINEACION = 8
+_CABECERA = struct.Struct("<4sIQ")  # mágico, versión, posición del encabezado
+
+
+# Cada elemento de una tabla de cadenas se guarda con una etiqueta de tipo
+def _codificar(valor):
+    if isinstance(valor, str):
+        return b"s" + valor.encode("utf-8")
+    if valor is None:
+        return b"n"
+    if isinstance(valor, bool):
+        return b"v" if valor else b"f"
+    if isinstance(valor, int):
+        return b"i" + str(valor).encode("ascii")
+    if isinstance(valor, float):
+        return b"r" + repr(valor).encode("ascii")
+    raise ValueError(f"No se puede guardar el valor {valor!r} de tipo {type(valor)}")
+
+
+def _decodificar(datos):
+    etiqueta = datos[:1]
+    if etiqueta == b"s":
+        return str(datos[1:], "utf-8")
+    if etiqueta == b"n":
+        return None
+    if etiqueta == b"v":
+        return True
+    if etiqueta == b"f":
+        return False
+    if etiqueta == b"i":
+        return int(datos[1:])
+    if etiqueta == b"r":
+        return float(datos[1:])
+    raise ValueError(f"Etiqueta de valor desconocida: {etiqueta!r}")
+
+
+# Desplazamientos (int64, uno más que elementos) y datos de una tabla de
+# cadenas ya codificadas
+def _tabla_cadenas(codificadas):
+    desplazamientos = np.zeros(len(codificadas) + 1, dtype=np.int64)
+    np.cumsum([len(datos) for datos in codificadas], out=desplazamientos[1:])
+    return desplazamientos, b"".join(codificadas)
+
+
+# Tabla hash de los ids codificados: cada casilla tiene el índice de un nodo o
+# -1, y un id se busca desde crc32(id) & (tamaño - 1) hacia adelante
+def _tabla_hash(codificados):
+    tamano = 2
+    while tamano < 2 * len(codificados):
+        tamano *= 2
+    mascara = tamano - 1
+    tabla = [-1] * tamano
+    for indice, datos in enumerate(codificados):
+        posicion = zlib.crc32(datos) & mascara
+        while tabla[posicion] >= 0:
+            posicion = (posicion + 1) & mascara
+        tabla[posicion] = indice
+    return np.array(tabla, dtype=np.int32)
+
+
+class TablaCadenas:
+    def __init__(self, datos, desplazamientos, inicio):
+        self.datos = datos  # El mmap completo
+        self.desplazamientos = desplazamientos
+        self.inicio = inicio
+
+    def __len__(self):
+        return len(self.desplazamientos) - 1
+
+    def crudo(self, i):
+        inicio = self.inicio
+        return self.datos[
+            inicio + self.desplazamientos[i] : inicio + self.desplazamientos[i + 1]
+        ]
+
+    def __getitem__(self, i):
+        return _decodificar(self.crudo(i))
+
+
+# Tablas de bloques de solo lectura para VectorPersistente.desde_bloques. Cada
+# bloque se arma al pedirlo sobre los datos mapeados
+class BloquesEnteros:
+    def __init__(self, vista):
+        self.vista = vista  # memoryview con formato "i" o "q"
+
+    def __len__(self):
+        return -(-len(self.vista) // TAMANO_BLOQUE)
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError("índice fuera de rango")
+        return self.vista[i * TAMANO_BLOQUE : (i + 1) * TAMANO_BLOQUE]
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def a_numpy(self):
+        return np.array(self.vista)
+
+
+class BloqueCadenas:
+    __slots__ = ("tabla", "inicio", "fin")
+
+    def __init__(self, tabla, inicio, fin):
+        self.tabla = tabla
+        self.inicio = inicio
+        self.fin = fin
+
+    def __len__(self):
+        return self.fin - self.inicio
+
+    def __getitem__(self, j):
+        if not 0 <= j < self.fin - self.inicio:
+            raise IndexError("índice fuera de rango")
+        return self.tabla[self.inicio + j]
+
+    def __iter__(self):
+        return (self.tabla[i] for i in range(self.inicio, self.fin))
+
+
+class BloquesCadenas:
+    def __init__(self, tabla):
+        self.tabla = tabla
+
+    def __len__(self):
+        return -(-len(self.tabla) // TAMANO_BLOQUE)
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError("índice fuera de rango")
+        inicio = i * TAMANO_BLOQUE
+        return BloqueCadenas(
+            self.tabla, inicio, min(inicio + TAMANO_BLOQUE, len(self.tabla))
+        )
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+# Capa de IndicePersistente (id -> índice) sobre la tabla hash mapeada
+class IndiceMapeado:
+    def __init__(self, ids, tabla):
+        self.ids = ids  # TablaCadenas
+        self.tabla = tabla
+
+    def get(self, clave, predeterminado=None):
+        try:
+            codificada = _codificar(clave)
+        except ValueError:
+            return predeterminado
+        tabla = self.tabla
+        mascara = len(tabla) - 1
+        posicion = zlib.crc32(codificada) & mascara
+        while True:
+            indice = tabla[posicion]
+            if indice < 0:
+                return predeterminado
+            if self.ids.crudo(indice) == codificada:
+                return indice
+            posicion = (posicion + 1) & mascara
+
+    def __getitem__(self, clave):
+        indice = self.get(clave)
+        if indice is None:
+            raise KeyError(clave)
+        return indice
+
+    def __contains__(self, clave):
+        return self.get(clave) is not None
+
+    def keys(self):
+        return (self.ids[i] for i in range(len(self.ids)))
+
+    __iter__ = keys
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def guardar_bigrafo(bigrafo, ruta):
+    secciones = []  # (nombre, datos)
+
+    for nombre, columna in (("ids", bigrafo.ids), ("valores", bigrafo.valores)):
+        codificadas = [_codificar(valor) for valor in columna]
+        desplazamientos, datos = _tabla_cadenas(codificadas)
+        if nombre == "ids":
+            secciones.append(("ids_hash", _tabla_hash(codificadas)))
+        del codificadas
+        secciones.append((f"{nombre}_desplazamientos", desplazamientos))
+        secciones.append((f"{nombre}_datos", datos))
+
+    desplazamientos, datos = _tabla_cadenas(
+        [_codificar(tipo) for tipo in bigrafo.nombres_tipos]
+    )
+    secciones.append(("nombres_tipos_desplazamientos", desplazamientos))
+    secciones.append(("nombres_tipos_datos", datos))
+    secciones.append(("tipos", bigrafo.tipos.a_numpy().astype(np.int32)))
+
+    cantidades = {"nodos": len(bigrafo.ids)}
+    for nombre in ("lugares", "enlaces"):
+        adyacencia = getattr(bigrafo, nombre)
+        inicios, vecinos = adyacencia.obtener_csr()
+        for columna in ("origenes", "destinos", "grados"):
+            vector = getattr(adyacencia, columna)
+            secciones.append((f"{nombre}_{columna}", vector.a_numpy().astype(np.int32)))
+        secciones.append((f"{nombre}_vecinos", vecinos.astype(np.int32)))
+        secciones.append((f"{nombre}_inicios", inicios.astype(np.int64)))
+        cantidades[nombre] = len(vecinos)
+
+    # Escribir en un archivo temporal y renombrarlo: un bigrafo abierto desde
+    # el archivo anterior sigue leyendo el suyo
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as archivo:
+            archivo.write(_CABECERA.pack(MAGICO, VERSION_FORMATO, 0))
+            posiciones = {}
+            for nombre, datos in secciones:
+                relleno = -archivo.tell() % ALINEACION
+                archivo.write(b"\0" * relleno)
+                posiciones[nombre] = [archivo.tell(), memoryview(datos).nbytes]
+                archivo.write(datos)
+            posicion_encabezado = archivo.tell()
+            encabezado = dict(cantidades, secciones=posiciones)
+            archivo.write(json.dumps(encabezado).encode("utf-8"))
+            archivo.seek(0)
+            archivo.write(_CABECERA.pack(MAGICO, VERSION_FORMATO, posicion_encabezado))
+        os.replace(temporal, ruta)
+    except BaseException:
+        os.unlink(temporal)
+        raise
+
+
+def abrir_bigrafo(ruta):
+    with open(ruta, "rb") as archivo:
+        if os.fstat(archivo.fileno()).st_size < _CABECERA.size:
+            raise ValueError(f"'{ruta}' no es una instantánea de bigrafo")
+        datos = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+    magico, version, posicion_encabezado = _CABECERA.unpack_from(datos)
+    if magico != MAGICO:
+        raise ValueError(f"'{ruta}' no es una instantánea de bigrafo")
+    if version != VERSION_FORMATO:
+        raise ValueError(f"Versión de instantánea no soportada: {version}")
+    encabezado = json.loads(datos[posicion_encabezado:])
+    posiciones = encabezado["secciones"]
+    vista = memoryview(datos)
+
+    def seccion(nombre, formato):
+        inicio, tamano = posiciones[nombre]
+        return vista[inicio : inicio + tamano].cast(formato)
+
+    def tabla_cadenas(nombre):
+        return TablaCadenas(
+            datos,
+            seccion(f"{nombre}_desplazamientos", "q"),
+            posiciones[f"{nombre}_datos"][0],
+        )
+
+    cantidad_nodos = encabezado["nodos"]
+    bigrafo = Bigrafo()
+    ids = tabla_cadenas("ids")
+    bigrafo.indices = IndicePersistente.desde_capa(
+        IndiceMapeado(ids, seccion("ids_hash", "i"))
+    )
+    bigrafo.ids = VectorPersistente.desde_bloques(
+        None, BloquesCadenas(ids), cantidad_nodos
+    )
+    bigrafo.valores = VectorPersistente.desde_bloques(
+        None, BloquesCadenas(tabla_cadenas("valores")), cantidad_nodos
+    )
+    bigrafo.tipos = VectorPersistente.desde_bloques(
+        "i", BloquesEnteros(seccion("tipos", "i")), cantidad_nodos
+    )
+    nombres_tipos = tabla_cadenas("nombres_tipos")
+    bigrafo.nombres_tipos = [nombres_tipos[i] for i in range(len(nombres_tipos))]
+    bigrafo.codigos_tipos = {
+        tipo: codigo for codigo, tipo in enumerate(bigrafo.nombres_tipos)
+    }
+
+    for nombre in ("lugares", "enlaces"):
+        cantidad_aristas = encabezado[nombre]
+        adyacencia = Adyacencia()
+        for columna in ("origenes", "destinos"):
+            setattr(
+                adyacencia,
+                columna,
+                VectorPersistente.desde_bloques(
+                    "i",
+                    BloquesEnteros(seccion(f"{nombre}_{columna}", "i")),
+                    cantidad_aristas,
+                ),
+            )
+        adyacencia.grados = VectorPersistente.desde_bloques(
+            "i", BloquesEnteros(seccion(f"{nombre}_grados", "i")), cantidad_nodos
+        )
+        adyacencia.csr = (
+            np.frombuffer(seccion(f"{nombre}_inicios", "q"), dtype=np.int64),
+            np.frombuffer(seccion(f"{nombre}_vecinos", "i"), dtype=np.int32),
+        )
+        setattr(bigrafo, nombre, adyacencia)
+    return bigrafo
@@ -0,0 +1,335 @@
+import contextlib
+import fnmatch
+import io
+import json
+import multiprocessing
+import os
+import signal
+import time
+from collections import deque
+from multiprocessing.connection import wait
+from analizador import analizar, traducir_texto, precalentar
+from cache_programas import CacheProgramas
+import bigrafo  # noqa: F401 (ver ejecutar_lote)
+from dreamchaser_interpreter import DreamchaserInterpreter, MOTORES
+from salida import Salida, SalidaEventos, SalidaSilenciosa
+
+# Ejecución por lotes (main.py --lote DIRECTORIO).
+#
+# Los programas de un directorio se reparten entre procesos trabajadores, que
+# ejecutan uno por vez y devuelven un resultado por programa: la salida
+# impresa, los errores de sintaxis, los errores y advertencias de ejecución
+# con su línea (cuando se conoce, ver salida.py), el estado final del
+# intérprete y cuánto tardó. Con silencioso=True la salida no incluye las
+# trazas de las sentencias (Nodo creado en ..., etc.). Con usar_cache=True
+# (el valor por omisión) cada trabajador abre la caché de programas
+# compilados (ver cache_programas.py), así que volver a ejecutar un programa
+# que no cambió no lo vuelve a analizar. Los resultados se escriben como JSON
+# Lines a medida que terminan (no en el orden de los archivos), con el nombre
+# del archivo en cada línea.
+#
+# Los trabajadores se crean una vez y ejecutan muchos programas: el proceso
+# principal analiza los programas de ejemplo antes de crearlos para que los
+# DFA de predicción del lexer y del parser, que se comparten en el proceso
+# (ver analizador.py), ya estén calientes en cada trabajador. También importa
+# bigrafo (y NumPy), que el intérprete importa recién cuando un programa usa
+# bigrafos, para que los trabajadores no lo importen cada uno por su cuenta.
+#
+# Límites por programa:
+# - tiempo_maximo: el trabajador interrumpe el programa con una alarma y
+#   devuelve la salida que alcanzó a imprimir. Si no responde MARGEN_TIEMPO
+#   segundos después (por ejemplo, dentro de código en C), el proceso
+#   principal lo termina y crea otro
+# - memoria_maxima: el proceso principal revisa la memoria residente de cada
+#   trabajador cada INTERVALO_CONTROL segundos (solo en Linux, con /proc) y
+#   termina el que la supere
+# Un trabajador que muere por cualquier otro motivo también se reemplaza, y el
+# programa que ejecutaba queda con estado "terminado".
+
+INTERVALO_CONTROL = 0.1  # segundos
+MARGEN_TIEMPO = 2.0  # segundos
+LIMITE_SALIDA = 1024 * 1024  # caracteres de salida guardados por programa
+LIMITE_EVENTOS = 1000  # errores y advertencias guardados por programa
+
+
+class TiempoAgotado(BaseException):
+    # BaseException para que no la atrapen los manejadores de errores por
+    # sentencia de los motores, que atrapan Exception
+    pass
+
+
+# Flujo de texto que guarda hasta limite caracteres y cuenta el resto
+class SalidaLimitada(io.TextIOBase):
+    def __init__(self, limite=LIMITE_SALIDA):
+        self.partes = []
+        self.guardados = 0
+        self.descartados = 0
+        self.limite = limite
+
+    def writable(self):
+        return True
+
+    def write(self, texto):
+        libre = self.limite - self.guardados
+        if len(texto) > libre:
+            self.descartados += len(texto) - max(libre, 0)
+            texto = texto[: max(libre, 0)]
+        self.partes.append(texto)
+        self.guardados += len(texto)
+        return len(texto)
+
+    def getvalue(self):
+        return "".join(self.partes)
+
+
+# Estado final del intérprete como un diccionario que se puede pasar a JSON
+def estado_final(interprete):
+    return {
+        "variables": interprete.variables,
+        "constantes": interprete.constants,
+        "funciones": {
+            nombre: funcion["params"]
+            for nombre, funcion in interprete.functions.items()
+        },
+        "bigrafos": {
+            id_bigrafo: [
+                {
+                    "id": id_nodo,
+                    "tipo": nodo.tipo,
+                    "valor": nodo.valor,
+                    "lugares": [lugar.id for lugar in nodo.lugares],
+                    "enlaces": [enlace.id for enlace in nodo.enlaces],
+                }
+                for id_nodo, nodo in bigrafo.nodos.items()
+            ]
+            for id_bigrafo, bigrafo in interprete.bigrafos.items()
+        },
+    }
+
+
+def _interrumpir(numero_senal, marco):
+    raise TiempoAgotado()
+
+
+# Ejecuta un programa y devuelve su resultado (sin el nombre del archivo)
+def ejecutar_archivo(
+    ruta, motor=MOTORES[0], tiempo_maximo=None, silencioso=False, cache=None
+):
+    salida = SalidaLimitada()
+    errores = SalidaLimitada()
+    resultado = {"estado": "ok"}
+    eventos = SalidaEventos(
+        (SalidaSilenciosa if silencioso else Salida)(salida),
+        ("advertencia", "error"),
+        LIMITE_EVENTOS,
+    )
+    interprete = DreamchaserInterpreter(salida=eventos)
+    alarma = tiempo_maximo is not None and hasattr(signal, "setitimer")
+    inicio = time.perf_counter()
+    try:
+        with open(ruta, "r", encoding="utf-8") as archivo:
+            texto_programa = archivo.read()
+        if alarma:
+            signal.signal(signal.SIGALRM, _interrumpir)
+            signal.setitimer(signal.ITIMER_REAL, tiempo_maximo)
+        # La salida estándar de errores tiene los errores de sintaxis de ANTLR
+        with contextlib.redirect_stderr(errores):
+            if motor == "arbol":
+                arbol, _ = analizar(texto_programa)
+                interprete.ejecutar(arbol, motor)
+            else:
+                interprete.ejecutar_ri(
+                    traducir_texto(texto_programa, cache, eventos), motor
+                )
+    except TiempoAgotado:
+        resultado["estado"] = "tiempo_agotado"
+    except MemoryError:
+        resultado["estado"] = "memoria_agotada"
+    except Exception as e:
+        resultado["estado"] = "error"
+        resultado["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        if alarma:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    resultado["segundos"] = round(time.perf_counter() - inicio, 6)
+    resultado["salida"] = salida.getvalue()
+    resultado["errores"] = errores.getvalue()
+    resultado["eventos"] = [evento.como_diccionario() for evento in eventos.eventos]
+    if eventos.descartados:
+        resultado["eventos_descartados"] = eventos.descartados
+    if salida.descartados:
+        resultado["salida_descartada"] = salida.descartados
+    resultado["estado_final"] = estado_final(interprete)
+    return resultado
+
+
+def _trabajar(
+    conexion, motor, tiempo_maximo, silencioso, usar_cache, precalentar_analizador
+):
+    if precalentar_analizador:
+        precalentar()
+    cache = None
+    if usar_cache:
+        try:
+            cache = CacheProgramas()
+        except OSError:
+            pass  # Sin caché se analiza cada programa
+    while True:
+        try:
+            ruta = conexion.recv()
+        except EOFError:
+            return
+        if ruta is None:
+            return
+        resultado = ejecutar_archivo(ruta, motor, tiempo_maximo, silencioso, cache)
+        # Un resultado que no se puede serializar se devuelve como texto
+        conexion.send(json.dumps(resultado, ensure_ascii=False, default=repr))
+        if resultado["estado"] == "memoria_agotada":
+            return  # El proceso principal crea otro trabajador
+
+
+def _memoria_residente(pid):
+    try:
+        with open(f"/proc/{pid}/statm") as archivo:
+            return int(archivo.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Trabajador:
+    def __init__(self, contexto, motor, tiempo_maximo, silencioso, usar_cache):
+        self.conexion, conexion_hija = contexto.Pipe()
+        self.proceso = contexto.Process(
+            target=_trabajar,
+            args=(
+                conexion_hija,
+                motor,
+                tiempo_maximo,
+                silencioso,
+                usar_cache,
+                contexto.get_start_method() != "fork",
+            ),
+            daemon=True,
+        )
+        self.proceso.start()
+        conexion_hija.close()
+        self.ruta = None
+        self.inicio = None
+
+    def asignar(self, ruta):
+        self.ruta = ruta
+        self.inicio = time.perf_counter()
+        self.conexion.send(ruta)
+
+    def terminar(self):
+        self.proceso.kill()
+        self.proceso.join()
+        self.conexion.close()
+
+    def cerrar(self):
+        try:
+            self.conexion.send(None)
+        except OSError:
+            pass
+        self.proceso.join(1)
+        if self.proceso.is_alive():
+            self.proceso.kill()
+            self.proceso.join()
+        self.conexion.close()
+
+
+# Archivos del directorio cuyo nombre coincide con el patrón, ordenados
+def listar_programas(directorio, patron="*"):
+    return sorted(
+        os.path.join(directorio, nombre)
+        for nombre in os.listdir(directorio)
+        if fnmatch.fnmatch(nombre, patron)
+        and not nombre.startswith(".")
+        and os.path.isfile(os.path.join(directorio, nombre))
+    )
+
+
+# Ejecuta los programas y escribe una línea JSON por programa en salida.
+# Devuelve la cantidad de programas por estado
+def ejecutar_lote(
+    rutas,
+    salida,
+    trabajos=None,
+    motor=MOTORES[0],
+    tiempo_maximo=None,
+    memoria_maxima=None,
+    silencioso=False,
+    usar_cache=True,
+):
+    contexto = multiprocessing.get_context()
+    if contexto.get_start_method() == "fork":
+        precalentar()
+    pendientes = deque(rutas)
+    trabajos = max(1, min(trabajos or os.cpu_count() or 1, len(pendientes)))
+    libres = [
+        Trabajador(contexto, motor, tiempo_maximo, silencioso, usar_cache)
+        for _ in range(trabajos)
+    ]
+    ocupados = {}  # conexión -> trabajador
+    estados = {}
+
+    def escribir(trabajador, resultado):
+        resultado = dict(archivo=os.path.basename(trabajador.ruta), **resultado)
+        salida.write(json.dumps(resultado, ensure_ascii=False, default=repr) + "\n")
+        salida.flush()
+        estados[resultado["estado"]] = estados.get(resultado["estado"], 0) + 1
+
+    def reemplazar(trabajador, estado):
+        trabajador.terminar()
+        segundos = round(time.perf_counter() - trabajador.inicio, 6)
+        escribir(trabajador, {"estado": estado, "segundos": segundos})
+        del ocupados[trabajador.conexion]
+        if pendientes:
+            libres.append(
+                Trabajador(contexto, motor, tiempo_maximo, silencioso, usar_cache)
+            )
+
+    try:
+        while pendientes or ocupados:
+            while pendientes and libres:
+                trabajador = libres.pop()
+                trabajador.asignar(pendientes.popleft())
+                ocupados[trabajador.conexion] = trabajador
+
+            for conexion in wait(list(ocupados), INTERVALO_CONTROL):
+                trabajador = ocupados[conexion]
+                try:
+                    resultado = json.loads(conexion.recv())
+                except (EOFError, OSError):
+                    reemplazar(trabajador, "terminado")
+                    continue
+                del ocupados[conexion]
+                escribir(trabajador, resultado)
+                if resultado["estado"] == "memoria_agotada":
+                    trabajador.cerrar()
+                    if pendientes:
+                        libres.append(
+                            Trabajador(
+                                contexto, motor, tiempo_maximo, silencioso, usar_cache
+                            )
+                        )
+                else:
+                    libres.append(trabajador)
+
+            ahora = time.perf_counter()
+            for trabajador in list(ocupados.values()):
+                if (
+                    tiempo_maximo is not None
+                    and ahora - trabajador.inicio > tiempo_maximo + MARGEN_TIEMPO
+                ):
+                    reemplazar(trabajador, "tiempo_agotado")
+                elif memoria_maxima is not None:
+                    memoria = _memoria_residente(trabajador.proceso.pid)
+                    if memoria is not None and memoria > memoria_maxima:
+                        reemplazar(trabajador, "memoria_agotada")
+    finally:
+        for trabajador in libres:
+            trabajador.cerrar()
+        for trabajador in ocupados.values():
+            trabajador.terminar()
+    return estados
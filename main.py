@@ -1,27 +1,134 @@
-from antlr4 import *
-from antlr_output.DreamchaserLexer import DreamchaserLexer
-from antlr_output.DreamchaserParser import DreamchaserParser
-from dreamchaser_interpreter import DreamchaserInterpreter
-from ejemplosProgramas.programas import programas
-from gui import DreamchaserGUI
-import tkinter as tk
-
-
-def ejecutar_programa(texto_programa):
-    # Crear lexer y parser
-    flujo_entrada = InputStream(texto_programa)
-    lexer = DreamchaserLexer(flujo_entrada)
-    flujo_tokens = CommonTokenStream(lexer)
-    parser = DreamchaserParser(flujo_tokens)
-
-    # Parsear la entrada
-    arbol = parser.program()
-
-    # Crear el intérprete y recorrer el árbol de análisis
-    interprete = DreamchaserInterpreter()
-    caminante = ParseTreeWalker()
-    caminante.walk(interprete, arbol)
+import argparse
+import contextlib
+import sys
+import time
+from analizador import analizar, traducir_texto
+from cache_programas import CacheProgramas
+from dreamchaser_interpreter import DreamchaserInterpreter, MOTORES
+from optimizador import volcar_programa
+from salida import Salida, SalidaBuffer, SalidaSilenciosa
 
+# La GUI (tkinter y Pillow) y el modo por lotes (multiprocessing) se importan
+# solo cuando se piden, para que ejecutar un archivo sea rápido y funcione en
+# un servidor sin pantalla ni Pillow. Ver benchmarks/bench_arranque.py
+
+
+def ejecutar_programa(
+    texto_programa,
+    motor="clausuras",
+    volcar_optimizado=False,
+    tamano_memo=0,
+    cache=None,
+    salida=None,
+    perfil=None,
+):
+    # Crear el intérprete y ejecutar el programa con el motor elegido
+    interprete = DreamchaserInterpreter(tamano_memo, salida, perfil=perfil)
+    if motor == "arbol" or perfil is not None:
+        # El recorrido del árbol necesita el árbol de ANTLR completo, y el
+        # perfil lo usa para saber la línea de cada sentencia
+        arbol, _ = analizar(texto_programa)
+        interprete.ejecutar(arbol, motor)
+    else:
+        # Los motores compilados parten de la RI, que puede venir de la caché
+        interprete.ejecutar_ri(
+            traducir_texto(texto_programa, cache, interprete.salida), motor
+        )
+
+    if volcar_optimizado and interprete.programa is not None:
+        print("\n======= Programa optimizado =======")
+        print(volcar_programa(interprete.programa))
+        print(f"\nNodos plegados: {interprete.nodos_plegados}")
+
+    estadisticas = interprete.estadisticas_memo()
+    if estadisticas is not None:
+        print("\n======= Memoización =======")
+        print(f"Funciones puras: {', '.join(estadisticas['funciones']) or '-'}")
+        print(
+            f"Aciertos: {estadisticas['aciertos']}, fallos: {estadisticas['fallos']}, "
+            f"desalojos: {estadisticas['desalojos']}"
+        )
+
+    imprimir_estado_final(interprete)
+    if perfil is not None:
+        imprimir_perfil(perfil, texto_programa)
+
+
+# Ejecuta un archivo grande sentencia por sentencia, sin construir el árbol
+# del programa completo. La ruta "-" es la entrada estándar
+def ejecutar_archivo_por_partes(ruta, motor="clausuras", salida=None, perfil=None):
+    interprete = DreamchaserInterpreter(salida=salida, perfil=perfil)
+    with abrir_programa(ruta) as archivo:
+        interprete.ejecutar_flujo(archivo, motor)
+    imprimir_estado_final(interprete)
+    if perfil is not None:
+        imprimir_perfil(perfil)
+
+
+# Caché en disco de los programas compilados (ver cache_programas.py); si no
+# se puede abrir, se ejecuta sin ella
+def abrir_cache():
+    try:
+        return CacheProgramas()
+    except OSError as e:
+        print(
+            f"Advertencia: No se pudo abrir la caché de programas: {str(e)}",
+            file=sys.stderr,
+        )
+        return None
+
+
+def abrir_programa(ruta):
+    if ruta == "-":
+        return contextlib.nullcontext(sys.stdin)
+    return open(ruta, "r", encoding="utf-8")
+
+
+# Ejecuta los programas de un directorio en procesos aparte (ver lotes.py) y
+# escribe los resultados como JSON Lines; el resumen va a la salida de errores
+def ejecutar_directorio(opciones):
+    from lotes import ejecutar_lote, listar_programas
+
+    rutas = listar_programas(opciones.lote, opciones.patron)
+    memoria_maxima = opciones.memoria_maxima
+    if memoria_maxima is not None:
+        memoria_maxima *= 1024 * 1024
+    inicio = time.perf_counter()
+    with contextlib.ExitStack() as pila:
+        salida = sys.stdout
+        if opciones.resultados:
+            salida = pila.enter_context(
+                open(opciones.resultados, "w", encoding="utf-8")
+            )
+        estados = ejecutar_lote(
+            rutas,
+            salida,
+            opciones.trabajos,
+            opciones.motor,
+            opciones.tiempo_maximo,
+            memoria_maxima,
+            opciones.silencioso,
+            not opciones.sin_cache,
+        )
+    resumen = ", ".join(f"{estado}: {cantidad}" for estado, cantidad in estados.items())
+    print(
+        f"Lote: {len(rutas)} programas en {time.perf_counter() - inicio:.1f} s "
+        f"({resumen or 'sin programas'})",
+        file=sys.stderr,
+    )
+
+
+# Sin --silencioso, a una terminal se escribe cada mensaje en el momento y a
+# un archivo o una tubería de a bloques
+def crear_salida(opciones):
+    if opciones.silencioso:
+        return SalidaSilenciosa()
+    if sys.stdout.isatty():
+        return Salida()
+    return SalidaBuffer()
+
+
+def imprimir_estado_final(interprete):
     print("\n======= Estado final =======")
     print("Variables:", end="\n")
     for var, valor in interprete.variables.items():
@@ -50,7 +157,159 @@ def ejecutar_programa(texto_programa):
     print("==============================\n")
 
 
+def imprimir_perfil(perfil, texto_programa=None):
+    print("======= Perfil =======")
+    print(perfil.reporte(texto_programa))
+
+
 def main():
+    argumentos = argparse.ArgumentParser(description="Intérprete de Dreamchaser")
+    argumentos.add_argument(
+        "archivo",
+        nargs="?",
+        help="programa a ejecutar, o - para leerlo de la entrada estándar (sin "
+        "él se abre la GUI)",
+    )
+    argumentos.add_argument("--motor", choices=MOTORES, default=MOTORES[0])
+    argumentos.add_argument(
+        "--flujo",
+        action="store_true",
+        help="analizar y ejecutar el archivo sentencia por sentencia",
+    )
+    argumentos.add_argument(
+        "--silencioso",
+        "--quiet",
+        action="store_true",
+        help="no mostrar lo que informa cada sentencia (Nodo creado en ..., "
+        "etc.); los errores y lo que imprime el programa se muestran igual",
+    )
+    argumentos.add_argument(
+        "--sin-cache",
+        "--no-cache",
+        action="store_true",
+        help="no usar la caché de programas compilados (ver cache_programas.py)",
+    )
+    argumentos.add_argument(
+        "--volcar-optimizado",
+        action="store_true",
+        help="imprimir el programa optimizado y la cantidad de nodos plegados "
+        "(solo con los motores compilados, sin --flujo)",
+    )
+    argumentos.add_argument(
+        "--memo",
+        type=int,
+        default=0,
+        metavar="N",
+        help="memoizar las llamadas a funciones puras en una caché de N "
+        "resultados e imprimir sus estadísticas (0, por omisión, la desactiva; "
+        "solo con los motores compilados, sin --flujo)",
+    )
+    argumentos.add_argument(
+        "--perfil",
+        "--profile",
+        action="store_true",
+        help="medir el tiempo de cada línea, función, librería y operación de "
+        "bigrafos e imprimir un reporte (solo con el motor clausuras)",
+    )
+    argumentos.add_argument(
+        "--pilas",
+        metavar="ARCHIVO",
+        help="con --perfil, guardar las pilas colapsadas (para flamegraph.pl) "
+        "en el archivo",
+    )
+    argumentos.add_argument(
+        "--lote",
+        "--batch",
+        metavar="DIRECTORIO",
+        help="ejecutar los programas del directorio en procesos aparte",
+    )
+    argumentos.add_argument(
+        "--trabajos",
+        "--jobs",
+        type=int,
+        help="procesos para el lote (por omisión, uno por CPU)",
+    )
+    argumentos.add_argument(
+        "--patron", default="*", help="nombres de los archivos del lote"
+    )
+    argumentos.add_argument(
+        "--tiempo-maximo",
+        "--timeout",
+        type=float,
+        default=60.0,
+        metavar="SEGUNDOS",
+        help="tiempo máximo de cada programa del lote",
+    )
+    argumentos.add_argument(
+        "--memoria-maxima",
+        type=int,
+        metavar="MiB",
+        help="memoria residente máxima de cada proceso del lote (Linux)",
+    )
+    argumentos.add_argument(
+        "--resultados",
+        metavar="ARCHIVO",
+        help="archivo JSON Lines con los resultados del lote (por omisión, "
+        "la salida estándar)",
+    )
+    opciones = argumentos.parse_args()
+
+    if opciones.lote:
+        ejecutar_directorio(opciones)
+        return
+
+    if opciones.archivo:
+        perfil = None
+        if opciones.perfil:
+            if opciones.motor != "clausuras":
+                argumentos.error("--perfil solo funciona con --motor clausuras")
+            from perfilador import Perfil
+
+            perfil = Perfil()
+        for opcion, activa in (
+            ("--volcar-optimizado", opciones.volcar_optimizado),
+            ("--memo", opciones.memo),
+        ):
+            if activa and (opciones.motor == "arbol" or opciones.flujo):
+                argumentos.error(
+                    f"{opcion} necesita un motor compilado y no funciona con --flujo"
+                )
+        if opciones.memo < 0:
+            argumentos.error("--memo tiene que ser 0 o más")
+        salida = crear_salida(opciones)
+        if opciones.flujo:
+            ejecutar_archivo_por_partes(
+                opciones.archivo, opciones.motor, salida, perfil
+            )
+        else:
+            cache = None if opciones.sin_cache else abrir_cache()
+            with abrir_programa(opciones.archivo) as archivo:
+                ejecutar_programa(
+                    archivo.read(),
+                    opciones.motor,
+                    opciones.volcar_optimizado,
+                    opciones.memo,
+                    cache=cache,
+                    salida=salida,
+                    perfil=perfil,
+                )
+        if perfil is not None and opciones.pilas:
+            perfil.guardar_pilas(opciones.pilas)
+        return
+
+    abrir_gui()
+
+
+def abrir_gui():
+    try:
+        import tkinter as tk
+        from gui import DreamchaserGUI
+    except ImportError as e:
+        sys.exit(
+            f"Error: La GUI necesita tkinter y Pillow ({e}); para ejecutar un "
+            "programa sin GUI use: python main.py ARCHIVO"
+        )
+
     root = tk.Tk()
     app = DreamchaserGUI(root)
     root.mainloop()
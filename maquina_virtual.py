@@ -0,0 +1,547 @@
+import sys
+from compilador import OPERACIONES, DIVISIONES, SIN_VALOR, llamadas_en_preorden
+from memoizacion import SIN_RESULTADO, clave_memo
+
+# Segundo motor de ejecución: la RI de compilador.py se traduce a un único
+# arreglo de instrucciones con saltos y se ejecuta en un ciclo de despacho con
+# una pila de valores.
+#
+# Cada bloque se emite una sola vez en dos versiones (subrutinas): "ejecutado",
+# que equivale a DreamchaserInterpreter.ejecutar_bloque (try por sentencia y
+# salida al encontrar un retorno), y "recorrido", que equivale a que
+# ParseTreeWalker recorra las sentencias del bloque. Así el tamaño del código
+# es lineal aunque los bloques se aniden.
+
+# Códigos de operación
+LITERAL = 0
+CARGAR = 1
+BINARIA = 2
+DIVISION = 3
+ASIGNAR = 4
+SALTAR = 5
+SALTAR_SI_FALSO = 6
+SALTAR_SI_LIMITE = 7
+INCREMENTAR = 8
+INTENTAR = 9
+FIN_INTENTO = 10
+COMPROBAR_RETORNO = 11
+LLAMAR_SUBRUTINA = 12
+RETORNO_SUBRUTINA = 13
+ARGUMENTO = 14
+LLAMAR = 15
+RETORNAR_FUNCION = 16
+FIJAR_VALOR_ACTUAL = 17
+INICIO_BLOQUE = 18
+FIN_BLOQUE = 19
+FIN_MIENTRAS = 20
+DEFINIR_FUNCION = 21
+CONSTANTE = 22
+IMPORTAR = 23
+METODO = 24
+IMPRIMIR = 25
+LANZAR = 26
+INICIO_PROGRAMA = 27
+FIN = 28
+CONTAR_SENTENCIA = 29
+
+NOMBRES_OPERACIONES = {
+    valor: nombre
+    for nombre, valor in list(globals().items())
+    if nombre.isupper() and isinstance(valor, int)
+}
+
+MAX_ITERACIONES_MIENTRAS = 10000
+
+
+def _sin_operacion(a, b):
+    return None
+
+
+class CompiladorBytecode:
+    # Con controlado=True cada sentencia empieza con CONTAR_SENTENCIA, que
+    # avisa al control de ejecución del intérprete
+    def __init__(self, controlado=False):
+        self.controlado = controlado
+        self.codigo = []
+        self.subrutinas = {}
+        self.pendientes = []
+
+    def compilar_programa(self, programa, continuar=False):
+        if not continuar:
+            self.emitir(INICIO_PROGRAMA)
+        for sentencia in programa:
+            self.emitir_sentencia(sentencia)
+        self.emitir(FIN)
+
+        # Emitir las subrutinas de los bloques a medida que se van referenciando
+        while self.pendientes:
+            clave, emisor = self.pendientes.pop()
+            self.subrutinas[clave] = len(self.codigo)
+            emisor()
+
+        # Resolver las direcciones de las subrutinas
+        codigo = []
+        for instruccion in self.codigo:
+            if instruccion[0] == LLAMAR_SUBRUTINA:
+                instruccion = (LLAMAR_SUBRUTINA, self.subrutinas[instruccion[1]])
+            elif instruccion[0] == DEFINIR_FUNCION:
+                instruccion = instruccion[:3] + (self.subrutinas[instruccion[3]],)
+            codigo.append(instruccion)
+        return tuple(codigo)
+
+    def emitir(self, *instruccion):
+        self.codigo.append(instruccion)
+        return len(self.codigo) - 1
+
+    def parchear(self, posicion, *instruccion):
+        self.codigo[posicion] = instruccion
+
+    def subrutina(self, clave, emisor):
+        if clave not in self.subrutinas:
+            self.subrutinas[clave] = None
+            self.pendientes.append((clave, emisor))
+        return clave
+
+    # Bloques
+
+    def emitir_ejecucion_bloque(self, bloque):
+        if bloque is None:
+            self.emitir(IMPRIMIR, "Error: Falta el bloque")
+            return
+        clave = self.subrutina(
+            ("ejecutado", id(bloque)), lambda: self.emitir_bloque_ejecutado(bloque)
+        )
+        self.emitir(LLAMAR_SUBRUTINA, clave)
+
+    def emitir_recorrido_bloque(self, bloque):
+        if bloque is None:
+            return
+        clave = self.subrutina(
+            ("recorrido", id(bloque)), lambda: self.emitir_bloque_recorrido(bloque)
+        )
+        self.emitir(LLAMAR_SUBRUTINA, clave)
+
+    def emitir_bloque_ejecutado(self, bloque):
+        self.emitir(INICIO_BLOQUE)
+        comprobaciones = []
+        for sentencia in bloque:
+            intento = self.emitir(INTENTAR, None)
+            self.emitir_sentencia(sentencia)
+            self.emitir(FIN_INTENTO)
+            comprobaciones.append(self.emitir(COMPROBAR_RETORNO, None))
+            # Si la sentencia falla se continúa con la siguiente
+            self.parchear(intento, INTENTAR, len(self.codigo))
+        fin = self.emitir(FIN_BLOQUE)
+        for posicion in comprobaciones:
+            self.parchear(posicion, COMPROBAR_RETORNO, fin)
+        self.emitir(RETORNO_SUBRUTINA)
+
+    def emitir_bloque_recorrido(self, bloque):
+        for sentencia in bloque:
+            self.emitir_sentencia(sentencia)
+        self.emitir(RETORNO_SUBRUTINA)
+
+    def emitir_cuerpo_funcion(self, bloque):
+        self.emitir_ejecucion_bloque(bloque)
+        self.emitir(RETORNAR_FUNCION)
+
+    # Sentencias
+
+    def emitir_sentencia(self, sentencia):
+        tipo = sentencia[0]
+        if self.controlado and tipo != "comentario":
+            self.emitir(CONTAR_SENTENCIA)
+        if tipo == "comentario":
+            pass
+        elif tipo == "error":
+            self.emitir(LANZAR, sentencia[1])
+        elif tipo == "importar":
+            if sentencia[1] is None:
+                self.emitir(
+                    IMPRIMIR,
+                    "Error: Falta el nombre de la librería en la declaración de importación",
+                )
+            else:
+                self.emitir(IMPORTAR, sentencia[1])
+        elif tipo == "const":
+            _, nombre_id, literal = sentencia
+            if literal is None:
+                self.emitir(
+                    IMPRIMIR, f"Error: Falta el valor para la constante '{nombre_id}'"
+                )
+            else:
+                self.emitir(CONSTANTE, nombre_id, literal[1])
+        elif tipo == "asignar":
+            _, nombre_id, expr = sentencia
+            if expr is None:
+                self.emitir(
+                    IMPRIMIR,
+                    f"Error: Falta la expresión en la asignación a '{nombre_id}'",
+                )
+            else:
+                self.emitir_expresion(expr)
+                self.emitir(ASIGNAR, nombre_id)
+                self.emitir_descenso_expresion(expr)
+        elif tipo == "si":
+            self.emitir_si(sentencia)
+        elif tipo == "mientras":
+            self.emitir_mientras(sentencia)
+        elif tipo == "funcion":
+            _, nombre_funcion, params, bloque, _ = sentencia
+            clave = self.subrutina(
+                ("funcion", id(bloque)), lambda: self.emitir_cuerpo_funcion(bloque)
+            )
+            self.emitir(DEFINIR_FUNCION, nombre_funcion, params, clave)
+            self.emitir_recorrido_bloque(bloque)
+        elif tipo == "retornar":
+            expr = sentencia[1]
+            if expr is None:
+                self.emitir(
+                    IMPRIMIR, "Error: Falta la expresión en la declaración 'retornar'"
+                )
+                self.emitir(LITERAL, None)
+                self.emitir(FIJAR_VALOR_ACTUAL)
+            else:
+                self.emitir_expresion(expr)
+                self.emitir(FIJAR_VALOR_ACTUAL)
+                self.emitir_descenso_expresion(expr)
+        elif tipo == "llamar":
+            self.emitir_descenso_expresion(sentencia[1])
+        else:
+            # Sentencias de bigrafos: delegan en el método del intérprete
+            self.emitir(METODO, tipo, sentencia[1:])
+
+    def emitir_si(self, sentencia):
+        _, condiciones, bloques = sentencia
+        # La condición de enterConditionalStatement siempre es None (ver
+        # CompiladorClausuras.compilar_si): solo se ejecuta el bloque 'sino'
+        if len(bloques) > 1:
+            self.emitir_ejecucion_bloque(bloques[1])
+
+        if condiciones:
+            self.emitir_descenso_expresion(condiciones[0])
+        if bloques:
+            self.emitir_recorrido_bloque(bloques[0])
+        for condicion in condiciones[1:]:
+            self.emitir_descenso_expresion(condicion)
+        for bloque in bloques[1:]:
+            self.emitir_recorrido_bloque(bloque)
+
+    def emitir_mientras(self, sentencia):
+        _, condicion, bloque = sentencia
+        if condicion is None:
+            self.emitir(
+                IMPRIMIR, "Error: Falta la condición en la declaración 'mientras'"
+            )
+        else:
+            # El contador de iteraciones vive en la pila durante el bucle
+            self.emitir(LITERAL, 0)
+            inicio = len(self.codigo)
+            self.emitir_expresion(condicion)
+            salida_condicion = self.emitir(SALTAR_SI_FALSO, None)
+            salida_limite = self.emitir(
+                SALTAR_SI_LIMITE, None, MAX_ITERACIONES_MIENTRAS
+            )
+            self.emitir_ejecucion_bloque(bloque)
+            self.emitir(INCREMENTAR)
+            self.emitir(SALTAR, inicio)
+            fin = self.emitir(FIN_MIENTRAS, MAX_ITERACIONES_MIENTRAS)
+            self.parchear(salida_condicion, SALTAR_SI_FALSO, fin)
+            self.parchear(
+                salida_limite, SALTAR_SI_LIMITE, fin, MAX_ITERACIONES_MIENTRAS
+            )
+
+        self.emitir_descenso_expresion(condicion)
+        self.emitir_recorrido_bloque(bloque)
+
+    def emitir_descenso_expresion(self, expr):
+        # ParseTreeWalker vuelve a evaluar cada functionCall en enterFunctionCall
+        for llamada in llamadas_en_preorden(expr):
+            self.emitir_expresion(llamada)
+            self.emitir(FIJAR_VALOR_ACTUAL)
+
+    # Expresiones
+
+    def emitir_expresion(self, expr):
+        tipo = expr[0]
+        if tipo == "literal":
+            self.emitir(LITERAL, expr[1])
+        elif tipo == "variable":
+            nombre_var = expr[1]
+            self.emitir(
+                CARGAR,
+                nombre_var,
+                f"Error: Variable o constante '{nombre_var}' no está definida",
+            )
+        elif tipo == "binaria":
+            _, op, izq, der = expr
+            self.emitir_expresion(izq)
+            self.emitir_expresion(der)
+            if op in DIVISIONES:
+                operacion, mensaje = DIVISIONES[op]
+                self.emitir(DIVISION, operacion, mensaje)
+            else:
+                self.emitir(BINARIA, OPERACIONES.get(op, _sin_operacion))
+        elif tipo == "llamada":
+            self.emitir_llamada(expr)
+        else:
+            raise ValueError(f"Expresión desconocida: {tipo}")
+
+    def emitir_llamada(self, expr):
+        _, nombre_funcion, args = expr
+        mensaje = f"Error: Fallo en la evaluación del argumento en la llamada a la función '{nombre_funcion}'"
+        comprobaciones = []
+        for i, arg in enumerate(args):
+            self.emitir_expresion(arg)
+            comprobaciones.append(self.emitir(ARGUMENTO, i, None, mensaje))
+        self.emitir(LLAMAR, nombre_funcion, len(args))
+        fin = len(self.codigo)
+        for i, posicion in enumerate(comprobaciones):
+            self.parchear(posicion, ARGUMENTO, i, fin, mensaje)
+
+
+def desensamblar(codigo):
+    lineas = []
+    for posicion, instruccion in enumerate(codigo):
+        args = ", ".join(
+            getattr(arg, "__name__", None) or repr(arg) for arg in instruccion[1:]
+        )
+        lineas.append(f"{posicion:05d} {NOMBRES_OPERACIONES[instruccion[0]]} {args}")
+    return "\n".join(lineas)
+
+
+class MaquinaVirtual:
+    def __init__(self, interprete):
+        self.interprete = interprete
+        self.max_profundidad = sys.getrecursionlimit()
+
+    def ejecutar(self, codigo):
+        it = self.interprete
+        control = it.control
+        pila = []
+        # Retornos de subrutinas de bloques y de funciones de usuario (las
+        # variables de cada llamada se guardan en DreamchaserInterpreter.marcos)
+        retornos = []
+        marcos = []
+        # Manejadores de errores por sentencia:
+        # (destino, código, pila, retornos, marcos)
+        manejadores = []
+        pc = 0
+
+        while True:
+            try:
+                while True:
+                    instruccion = codigo[pc]
+                    pc += 1
+                    op = instruccion[0]
+
+                    if op == LITERAL:
+                        pila.append(instruccion[1])
+                    elif op == CARGAR:
+                        nombre_var = instruccion[1]
+                        variables = it.variables
+                        if nombre_var in variables:
+                            pila.append(variables[nombre_var])
+                        elif nombre_var in it.constants:
+                            pila.append(it.constants[nombre_var])
+                        else:
+                            it.salida.error(instruccion[2])
+                            pila.append(None)
+                    elif op == BINARIA:
+                        b = pila.pop()
+                        a = pila[-1]
+                        if a is None or b is None:
+                            pila[-1] = None
+                        else:
+                            pila[-1] = instruccion[1](a, b)
+                    elif op == ASIGNAR:
+                        valor = pila.pop()
+                        nombre_id = instruccion[1]
+                        if nombre_id in it.constants:
+                            it.salida.error(
+                                f"Error: No se puede asignar a la constante '{nombre_id}'"
+                            )
+                        else:
+                            variables = it.variables
+                            # Dentro de una llamada se guarda el valor anterior
+                            if marcos:
+                                marco = it.marcos[-1]
+                                if nombre_id not in marco:
+                                    marco[nombre_id] = variables.get(
+                                        nombre_id, SIN_VALOR
+                                    )
+                            variables[nombre_id] = valor
+                    elif op == INTENTAR:
+                        manejadores.append(
+                            (
+                                instruccion[1],
+                                codigo,
+                                len(pila),
+                                len(retornos),
+                                len(marcos),
+                            )
+                        )
+                    elif op == FIN_INTENTO:
+                        manejadores.pop()
+                    elif op == COMPROBAR_RETORNO:
+                        # Si encontramos una declaración de retorno, salir
+                        valor_actual = it.valor_actual
+                        if valor_actual is not None and valor_actual != pila[-1]:
+                            pc = instruccion[1]
+                    elif op == SALTAR:
+                        pc = instruccion[1]
+                    elif op == SALTAR_SI_FALSO:
+                        if not pila.pop():
+                            pc = instruccion[1]
+                    elif op == SALTAR_SI_LIMITE:
+                        if pila[-1] >= instruccion[2]:
+                            pc = instruccion[1]
+                    elif op == INCREMENTAR:
+                        pila[-1] += 1
+                    elif op == LLAMAR_SUBRUTINA:
+                        retornos.append(pc)
+                        pc = instruccion[1]
+                    elif op == RETORNO_SUBRUTINA:
+                        pc = retornos.pop()
+                    elif op == INICIO_BLOQUE:
+                        pila.append(it.valor_actual)
+                    elif op == FIN_BLOQUE:
+                        pila.pop()
+                    elif op == DIVISION:
+                        b = pila.pop()
+                        a = pila[-1]
+                        if a is None or b is None:
+                            pila[-1] = None
+                        elif b == 0:
+                            it.salida.error(instruccion[2])
+                            pila[-1] = None
+                        else:
+                            pila[-1] = instruccion[1](a, b)
+                    elif op == ARGUMENTO:
+                        if pila[-1] is None:
+                            del pila[len(pila) - instruccion[1] - 1 :]
+                            it.salida.error(instruccion[3])
+                            pila.append(None)
+                            pc = instruccion[2]
+                    elif op == LLAMAR:
+                        nombre_funcion = instruccion[1]
+                        cantidad = instruccion[2]
+                        if cantidad:
+                            args = pila[-cantidad:]
+                            del pila[-cantidad:]
+                        else:
+                            args = []
+
+                        if (
+                            nombre_funcion in it.librerias_importadas
+                            or nombre_funcion in it.librerias
+                        ):
+                            pila.append(it.llamar_libreria(nombre_funcion, args))
+                            continue
+
+                        definicion_funcion = it.functions.get(nombre_funcion)
+                        if definicion_funcion is None:
+                            it.salida.error(
+                                f"Error: La función '{nombre_funcion}' no está definida"
+                            )
+                            pila.append(None)
+                            continue
+
+                        params = definicion_funcion["params"]
+                        if cantidad != len(params):
+                            it.salida.error(
+                                f"Error: La función '{nombre_funcion}' espera {len(params)} argumentos, pero recibió {cantidad}"
+                            )
+                            pila.append(None)
+                            continue
+
+                        if len(marcos) >= self.max_profundidad:
+                            raise RecursionError("maximum recursion depth exceeded")
+
+                        bloque = definicion_funcion["block"]
+                        codigo_funcion = definicion_funcion["codigo"]
+                        clave = None
+                        if definicion_funcion["memo"] and it.memo is not None:
+                            clave = clave_memo((id(codigo_funcion), bloque), args)
+                            valor_final = it.memo.obtener(clave)
+                            if valor_final is not SIN_RESULTADO:
+                                resultado = valor_final
+                                if resultado is None:
+                                    resultado = it.valor_actual
+                                it.valor_actual = valor_final
+                                pila.append(resultado)
+                                continue
+
+                        marcos.append(
+                            (
+                                pc,
+                                codigo,
+                                it.valor_actual,
+                                clave,
+                                it.errores_capturados,
+                            )
+                        )
+                        it.abrir_marco(params, args)
+                        it.valor_actual = None
+                        # La función puede estar en el bytecode de otro
+                        # fragmento del programa (ejecución por partes)
+                        codigo = codigo_funcion
+                        pc = bloque
+                    elif op == RETORNAR_FUNCION:
+                        pc, codigo, valor_anterior, clave, errores = marcos.pop()
+                        resultado = it.valor_actual
+                        if resultado is None:
+                            resultado = valor_anterior
+                        # Una llamada en la que se atrapó un error no se guarda
+                        if clave is not None and it.errores_capturados == errores:
+                            it.memo.guardar(clave, it.valor_actual)
+                        it.cerrar_marco()
+                        pila.append(resultado)
+                    elif op == FIJAR_VALOR_ACTUAL:
+                        it.valor_actual = pila.pop()
+                    elif op == FIN_MIENTRAS:
+                        if pila.pop() >= instruccion[1]:
+                            it.salida.advertencia(
+                                "Advertencia: Se alcanzó el máximo de iteraciones del bucle, posible bucle infinito"
+                            )
+                    elif op == DEFINIR_FUNCION:
+                        it.definir_funcion(*instruccion[1:], codigo)
+                    elif op == CONSTANTE:
+                        it.definir_constante(instruccion[1], instruccion[2])
+                    elif op == IMPORTAR:
+                        nombre_libreria = instruccion[1]
+                        if nombre_libreria in it.librerias:
+                            it.librerias_importadas.add(nombre_libreria)
+                        else:
+                            it.salida.advertencia(
+                                f"Advertencia: Librería '{nombre_libreria}' no encontrada"
+                            )
+                    elif op == METODO:
+                        getattr(it, instruccion[1])(*instruccion[2])
+                    elif op == IMPRIMIR:
+                        it.salida.error(instruccion[1])
+                    elif op == LANZAR:
+                        raise instruccion[1]
+                    elif op == INICIO_PROGRAMA:
+                        it.valor_actual = None
+                    elif op == FIN:
+                        return
+                    elif op == CONTAR_SENTENCIA:
+                        control.contar()
+            except Exception as e:
+                # Sin manejador el error se propaga, igual que con ParseTreeWalker
+                if not manejadores:
+                    self.abandonar_marcos(marcos, 0)
+                    raise
+                pc, codigo, tam_pila, tam_retornos, tam_marcos = manejadores.pop()
+                it.errores_capturados += 1
+                del pila[tam_pila:]
+                del retornos[tam_retornos:]
+                self.abandonar_marcos(marcos, tam_marcos)
+                it.salida.error(f"Error al ejecutar la declaración: {str(e)}")
+
+    # Las llamadas interrumpidas por un error no restauran sus variables
+    def abandonar_marcos(self, marcos, tam_marcos):
+        while len(marcos) > tam_marcos:
+            marcos.pop()
+            self.interprete.abandonar_marco()
@@ -0,0 +1,188 @@
+from collections import OrderedDict
+
+# Memoización opcional de funciones de usuario puras para los motores
+# compilados.
+#
+# Una función es pura si su cuerpo solo lee sus parámetros, variables que ya
+# asignó antes en el mismo cuerpo y constantes; no usa imprimir, ni sentencias
+# de bigrafos, const, importar o funcion; y solo llama a potencia, raizCuadrada
+# u otras funciones puras. Con 'funcion pura' se marca explícitamente una
+# función como pura sin analizarla. Las llamadas que terminan en un error no se
+# guardan; los mensajes de diagnóstico (división por cero, límite de
+# iteraciones) solo se imprimen la primera vez que se evalúa la llamada.
+
+TAMANO_MEMO_PREDETERMINADO = 1024
+
+LIBRERIAS_PURAS = {"raizCuadrada", "potencia"}
+
+# Resultado de CacheMemo.obtener cuando la llamada no está guardada
+SIN_RESULTADO = object()
+
+
+class CacheMemo:
+    def __init__(self, tamano=TAMANO_MEMO_PREDETERMINADO):
+        self.tamano = tamano
+        self.entradas = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    def obtener(self, clave):
+        entradas = self.entradas
+        if clave in entradas:
+            entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entradas[clave]
+        self.fallos += 1
+        return SIN_RESULTADO
+
+    def guardar(self, clave, valor):
+        self.entradas[clave] = valor
+        if len(self.entradas) > self.tamano:
+            self.entradas.popitem(last=False)
+            self.desalojos += 1
+
+    def limpiar(self):
+        self.entradas.clear()
+
+
+# La función se identifica por su bloque compilado (id de las clausuras o
+# dirección del bytecode). El tipo de cada argumento forma parte de la clave:
+# 1, 1.0 y verdadero son iguales en Python
+def clave_memo(bloque, args):
+    return (bloque,) + tuple((type(valor), valor) for valor in args)
+
+
+def funciones_memoizables(programa):
+    definiciones = {}
+    constantes = set()
+    asignadas = set()
+
+    def recolectar(bloque):
+        for sentencia in bloque or []:
+            tipo = sentencia[0]
+            if tipo == "const":
+                constantes.add(sentencia[1])
+            elif tipo == "asignar":
+                asignadas.add(sentencia[1])
+            elif tipo in ("buscar_nodos", "buscar_padre", "buscar_ocurrencias"):
+                asignadas.add(sentencia[-1])
+            elif tipo == "funcion":
+                definiciones.setdefault(sentencia[1], []).append(sentencia)
+                asignadas.update(sentencia[2])
+                recolectar(sentencia[3])
+            elif tipo == "mientras":
+                recolectar(sentencia[2])
+            elif tipo == "si":
+                for bloque_si in sentencia[2]:
+                    recolectar(bloque_si)
+
+    recolectar(programa)
+    # Una constante que también se usa como variable puede quedar oculta
+    constantes_seguras = constantes - asignadas
+
+    llamadas = {}
+    for nombre, sentencias in definiciones.items():
+        llamadas[nombre] = set()
+        for _, _, params, bloque, pura in sentencias:
+            if pura:
+                continue
+            llamadas_cuerpo = _analizar_cuerpo(params, bloque, constantes)
+            if llamadas_cuerpo is None:
+                llamadas[nombre] = None
+                break
+            llamadas[nombre] |= llamadas_cuerpo
+
+    # Quitar las funciones que llaman a funciones impuras o inexistentes hasta
+    # llegar a un punto fijo (la recursión no impide que sea pura)
+    puras = {
+        nombre for nombre, llamadas_f in llamadas.items() if llamadas_f is not None
+    }
+    cambio = True
+    while cambio:
+        cambio = False
+        for nombre in list(puras):
+            if not llamadas[nombre] <= puras:
+                puras.discard(nombre)
+                cambio = True
+    return {
+        nombre
+        for nombre in puras
+        if all(
+            _lecturas_seguras(sentencia, constantes_seguras)
+            for sentencia in definiciones[nombre]
+        )
+    }
+
+
+def _lecturas_seguras(sentencia, constantes_seguras):
+    _, _, params, bloque, pura = sentencia
+    return pura or _analizar_cuerpo(params, bloque, constantes_seguras) is not None
+
+
+# Devuelve los nombres de las funciones de usuario que llama el cuerpo, o None
+# si el cuerpo no es puro
+def _analizar_cuerpo(params, bloque, constantes):
+    llamadas = set()
+
+    def expresion_pura(expr, definidas):
+        tipo = expr[0]
+        if tipo == "literal":
+            return True
+        elif tipo == "variable":
+            return expr[1] in definidas or expr[1] in constantes
+        elif tipo == "binaria":
+            return expresion_pura(expr[2], definidas) and expresion_pura(
+                expr[3], definidas
+            )
+        elif tipo == "llamada":
+            nombre = expr[1]
+            if nombre == "imprimir":
+                return False
+            if nombre not in LIBRERIAS_PURAS:
+                llamadas.add(nombre)
+            return all(expresion_pura(arg, definidas) for arg in expr[2])
+        return False
+
+    def bloque_puro(bloque, definidas, nivel_superior):
+        if bloque is None:
+            return False
+        definidas = set(definidas)
+        for sentencia in bloque:
+            tipo = sentencia[0]
+            if tipo == "comentario":
+                continue
+            elif tipo == "asignar":
+                _, nombre_id, expr = sentencia
+                if expr is None or nombre_id in constantes:
+                    return False
+                if not expresion_pura(expr, definidas):
+                    return False
+                # Solo cuenta como definida si se asigna siempre
+                if nivel_superior:
+                    definidas.add(nombre_id)
+            elif tipo == "retornar":
+                if sentencia[1] is None or not expresion_pura(sentencia[1], definidas):
+                    return False
+            elif tipo == "llamar":
+                if not expresion_pura(sentencia[1], definidas):
+                    return False
+            elif tipo == "si":
+                _, condiciones, bloques = sentencia
+                if not all(expresion_pura(c, definidas) for c in condiciones):
+                    return False
+                if not all(bloque_puro(b, definidas, False) for b in bloques):
+                    return False
+            elif tipo == "mientras":
+                _, condicion, bloque_mientras = sentencia
+                if condicion is None or not expresion_pura(condicion, definidas):
+                    return False
+                if not bloque_puro(bloque_mientras, definidas, False):
+                    return False
+            else:
+                return False
+        return True
+
+    if not bloque_puro(bloque, set(params), True):
+        return None
+    return llamadas
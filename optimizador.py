@@ -0,0 +1,265 @@
+from compilador import OPERACIONES, DIVISIONES
+
+# Pasada de optimización sobre la RI de compilador.py, antes de ejecutarla.
+#
+# Los literales ya llegan decodificados desde traducir_programa; aquí se
+# pliegan las subexpresiones constantes, incluidas las referencias a nombres
+# declarados con 'const' cuando su valor es seguro en tiempo de compilación.
+
+
+class Optimizador:
+    def __init__(self):
+        self.nodos_plegados = 0
+        self.constantes = {}
+
+    def optimizar(self, programa):
+        plegables = self.constantes_plegables(programa)
+        self.constantes = {}
+        resultado = []
+        for sentencia in programa:
+            resultado.append(self.optimizar_sentencia(sentencia))
+            # La constante solo se pliega en las sentencias que vienen después
+            # de su declaración
+            if sentencia[0] == "const" and sentencia[1] in plegables:
+                self.constantes[sentencia[1]] = sentencia[2][1]
+        return resultado
+
+    # Una constante se puede plegar si se declara una sola vez, en el nivel
+    # superior del programa, y su nombre nunca se usa como variable o
+    # parámetro (las variables tienen prioridad sobre las constantes)
+    def constantes_plegables(self, programa):
+        declaraciones = {}
+        anidadas = set()
+        variables = set()
+
+        def revisar(bloque, nivel_superior):
+            for sentencia in bloque or []:
+                tipo = sentencia[0]
+                if tipo == "const":
+                    declaraciones[sentencia[1]] = declaraciones.get(sentencia[1], 0) + 1
+                    if not nivel_superior or sentencia[2] is None:
+                        anidadas.add(sentencia[1])
+                elif tipo == "asignar":
+                    variables.add(sentencia[1])
+                elif tipo in ("buscar_nodos", "buscar_padre", "buscar_ocurrencias"):
+                    variables.add(sentencia[-1])
+                elif tipo == "funcion":
+                    variables.update(sentencia[2])
+                    revisar(sentencia[3], False)
+                elif tipo == "mientras":
+                    revisar(sentencia[2], False)
+                elif tipo == "si":
+                    for bloque_si in sentencia[2]:
+                        revisar(bloque_si, False)
+
+        revisar(programa, True)
+        return {
+            nombre
+            for nombre, cantidad in declaraciones.items()
+            if cantidad == 1 and nombre not in anidadas and nombre not in variables
+        }
+
+    def optimizar_bloque(self, bloque):
+        if bloque is None:
+            return None
+        return [self.optimizar_sentencia(sentencia) for sentencia in bloque]
+
+    def optimizar_sentencia(self, sentencia):
+        tipo = sentencia[0]
+        if tipo in ("asignar", "retornar"):
+            expr = sentencia[-1]
+            if expr is None:
+                return sentencia
+            return sentencia[:-1] + (self.optimizar_expresion(expr),)
+        elif tipo == "si":
+            # El listener nunca evalúa la condición del si (siempre ejecuta el
+            # 'sino' y luego recorre ambos bloques), así que una condición
+            # constante se reduce a un literal pero no permite descartar bloques
+            _, condiciones, bloques = sentencia
+            return (
+                "si",
+                [self.optimizar_expresion(condicion) for condicion in condiciones],
+                [self.optimizar_bloque(bloque) for bloque in bloques],
+            )
+        elif tipo == "mientras":
+            _, condicion, bloque = sentencia
+            if condicion is not None:
+                condicion = self.optimizar_expresion(condicion)
+            return ("mientras", condicion, self.optimizar_bloque(bloque))
+        elif tipo == "funcion":
+            return (
+                sentencia[:3] + (self.optimizar_bloque(sentencia[3]),) + sentencia[4:]
+            )
+        elif tipo == "llamar":
+            return ("llamar", self.optimizar_expresion(sentencia[1]))
+        return sentencia
+
+    def optimizar_expresion(self, expr):
+        tipo = expr[0]
+        if tipo == "variable":
+            if expr[1] in self.constantes:
+                self.nodos_plegados += 1
+                return ("literal", self.constantes[expr[1]])
+            return expr
+        elif tipo == "binaria":
+            _, op, izq, der = expr
+            izq = self.optimizar_expresion(izq)
+            der = self.optimizar_expresion(der)
+            if izq[0] == "literal" and der[0] == "literal":
+                plegado = self.plegar_binaria(op, izq[1], der[1])
+                if plegado is not None:
+                    self.nodos_plegados += 1
+                    return plegado
+            return ("binaria", op, izq, der)
+        elif tipo == "llamada":
+            _, nombre_funcion, args = expr
+            return (
+                "llamada",
+                nombre_funcion,
+                [self.optimizar_expresion(arg) for arg in args],
+            )
+        return expr
+
+    def plegar_binaria(self, op, a, b):
+        # Devuelve el literal resultante, o None si la operación debe quedarse
+        # para tiempo de ejecución (mensajes de error, excepciones)
+        if a is None or b is None:
+            return ("literal", None)
+        if op in DIVISIONES:
+            if b == 0:
+                return None
+            operacion = DIVISIONES[op][0]
+        elif op in OPERACIONES:
+            operacion = OPERACIONES[op]
+        else:
+            return ("literal", None)
+        # Evitar construir cadenas enormes en tiempo de compilación
+        if op == "*" and (isinstance(a, str) or isinstance(b, str)):
+            return None
+        try:
+            return ("literal", operacion(a, b))
+        except Exception:
+            return None
+
+
+def optimizar_programa(programa):
+    optimizador = Optimizador()
+    return optimizador.optimizar(programa), optimizador.nodos_plegados
+
+
+# Volcado legible de la RI, con una sintaxis parecida a la de Dreamchaser
+
+
+def volcar_programa(programa):
+    lineas = []
+    _volcar_bloque(programa, 0, lineas)
+    return "\n".join(lineas)
+
+
+def _volcar_bloque(bloque, nivel, lineas):
+    if bloque is None:
+        lineas.append(" " * nivel + "<falta el bloque>")
+        return
+    for sentencia in bloque:
+        _volcar_sentencia(sentencia, nivel, lineas)
+
+
+def _volcar_sentencia(sentencia, nivel, lineas):
+    sangria = " " * nivel
+    tipo = sentencia[0]
+    if tipo == "comentario":
+        lineas.append(sangria + "#")
+    elif tipo == "error":
+        lineas.append(sangria + f"<error: {sentencia[1]}>")
+    elif tipo == "importar":
+        lineas.append(sangria + f"importar {volcar_valor(sentencia[1])}")
+    elif tipo == "const":
+        valor = volcar_expresion(sentencia[2]) if sentencia[2] else "<falta>"
+        lineas.append(sangria + f"const {sentencia[1]} {valor}")
+    elif tipo == "asignar":
+        valor = volcar_expresion(sentencia[2]) if sentencia[2] else "<falta>"
+        lineas.append(sangria + f"{sentencia[1]} = {valor}")
+    elif tipo == "si":
+        _, condiciones, bloques = sentencia
+        condicion = volcar_expresion(condiciones[0]) if condiciones else "<falta>"
+        lineas.append(sangria + f"si {condicion}")
+        if bloques:
+            _volcar_bloque(bloques[0], nivel + 1, lineas)
+        if len(bloques) > 1:
+            lineas.append(
+                sangria
+                + " ".join(["sino"] + [volcar_expresion(c) for c in condiciones[1:]])
+            )
+            _volcar_bloque(bloques[1], nivel + 1, lineas)
+    elif tipo == "mientras":
+        condicion = volcar_expresion(sentencia[1]) if sentencia[1] else "<falta>"
+        lineas.append(sangria + f"mientras {condicion}")
+        _volcar_bloque(sentencia[2], nivel + 1, lineas)
+    elif tipo == "funcion":
+        pura = "pura " if sentencia[4] else ""
+        lineas.append(
+            sangria + f"funcion {pura}{sentencia[1]}({', '.join(sentencia[2])})"
+        )
+        _volcar_bloque(sentencia[3], nivel + 1, lineas)
+    elif tipo == "retornar":
+        valor = volcar_expresion(sentencia[1]) if sentencia[1] else "<falta>"
+        lineas.append(sangria + f"retornar {valor}")
+    elif tipo == "llamar":
+        lineas.append(sangria + volcar_expresion(sentencia[1]))
+    elif tipo == "crear_nodo":
+        _, id_nodo, tipo_nodo, valor = sentencia
+        lineas.append(
+            sangria
+            + f"crear_nodo {id_nodo}({volcar_valor(tipo_nodo)}, {volcar_valor(valor)})"
+        )
+    elif tipo == "buscar_nodos":
+        _, tipo_nodo, valor, nombre_id = sentencia
+        filtro = "*" if tipo_nodo is None else volcar_valor(tipo_nodo)
+        if valor is not None:
+            filtro += f", {volcar_valor(valor)}"
+        lineas.append(sangria + f"buscar_nodos {filtro} en {nombre_id}")
+    elif tipo in ("agregar_lugar", "agregar_enlace", "contiene"):
+        lineas.append(sangria + f"{tipo} {sentencia[1]}, {sentencia[2]}")
+    elif tipo == "cargar_bigrafo":
+        _, id_bigrafo, ruta_nodos, ruta_aristas = sentencia
+        rutas = volcar_valor(ruta_nodos)
+        if ruta_aristas is not None:
+            rutas += f", {volcar_valor(ruta_aristas)}"
+        lineas.append(sangria + f"cargar_bigrafo {id_bigrafo} desde {rutas}")
+    elif tipo == "reducir":
+        lineas.append(sangria + f"reducir {', '.join(sentencia[1:])}")
+    elif tipo == "guardar_bigrafo":
+        _, id_bigrafo, ruta = sentencia
+        lineas.append(sangria + f"guardar_bigrafo {id_bigrafo} en {volcar_valor(ruta)}")
+    elif tipo == "abrir_bigrafo":
+        _, ruta, id_bigrafo = sentencia
+        lineas.append(sangria + f"abrir_bigrafo {volcar_valor(ruta)} en {id_bigrafo}")
+    else:
+        ids = sentencia[1:]
+        if len(ids) == 3:
+            lineas.append(sangria + f"{tipo} {ids[0]}, {ids[1]} en {ids[2]}")
+        else:
+            lineas.append(sangria + f"{tipo} {' en '.join(ids)}")
+
+
+def volcar_expresion(expr):
+    tipo = expr[0]
+    if tipo == "literal":
+        return volcar_valor(expr[1])
+    elif tipo == "variable":
+        return expr[1]
+    elif tipo == "binaria":
+        return f"({volcar_expresion(expr[2])} {expr[1]} {volcar_expresion(expr[3])})"
+    elif tipo == "llamada":
+        return f"{expr[1]}({', '.join(volcar_expresion(arg) for arg in expr[2])})"
+    return f"<{tipo}>"
+
+
+def volcar_valor(valor):
+    if valor is None:
+        return "<nulo>"
+    if isinstance(valor, bool):
+        return "verdadero" if valor else "falso"
+    if isinstance(valor, str):
+        return f"'{valor}'"
+    return str(valor)
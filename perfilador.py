@@ -0,0 +1,178 @@
+import importlib
+import sys
+import time
+
+# Perfilador de programas Dreamchaser.
+#
+# Con DreamchaserInterpreter(perfil=Perfil()) el motor de clausuras envuelve
+# cada sentencia, cada llamada a una función del programa o de una librería y
+# cada operación de bigrafos (crear_nodo, unir_bigrafos, ...) con
+# Perfil.envolver, que mide su tiempo. Sin perfil no se envuelve nada, así
+# que ejecutar sin perfilar no cuesta nada extra.
+#
+# Cada medición es un marco en una pila. Por cada clave (clase, nombre), con
+# clase "linea", "funcion", "libreria" o "bigrafo", se guardan:
+# - llamadas: cuántas veces se ejecutó
+# - inclusivo: tiempo desde que entra hasta que sale, contando lo que se
+#   ejecuta dentro. En las llamadas recursivas solo cuenta la de más afuera,
+#   para no sumar el mismo tiempo más de una vez
+# - propio: tiempo inclusivo menos el de los marcos de adentro
+# Además se cuentan las iteraciones de cada mientras (por línea) y el tiempo
+# propio de cada camino de la pila, que pilas_colapsadas escribe en el
+# formato de pilas colapsadas de flamegraph.pl ("a;b;c microsegundos").
+#
+# Los tiempos se miden en nanosegundos con time.perf_counter_ns e incluyen
+# lo que cuesta medir.
+#
+# Los módulos que el intérprete importa recién cuando se usan (bigrafo, que
+# trae NumPy) se importan con importar antes de medir; si no, la primera
+# sentencia que los usa se llevaría el tiempo de la importación. Ese tiempo
+# se informa aparte y no cuenta en el tiempo medido.
+
+CLASES = {
+    "linea": "Líneas",
+    "funcion": "Funciones",
+    "libreria": "Librerías",
+    "bigrafo": "Operaciones de bigrafos",
+}
+FILAS_REPORTE = 30  # filas por sección del reporte
+
+
+class Perfil:
+    def __init__(self):
+        self.estadisticas = {}  # (clase, nombre) -> [llamadas, inclusivo, propio]
+        self.iteraciones = {}  # línea de un mientras -> [ejecuciones, iteraciones]
+        self.caminos = {}  # camino de la pila -> tiempo propio
+        self.pila = []  # [clave, inicio, tiempo de los marcos de adentro, camino]
+        self.activas = {}  # clave -> llamadas en curso
+        self.importacion = 0  # tiempo de importar, fuera de lo medido
+
+    # Importa los módulos que todavía no se importaron y suma el tiempo aparte
+    def importar(self, modulos):
+        pendientes = [modulo for modulo in modulos if modulo not in sys.modules]
+        if not pendientes:
+            return
+        inicio = time.perf_counter_ns()
+        for modulo in pendientes:
+            importlib.import_module(modulo)
+        self.importacion += time.perf_counter_ns() - inicio
+
+    # Devuelve funcion envuelta para medirla con la clave (clase, nombre)
+    def envolver(self, clase, nombre, funcion):
+        clave = (clase, nombre)
+        entrar = self.entrar
+        salir = self.salir
+
+        def medida(*args):
+            entrar(clave)
+            try:
+                return funcion(*args)
+            finally:
+                salir()
+
+        return medida
+
+    def entrar(self, clave):
+        pila = self.pila
+        marco = f"{clave[0]} {clave[1]}"
+        camino = f"{pila[-1][3]};{marco}" if pila else marco
+        self.activas[clave] = self.activas.get(clave, 0) + 1
+        pila.append([clave, time.perf_counter_ns(), 0, camino])
+
+    def salir(self):
+        fin = time.perf_counter_ns()
+        clave, inicio, adentro, camino = self.pila.pop()
+        total = fin - inicio
+        propio = total - adentro
+        estadistica = self.estadisticas.get(clave)
+        if estadistica is None:
+            estadistica = self.estadisticas[clave] = [0, 0, 0]
+        estadistica[0] += 1
+        estadistica[2] += propio
+        activas = self.activas[clave] - 1
+        self.activas[clave] = activas
+        if not activas:
+            estadistica[1] += total
+        if self.pila:
+            self.pila[-1][2] += total
+        self.caminos[camino] = self.caminos.get(camino, 0) + propio
+
+    # Suma las iteraciones de un mientras que terminó a la línea que se está
+    # ejecutando, que es la del mientras
+    def contar_iteraciones(self, iteraciones):
+        for clave, *_ in reversed(self.pila):
+            if clave[0] == "linea":
+                contador = self.iteraciones.setdefault(clave[1], [0, 0])
+                contador[0] += 1
+                contador[1] += iteraciones
+                return
+
+    # Tiempo propio de todos los marcos: el tiempo medido de la ejecución
+    def total(self):
+        return sum(estadistica[2] for estadistica in self.estadisticas.values())
+
+    # Reporte de texto: por cada clase, las claves ordenadas por tiempo
+    # propio (las primeras filas), y las iteraciones de los mientras. Con el
+    # texto del programa se muestra cada línea
+    def reporte(self, texto_programa=None, filas=FILAS_REPORTE):
+        lineas_programa = texto_programa.splitlines() if texto_programa else []
+        total = self.total()
+        partes = [f"Tiempo medido: {total / 1e6:,.3f} ms"]
+        if self.importacion:
+            partes.append(
+                f"Importación de módulos (antes de medir, no cuenta): "
+                f"{self.importacion / 1e6:,.3f} ms"
+            )
+        for clase, titulo in CLASES.items():
+            filas_clase = sorted(
+                (
+                    (nombre, estadistica)
+                    for (clase_clave, nombre), estadistica in self.estadisticas.items()
+                    if clase_clave == clase
+                ),
+                key=lambda fila: fila[1][2],
+                reverse=True,
+            )
+            if not filas_clase:
+                continue
+            encabezado = "línea" if clase == "linea" else "nombre"
+            partes.append(
+                f"\n{titulo} (por tiempo propio):\n"
+                f"  {encabezado:<24}{'llamadas':>12}{'inclusivo ms':>14}"
+                f"{'propio ms':>12}{'%':>7}"
+            )
+            for nombre, (llamadas, inclusivo, propio) in filas_clase[:filas]:
+                porcentaje = 100 * propio / total if total else 0.0
+                fila = (
+                    f"  {str(nombre):<24}{llamadas:>12,}{inclusivo / 1e6:>14,.3f}"
+                    f"{propio / 1e6:>12,.3f}{porcentaje:>7.1f}"
+                )
+                if clase == "linea" and 0 < nombre <= len(lineas_programa):
+                    fila += f"  {lineas_programa[nombre - 1].strip()}"
+                partes.append(fila)
+            if len(filas_clase) > filas:
+                partes.append(f"  ... {len(filas_clase) - filas:,} más")
+        if self.iteraciones:
+            partes.append("\nIteraciones de mientras:")
+            for linea, (ejecuciones, iteraciones) in sorted(
+                self.iteraciones.items(), key=lambda item: item[1][1], reverse=True
+            )[:filas]:
+                veces = "vez" if ejecuciones == 1 else "veces"
+                partes.append(
+                    f"  línea {linea}: {iteraciones:,} iteraciones, ejecutado "
+                    f"{ejecuciones:,} {veces}"
+                )
+        return "\n".join(partes) + "\n"
+
+    # Pilas colapsadas para flamegraph.pl o speedscope: una línea por camino
+    # con su tiempo propio en microsegundos
+    def pilas_colapsadas(self):
+        return "".join(
+            f"{camino} {propio // 1000}\n"
+            for camino, propio in self.caminos.items()
+            if propio >= 1000
+        )
+
+    def guardar_pilas(self, ruta):
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            archivo.write(self.pilas_colapsadas())
@@ -0,0 +1,335 @@
+import numpy as np
+from bigrafo import SIN_TIPO, _pertenecen, _separar, _sin_repetir
+
+# Reacciones sobre bigrafos.
+#
+# Una reacción tiene dos bigrafos: el redex (el patrón que se busca) y el
+# reactum (con qué se reemplaza). Una ocurrencia del redex en un bigrafo
+# anfitrión asigna a cada nodo del redex un nodo distinto del anfitrión con el
+# mismo tipo y el mismo valor, de modo que cada lugar y cada enlace del redex
+# también está en el anfitrión entre los nodos asignados. El anfitrión puede
+# tener más aristas; un tipo o un valor COMODIN en el redex acepta cualquiera.
+#
+# Aplicar una ocurrencia:
+# - borra los nodos del redex cuyo id no está en el reactum, con sus aristas
+# - quita las aristas del redex entre los nodos asignados
+# - agrega los nodos del reactum cuyo id no está en el redex, con ids nuevos
+# - agrega las aristas del reactum (de los lugares, los que dejan un bosque,
+#   ver Bigrafo.agregar_lugares)
+# A los nodos que están en los dos se les cambia el tipo o el valor si el
+# reactum lo cambia (un COMODIN en el reactum los deja como están).
+#
+# La búsqueda es un backtracking sobre los nodos del redex. Antes de empezar
+# se calculan con NumPy los candidatos de cada nodo (el índice por tipo y por
+# valor del anfitrión, y los grados de entrada y de salida de lugares y
+# enlaces, que no pueden ser menores que los del redex), y los nodos se
+# ordenan para buscar primero el que tiene menos candidatos y después los que
+# están unidos a nodos ya asignados: sus candidatos salen de los vecinos del
+# nodo asignado en vez de todo el anfitrión.
+
+COMODIN = "*"
+CLASES = ("lugares", "enlaces")
+MAX_RONDAS = 1000  # Rondas de reducir antes de abandonar
+
+
+class Reaccion:
+    def __init__(self, redex, reactum):
+        # Copias, para que cambiar los bigrafos no cambie la reacción
+        self.redex = redex.clonar()
+        self.reactum = reactum.clonar()
+        self.creados = 0  # Para los ids de los nodos nuevos
+
+    def ocurrencias(self, anfitrion):
+        return ocurrencias(self.redex, anfitrion)
+
+    # Devuelve (bigrafo, aplicadas): el resultado de aplicar la primera
+    # ocurrencia, o todas las que se pueden aplicar a la vez si todas=True
+    def aplicar(self, anfitrion, todas=False):
+        elegidas = []
+        usados = set()
+        for ocurrencia in self.ocurrencias(anfitrion):
+            if usados.isdisjoint(ocurrencia):
+                elegidas.append(ocurrencia)
+                usados.update(ocurrencia)
+                if not todas:
+                    break
+        if not elegidas:
+            return anfitrion, 0
+        return self._reescribir(anfitrion, elegidas), len(elegidas)
+
+    # Aplica las ocurrencias, que no comparten nodos: el resultado es el mismo
+    # que aplicarlas de a una
+    def _reescribir(self, anfitrion, elegidas):
+        redex, reactum = self.redex, self.reactum
+        ids_redex = list(redex.ids)
+        ids_reactum = list(reactum.ids)
+        asignados = np.array(elegidas, dtype=np.int64)
+
+        vivos = np.ones(len(anfitrion.ids), dtype=bool)
+        borrados = [i for i, id in enumerate(ids_redex) if id not in reactum.nodos]
+        vivos[asignados[:, borrados].ravel()] = False
+        aristas = []
+        for nombre in CLASES:
+            origenes, destinos = _separar(_sin_repetir(getattr(redex, nombre).claves()))
+            quitadas = (asignados[:, origenes] << 32) | asignados[:, destinos]
+            propias = getattr(anfitrion, nombre).claves()
+            propios_origenes, propios_destinos = _separar(propias)
+            conservadas = (
+                vivos[propios_origenes]
+                & vivos[propios_destinos]
+                & ~_pertenecen(propias, quitadas.ravel())
+            )
+            aristas.append(propias[conservadas])
+        nuevo = anfitrion._subgrafo(np.flatnonzero(vivos), *aristas)
+
+        # Id en el resultado de cada nodo del reactum, por ocurrencia
+        ids_anfitrion = anfitrion.ids
+        nuevos = [j for j, id in enumerate(ids_reactum) if id not in redex.nodos]
+        ids_nuevos, tipos_nuevos, valores_nuevos = [], [], []
+        correspondencias = []
+        for ocurrencia in elegidas:
+            correspondencia = {}
+            for i, id in enumerate(ids_redex):
+                if id in reactum.nodos:
+                    correspondencia[reactum.indices[id]] = ids_anfitrion[ocurrencia[i]]
+            for j in nuevos:
+                correspondencia[j] = self._id_nuevo(nuevo, ids_reactum[j])
+                ids_nuevos.append(correspondencia[j])
+                tipos_nuevos.append(_sin_comodin(reactum.tipo(reactum.tipos[j])))
+                valores_nuevos.append(_sin_comodin(reactum.valores[j]))
+            correspondencias.append(correspondencia)
+        nuevo.agregar_nodos(ids_nuevos, tipos_nuevos, valores_nuevos)
+
+        for i, id in enumerate(ids_redex):
+            j = reactum.indices.get(id)
+            if j is None:
+                continue
+            tipo = reactum.tipo(reactum.tipos[j])
+            valor = reactum.valores[j]
+            cambia_tipo = tipo != COMODIN and tipo != redex.tipo(redex.tipos[i])
+            cambia_valor = valor != COMODIN and valor != redex.valores[i]
+            if cambia_tipo or cambia_valor:
+                for ocurrencia in elegidas:
+                    nodo = nuevo.nodos[ids_anfitrion[ocurrencia[i]]]
+                    nuevo.cambiar_nodo(
+                        nodo.id,
+                        tipo if cambia_tipo else nodo.tipo,
+                        valor if cambia_valor else nodo.valor,
+                    )
+
+        for nombre in CLASES:
+            origenes, destinos = _separar(getattr(reactum, nombre).claves())
+            ids_origenes, ids_destinos = [], []
+            for correspondencia in correspondencias:
+                ids_origenes.extend(correspondencia[j] for j in origenes.tolist())
+                ids_destinos.extend(correspondencia[j] for j in destinos.tolist())
+            getattr(nuevo, f"agregar_{nombre}")(ids_origenes, ids_destinos)
+        return nuevo
+
+    def _id_nuevo(self, bigrafo, base):
+        while True:
+            self.creados += 1
+            id = f"{base}_{self.creados}"
+            if id not in bigrafo.nodos:
+                return id
+
+
+def _sin_comodin(valor):
+    return None if valor == COMODIN else valor
+
+
+# Aplica las reacciones en orden, cada una a todas las ocurrencias que no se
+# solapan, hasta que ninguna tenga ocurrencias o se llegue a max_rondas.
+# Devuelve (bigrafo, aplicadas, rondas, punto_fijo)
+def reducir(anfitrion, reacciones, max_rondas=MAX_RONDAS):
+    total = 0
+    for ronda in range(1, max_rondas + 1):
+        aplicadas_ronda = 0
+        for reaccion in reacciones:
+            anfitrion, aplicadas = reaccion.aplicar(anfitrion, todas=True)
+            aplicadas_ronda += aplicadas
+        total += aplicadas_ronda
+        if not aplicadas_ronda:
+            return anfitrion, total, ronda, True
+    return anfitrion, total, max_rondas, False
+
+
+# Datos del anfitrión que usa la búsqueda, calculados una vez por búsqueda
+class _Anfitrion:
+    def __init__(self, bigrafo):
+        self.bigrafo = bigrafo
+        cantidad_nodos = len(bigrafo.ids)
+        self.salientes = {}
+        self.entrantes = {}
+        self.aristas = {}
+        self.grados = {}
+        for nombre in CLASES:
+            adyacencia = getattr(bigrafo, nombre)
+            self.salientes[nombre] = adyacencia.obtener_csr()
+            destinos = adyacencia.destinos.a_numpy()
+            inicios = np.zeros(cantidad_nodos + 1, dtype=np.int64)
+            grados_entrada = np.bincount(destinos, minlength=cantidad_nodos)
+            np.cumsum(grados_entrada, out=inicios[1:])
+            orden = np.argsort(destinos, kind="stable")
+            self.entrantes[nombre] = (inicios, adyacencia.origenes.a_numpy()[orden])
+            self.aristas[nombre] = set(adyacencia.claves().tolist())
+            self.grados[nombre] = (adyacencia.grados.a_numpy(), grados_entrada)
+
+    # Nodos del anfitrión con el tipo y el valor dados, o None si no hay filtro
+    def filtrar(self, tipo, valor):
+        bigrafo = self.bigrafo
+        candidatos = None
+        if tipo != COMODIN:
+            codigo = SIN_TIPO if tipo is None else bigrafo.codigos_tipos.get(tipo)
+            if codigo is None:
+                return np.empty(0, dtype=np.int64)
+            vector = bigrafo.indice_tipos().get(codigo)
+            if vector is None:
+                return np.empty(0, dtype=np.int64)
+            candidatos = vector.a_numpy().astype(np.int64)
+        if valor != COMODIN:
+            try:
+                entrada = bigrafo.indice_valores().get(valor)
+            except TypeError:  # Un valor que no se puede indexar
+                entrada = None
+            if entrada is None:
+                return np.empty(0, dtype=np.int64)
+            indices = np.atleast_1d(np.asarray(entrada, dtype=np.int64))
+            if candidatos is None:
+                candidatos = indices
+            else:
+                candidatos = candidatos[np.isin(candidatos, indices)]
+        return candidatos
+
+
+# Devuelve las ocurrencias del redex en el anfitrión, cada una como una tupla
+# con el índice en el anfitrión de cada nodo del redex (en el orden del
+# redex). Los nodos que el redex repite por automorfismos dan una ocurrencia
+# por cada asignación
+def ocurrencias(redex, anfitrion):
+    cantidad = len(redex.ids)
+    if not cantidad:
+        return
+    datos = _Anfitrion(anfitrion)
+    cantidad_anfitrion = len(anfitrion.ids)
+
+    # Aristas del redex sin repetir, y sus grados
+    restricciones = [[] for _ in range(cantidad)]  # (otro, clase, sale)
+    minimos = {}
+    for nombre in CLASES:
+        origenes, destinos = _separar(_sin_repetir(getattr(redex, nombre).claves()))
+        minimos[nombre] = (
+            np.bincount(origenes, minlength=cantidad),
+            np.bincount(destinos, minlength=cantidad),
+        )
+        for origen, destino in zip(origenes.tolist(), destinos.tolist()):
+            restricciones[origen].append((destino, nombre, True))
+            restricciones[destino].append((origen, nombre, False))
+
+    candidatos = []
+    for i in range(cantidad):
+        seleccion = datos.filtrar(
+            redex.tipo(redex.tipos[i]),
+            redex.valores[i],
+        )
+        mascara = np.ones(cantidad_anfitrion, dtype=bool)
+        if seleccion is not None:
+            mascara[:] = False
+            mascara[seleccion] = True
+        for nombre in CLASES:
+            salida, entrada = datos.grados[nombre]
+            minimo_salida, minimo_entrada = minimos[nombre]
+            if minimo_salida[i]:
+                mascara &= salida >= minimo_salida[i]
+            if minimo_entrada[i]:
+                mascara &= entrada >= minimo_entrada[i]
+        candidatos.append(mascara)
+    cantidades = [int(mascara.sum()) for mascara in candidatos]
+    if not all(cantidades):
+        return
+
+    # Orden de búsqueda: primero el nodo con menos candidatos, y después el
+    # que tiene más aristas a nodos ya ordenados (con menos candidatos si
+    # empatan), cuyos candidatos salen de los vecinos de uno de ellos
+    orden = [min(range(cantidad), key=cantidades.__getitem__)]
+    posiciones = {orden[0]: 0}
+    while len(orden) < cantidad:
+        siguiente = min(
+            (i for i in range(cantidad) if i not in posiciones),
+            key=lambda i: (
+                -sum(otro in posiciones for otro, _, _ in restricciones[i]),
+                cantidades[i],
+            ),
+        )
+        posiciones[siguiente] = len(orden)
+        orden.append(siguiente)
+
+    # Cada paso tiene las aristas a nodos anteriores que hay que comprobar;
+    # un lazo se comprueba contra el mismo nodo
+    pasos = []
+    for nodo in orden:
+        anteriores = [
+            (posiciones[otro], nombre, sale)
+            for otro, nombre, sale in restricciones[nodo]
+            if posiciones[otro] < posiciones[nodo]
+        ]
+        lazos = [
+            (posiciones[nodo], nombre, True)
+            for otro, nombre, sale in restricciones[nodo]
+            if otro == nodo and sale
+        ]
+        permitidos = candidatos[nodo].view(np.uint8).tobytes()
+        if anteriores:
+            ancla, nombre, sale = anteriores[0]
+            # Si el nodo sale hacia el ancla, es un entrante del ancla
+            inicios, vecinos = (datos.entrantes if sale else datos.salientes)[nombre]
+            pasos.append(
+                (None, ancla, inicios, vecinos, anteriores[1:] + lazos, permitidos)
+            )
+        else:
+            pasos.append(
+                (
+                    np.flatnonzero(candidatos[nodo]).tolist(),
+                    None,
+                    None,
+                    None,
+                    lazos,
+                    permitidos,
+                )
+            )
+
+    aristas = datos.aristas
+    asignacion = [0] * cantidad
+    usados = set()
+
+    def buscar(k):
+        if k == cantidad:
+            resultado = [0] * cantidad
+            for posicion, nodo in enumerate(orden):
+                resultado[nodo] = asignacion[posicion]
+            yield tuple(resultado)
+            return
+        lista, ancla, inicios, vecinos, comprobar, permitidos = pasos[k]
+        if lista is None:
+            anclado = asignacion[ancla]
+            # Sin repetir los vecinos unidos por más de una arista
+            lista = dict.fromkeys(
+                vecinos[inicios[anclado] : inicios[anclado + 1]].tolist()
+            )
+        for candidato in lista:
+            if candidato in usados or not permitidos[candidato]:
+                continue
+            for otro, nombre, sale in comprobar:
+                asignado = candidato if otro == k else asignacion[otro]
+                clave = (
+                    candidato << 32 | asignado if sale else asignado << 32 | candidato
+                )
+                if clave not in aristas[nombre]:
+                    break
+            else:
+                asignacion[k] = candidato
+                usados.add(candidato)
+                yield from buscar(k + 1)
+                usados.discard(candidato)
+
+    yield from buscar(0)
@@ -0,0 +1,199 @@
+import sys
+
+# Salidas del intérprete.
+#
+# Las sentencias no imprimen con print: avisan a la salida del intérprete
+# (DreamchaserInterpreter.salida), que decide qué hacer con cada mensaje. Hay
+# cuatro clases de mensajes:
+# - "traza": lo que informan las sentencias (Nodo creado en ..., Bigrafo
+#   seleccionado: ...). Llegan con un tipo (por ejemplo "nodo_creado"), una
+#   plantilla y sus datos, y la plantilla se formatea solo si hace falta el
+#   texto: la salida silenciosa las descarta sin formatearlas
+# - "advertencia" y "error": el mensaje ya formateado
+# - "imprimir": lo que imprime el programa con imprimir(...)
+#
+# La salida guarda la línea del programa que se está ejecutando en
+# self.linea, que el intérprete actualiza cuando la conoce: en el recorrido
+# del árbol la de cada sentencia y en la ejecución por partes la de cada
+# fragmento. Los motores compilados no guardan líneas en la RI, así que al
+# ejecutar un programa completo con ellos la línea queda en None.
+#
+# Salidas disponibles:
+# - Salida: escribe cada mensaje como una línea en un flujo de texto
+# - SalidaBuffer: junta los mensajes y los escribe de a bloques
+# - SalidaSilenciosa: descarta las trazas
+# - SalidaEventos: guarda los mensajes como eventos y los pasa a otra salida
+# - SalidaCola: pone los eventos en una cola, para leerlos desde otro hilo
+
+TAMANO_BUFFER = 64 * 1024  # caracteres
+CLASES = ("traza", "advertencia", "error", "imprimir")
+
+
+# Escribe en flujo; sin flujo, en el sys.stdout de cada momento (así
+# contextlib.redirect_stdout sigue funcionando)
+class Salida:
+    def __init__(self, flujo=None):
+        self.flujo = flujo
+        self.linea = None
+
+    def escribir(self, texto):
+        flujo = sys.stdout if self.flujo is None else self.flujo
+        flujo.write(texto + "\n")
+
+    # Escribe lo que quede pendiente; el intérprete la llama al terminar
+    def vaciar(self):
+        pass
+
+    def traza(self, tipo, plantilla, /, **datos):
+        self.escribir(plantilla.format_map(datos))
+
+    def advertencia(self, mensaje):
+        self.escribir(mensaje)
+
+    def error(self, mensaje):
+        self.escribir(mensaje)
+
+    # Igual que print(*valores)
+    def imprimir(self, *valores):
+        self.escribir(" ".join(map(str, valores)))
+
+
+class SalidaBuffer(Salida):
+    def __init__(self, flujo=None, tamano=TAMANO_BUFFER):
+        super().__init__(flujo)
+        self.tamano = tamano
+        self.partes = []
+        self.pendientes = 0
+
+    def escribir(self, texto):
+        self.partes.append(texto)
+        self.pendientes += len(texto) + 1
+        if self.pendientes >= self.tamano:
+            self.vaciar()
+
+    def vaciar(self):
+        if not self.partes:
+            return
+        flujo = sys.stdout if self.flujo is None else self.flujo
+        flujo.write("\n".join(self.partes) + "\n")
+        self.partes.clear()
+        self.pendientes = 0
+
+
+# Descarta las trazas y cuenta cuántas descartó; los errores, las
+# advertencias y lo que imprime el programa se escriben igual
+class SalidaSilenciosa(Salida):
+    def __init__(self, flujo=None):
+        super().__init__(flujo)
+        self.omitidas = 0
+
+    def traza(self, tipo, plantilla, /, **datos):
+        self.omitidas += 1
+
+
+class Evento:
+    __slots__ = ("clase", "tipo", "linea", "plantilla", "datos")
+
+    def __init__(self, clase, tipo, linea, plantilla, datos=None):
+        self.clase = clase
+        self.tipo = tipo
+        self.linea = linea
+        self.plantilla = plantilla
+        self.datos = datos
+
+    @property
+    def mensaje(self):
+        if self.datos is None:
+            return self.plantilla
+        return self.plantilla.format_map(self.datos)
+
+    def como_diccionario(self):
+        evento = {
+            "clase": self.clase,
+            "tipo": self.tipo,
+            "linea": self.linea,
+            "mensaje": self.mensaje,
+        }
+        if self.datos:
+            evento["datos"] = self.datos
+        return evento
+
+    def __repr__(self):
+        return (
+            f"Evento({self.clase}, {self.tipo}, linea={self.linea}: {self.mensaje!r})"
+        )
+
+
+# Guarda en self.eventos los mensajes de las clases indicadas, hasta maximo
+# eventos (None no limita; los demás solo se cuentan), y los pasa a siguiente
+# (si hay), que es la que los escribe
+class SalidaEventos(Salida):
+    def __init__(self, siguiente=None, clases=CLASES, maximo=None):
+        super().__init__()
+        self.siguiente = siguiente
+        self.clases = frozenset(clases)
+        self.maximo = maximo
+        self.eventos = []
+        self.descartados = 0
+
+    def guardar(self, clase, tipo, plantilla, datos=None):
+        if clase not in self.clases:
+            return
+        if self.maximo is not None and len(self.eventos) >= self.maximo:
+            self.descartados += 1
+            return
+        self.eventos.append(Evento(clase, tipo, self.linea, plantilla, datos))
+
+    def escribir(self, texto):
+        if self.siguiente is not None:
+            self.siguiente.escribir(texto)
+
+    def vaciar(self):
+        if self.siguiente is not None:
+            self.siguiente.vaciar()
+
+    def traza(self, tipo, plantilla, /, **datos):
+        self.guardar("traza", tipo, plantilla, datos)
+        if self.siguiente is not None:
+            self.siguiente.traza(tipo, plantilla, **datos)
+
+    def advertencia(self, mensaje):
+        self.guardar("advertencia", "advertencia", mensaje)
+        if self.siguiente is not None:
+            self.siguiente.advertencia(mensaje)
+
+    def error(self, mensaje):
+        self.guardar("error", "error", mensaje)
+        if self.siguiente is not None:
+            self.siguiente.error(mensaje)
+
+    def imprimir(self, *valores):
+        texto = " ".join(map(str, valores))
+        self.guardar("imprimir", "imprimir", texto)
+        if self.siguiente is not None:
+            self.siguiente.imprimir(texto)
+
+    # Los eventos como texto, una línea por evento
+    def texto(self):
+        return "".join(evento.mensaje + "\n" for evento in self.eventos)
+
+
+# Pone cada mensaje como un Evento en cola (por ejemplo, un queue.SimpleQueue
+# que lee el hilo de la GUI mientras el programa se ejecuta en otro)
+class SalidaCola(Salida):
+    def __init__(self, cola):
+        super().__init__()
+        self.cola = cola
+
+    def traza(self, tipo, plantilla, /, **datos):
+        self.cola.put(Evento("traza", tipo, self.linea, plantilla, datos))
+
+    def advertencia(self, mensaje):
+        self.cola.put(Evento("advertencia", "advertencia", self.linea, mensaje))
+
+    def error(self, mensaje):
+        self.cola.put(Evento("error", "error", self.linea, mensaje))
+
+    def imprimir(self, *valores):
+        texto = " ".join(map(str, valores))
+        self.cola.put(Evento("imprimir", "imprimir", self.linea, texto))
@@ -0,0 +1,231 @@
+import tkinter as tk
+from functools import partial
+from itertools import islice
+from tkinter import ttk
+
+# Visor del estado final para la GUI.
+#
+# El estado se muestra en un ttk.Treeview con cuatro grupos cerrados
+# (Variables, Constantes, Funciones y Bigrafos) que solo llevan la cantidad
+# de elementos. Los hijos de un elemento se generan cuando se abre, de a
+# TAMANO_PAGINA: al final de cada página queda un elemento "Mostrar más..."
+# que, al abrirlo, agrega la página siguiente. Así mostrar el estado de un
+# bigrafo de un millón de nodos solo inserta cuatro filas, y abrirlo, unas
+# doscientas.
+#
+# Cada hijo es un par (texto, expandir): expandir es None para las hojas o
+# una función sin argumentos que devuelve un iterador de hijos.
+#
+# La búsqueda por id agrega arriba un grupo con los nodos cuyo id es el
+# buscado (en todos los bigrafos) seguidos de los que lo contienen, también
+# de a páginas.
+TAMANO_PAGINA = 200
+TEXTO_MAS = "Mostrar más..."
+
+
+class VisorEstado:
+    def __init__(self, padre):
+        self.marco = tk.Frame(padre)
+
+        barra = tk.Frame(self.marco)
+        barra.pack(side=tk.TOP, fill=tk.X)
+        tk.Label(barra, text="Buscar nodo:").pack(side=tk.LEFT)
+        self.busqueda = tk.StringVar()
+        entrada = tk.Entry(barra, textvariable=self.busqueda)
+        entrada.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        entrada.bind("<Return>", lambda evento: self.buscar(self.busqueda.get()))
+        tk.Button(
+            barra, text="Buscar", command=lambda: self.buscar(self.busqueda.get())
+        ).pack(side=tk.LEFT)
+
+        self.arbol = ttk.Treeview(self.marco, show="tree", selectmode="browse")
+        barra_desplazamiento = ttk.Scrollbar(
+            self.marco, orient=tk.VERTICAL, command=self.arbol.yview
+        )
+        self.arbol.configure(yscrollcommand=barra_desplazamiento.set)
+        barra_desplazamiento.pack(side=tk.RIGHT, fill=tk.Y)
+        self.arbol.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.arbol.bind("<<TreeviewOpen>>", self.al_abrir)
+
+        self.iniciar()
+
+    def iniciar(self):
+        self.interprete = None
+        self.pendientes = {}  # elemento sin cargar -> expandir
+        self.paginas = {}  # elemento "Mostrar más..." -> (padre, hijos, siguiente)
+        self.elemento_busqueda = None
+
+    def limpiar(self):
+        self.arbol.delete(*self.arbol.get_children())
+        self.iniciar()
+
+    def mostrar(self, interprete):
+        self.limpiar()
+        self.interprete = interprete
+        grupos = (
+            ("Variables", interprete.variables, hijos_valores),
+            ("Constantes", interprete.constants, hijos_valores),
+            ("Funciones", interprete.functions, hijos_funciones),
+            ("Bigrafos", interprete.bigrafos, hijos_bigrafos),
+        )
+        for nombre, elementos, generar in grupos:
+            expandir = partial(generar, elementos) if elementos else None
+            self.agregar("", f"{nombre} ({len(elementos):,})", expandir)
+
+    # Inserta un hijo; si se puede expandir, con un hijo vacío para que el
+    # Treeview muestre el indicador, que se reemplaza al abrirlo
+    def agregar(self, padre, texto, expandir=None, indice="end"):
+        elemento = self.arbol.insert(padre, indice, text=texto)
+        if expandir is not None:
+            self.arbol.insert(elemento, "end", text="")
+            self.pendientes[elemento] = expandir
+        return elemento
+
+    def al_abrir(self, evento=None):
+        elemento = self.arbol.focus()
+        if elemento in self.paginas:
+            # El Treeview marca el elemento como abierto después de avisar,
+            # así que no se puede borrar todavía
+            self.arbol.after_idle(self.cargar_mas, elemento)
+        else:
+            self.cargar(elemento)
+
+    def cargar(self, elemento):
+        expandir = self.pendientes.pop(elemento, None)
+        if expandir is None:
+            return
+        self.arbol.delete(*self.arbol.get_children(elemento))
+        hijos = iter(expandir())
+        siguiente = next(hijos, None)
+        if siguiente is None:
+            self.agregar(elemento, "(vacío)")
+        else:
+            self.cargar_pagina(elemento, hijos, siguiente)
+
+    # Agrega siguiente y hasta TAMANO_PAGINA - 1 hijos más; si quedan, un
+    # "Mostrar más..." con el primero que sobró
+    def cargar_pagina(self, padre, hijos, siguiente):
+        self.agregar(padre, *siguiente)
+        for hijo in islice(hijos, TAMANO_PAGINA - 1):
+            self.agregar(padre, *hijo)
+        siguiente = next(hijos, None)
+        if siguiente is not None:
+            mas = self.arbol.insert(padre, "end", text=TEXTO_MAS)
+            self.arbol.insert(mas, "end", text="")
+            self.paginas[mas] = (padre, hijos, siguiente)
+
+    def cargar_mas(self, elemento):
+        pagina = self.paginas.pop(elemento, None)
+        if pagina is None:
+            return
+        self.arbol.delete(elemento)
+        self.cargar_pagina(*pagina)
+
+    # Agrega (o reemplaza) el grupo con los resultados de buscar un id y
+    # selecciona el primero
+    def buscar(self, texto):
+        texto = texto.strip()
+        if self.elemento_busqueda is not None:
+            self.olvidar(self.elemento_busqueda)
+            self.arbol.delete(self.elemento_busqueda)
+            self.elemento_busqueda = None
+        if not texto or self.interprete is None:
+            return
+        elemento = self.agregar(
+            "",
+            f"Búsqueda: {texto}",
+            partial(hijos_busqueda, self.interprete.bigrafos, texto),
+            indice=0,
+        )
+        self.elemento_busqueda = elemento
+        self.cargar(elemento)
+        self.arbol.item(elemento, open=True)
+        resultados = self.arbol.get_children(elemento)
+        self.arbol.see(resultados[0])
+        self.arbol.selection_set(resultados[0])
+        self.arbol.focus(resultados[0])
+
+    # Olvida los elementos pendientes de un subárbol que se va a borrar
+    def olvidar(self, elemento):
+        self.pendientes.pop(elemento, None)
+        self.paginas.pop(elemento, None)
+        for hijo in self.arbol.get_children(elemento):
+            self.olvidar(hijo)
+
+
+def hijos_valores(valores):
+    for nombre, valor in valores.items():
+        yield f"{nombre} = {valor}", None
+
+
+def hijos_funciones(funciones):
+    for nombre, funcion in funciones.items():
+        yield f"{nombre}({', '.join(funcion['params'])})", None
+
+
+def hijos_bigrafos(bigrafos):
+    for id_bigrafo, bigrafo in bigrafos.items():
+        yield (
+            f"{id_bigrafo} ({len(bigrafo.ids):,} nodos)",
+            partial(hijos_nodos, bigrafo, range(len(bigrafo.ids))),
+        )
+
+
+def hijos_nodos(bigrafo, indices, prefijo=""):
+    for indice in indices:
+        yield hijo_nodo(bigrafo, indice, prefijo)
+
+
+def hijo_nodo(bigrafo, indice, prefijo=""):
+    texto = (
+        f"{prefijo}Nodo {bigrafo.ids[indice]} (tipo: "
+        f"{bigrafo.tipo(bigrafo.tipos[indice])}, valor: {bigrafo.valores[indice]})"
+    )
+    if (
+        bigrafo.lugares.grados[indice]
+        or bigrafo.enlaces.grados[indice]
+        or bigrafo.indice_padre(indice) is not None
+    ):
+        return texto, partial(hijos_detalle, bigrafo, indice)
+    return texto, None
+
+
+# Padre, lugares y enlaces de un nodo; los lugares y los enlaces son nodos
+# que se pueden seguir abriendo
+def hijos_detalle(bigrafo, indice):
+    padre = bigrafo.indice_padre(indice)
+    if padre is not None:
+        yield f"Padre: {bigrafo.ids[padre]}", None
+    for nombre, adyacencia in (
+        ("Lugares", bigrafo.lugares),
+        ("Enlaces", bigrafo.enlaces),
+    ):
+        grado = adyacencia.grados[indice]
+        if grado:
+            yield (
+                f"{nombre} ({grado:,})",
+                partial(hijos_vecinos, bigrafo, adyacencia, indice),
+            )
+
+
+def hijos_vecinos(bigrafo, adyacencia, indice):
+    return hijos_nodos(bigrafo, adyacencia.vecinos(indice))
+
+
+# Primero los nodos cuyo id es texto (o el número texto) y después los que
+# contienen texto en el id, recorriendo los ids a medida que se piden páginas
+def hijos_busqueda(bigrafos, texto):
+    candidatos = [texto]
+    if texto.lstrip("-").isdigit():
+        candidatos.append(int(texto))
+    exactos = set()
+    for id_bigrafo, bigrafo in bigrafos.items():
+        for candidato in candidatos:
+            indice = bigrafo.indices.get(candidato)
+            if indice is not None:
+                exactos.add((id_bigrafo, indice))
+                yield hijo_nodo(bigrafo, indice, f"{id_bigrafo}: ")
+    for id_bigrafo, bigrafo in bigrafos.items():
+        for indice, id_nodo in enumerate(bigrafo.ids):
+            if texto in str(id_nodo) and (id_bigrafo, indice) not in exactos:
+                yield hijo_nodo(bigrafo, indice, f"{id_bigrafo}: ")